@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+"""
+Benchmarks the search of packet starts in recorded blobs, comparing
+``CCSDSBlob.find`` with the former octet-by-octet scan.
+
+Usage: python benchblob.py [blob files]
+If no file is given, takes the raw telemetry blobs recorded in the raw
+store of the ``TELEMETRYDUMPFOLDER`` folder
+"""
+
+
+def legacy_find(blobparser, start=0):
+    """
+    The former octet-by-octet scan of ``CCSDSBlob.find``, for reference
+    """
+    self = blobparser
+    if len(self.blob[start:start+self.octcut]) == 0:
+        # empty blob
+        return 0
+    for i in range(len(self.blob[start:-self.octcut-1])):
+        # read the ccsds head one octet more for further checks
+        headhex = self.blob[start+i:start+i+self.octcut+1]
+        head = bincore.hex2bin(headhex, pad=True)
+        # check if first bits are in authorized header
+        if head[:param_ccsds.AUTHPACKETLENGTH] in self.auth_bits:
+            # check sequence flag
+            seq = param_ccsds.SEQUENCEFLAG.unpack(headhex)
+            if seq == param_ccsds.SEQUENCEFLAG.dic_force:
+                # check packet category
+                pld = int(param_ccsds.PAYLOADFLAG.unpack(headhex))
+                cat = int(param_ccsds.PACKETCATEGORY.unpack(headhex))
+                if cat in param_category.CATEGORIES[pld].keys():
+                    return i
+    else:
+        return None
+
+
+def all_starts(blobparser, find):
+    """
+    Returns all the candidate packet starts in the blob
+    """
+    res = []
+    start = 0
+    idx = find(blobparser, start=start)
+    while idx is not None and start < len(blobparser.blob):
+        res.append(start + idx)
+        start += idx + 1
+        idx = find(blobparser, start=start)
+    return res
+
+
+def bench(blobs, repeat=3):
+    """
+    Times both scans over the ``blobs``, checks they agree
+    """
+    parsers = [CCSDSBlob(blob) for blob in blobs]
+    timing = {}
+    for name, find in [('legacy', legacy_find),
+                       ('sync', CCSDSBlob.find)]:
+        best = None
+        for _ in range(repeat):
+            t = time.time()
+            starts = [all_starts(parser, find) for parser in parsers]
+            t = time.time() - t
+            best = t if best is None else min(best, t)
+        timing[name] = (best, starts)
+    if timing['legacy'][1] != timing['sync'][1]:
+        raise AssertionError("Scans disagree on packet starts")
+    return timing['legacy'][0], timing['sync'][0],\
+            sum(len(item) for item in timing['sync'][1])
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from byt import Byt
+    from nanoutils import bincore
+    from nanoutils import RawStore
+    from nanoparam import param_all
+    from nanoparam import param_ccsds
+    from nanoparam.categories import param_category
+    from nanoctrl.ccsds import CCSDSBlob
+
+    files = sys.argv[1:]
+    blobs = []
+    for path in files:
+        f = open(path, mode='rb')
+        blobs.append(Byt(f.read()))
+        f.close()
+    if len(files) == 0:
+        store = RawStore(param_all.Pathing(param_all.TELEMETRYDUMPFOLDER).path)
+        for segment in store.segments():
+            blobs += [data for _, _, data in store.iter_records(segment)]
+    if len(blobs) == 0:
+        print("No recorded blob found")
+        sys.exit(1)
+    print("{} blobs, {} octets".format(len(blobs),
+                                       sum(len(blob) for blob in blobs)))
+    legacy, sync, n = bench(blobs)
+    print("{} packet starts found".format(n))
+    print("legacy scan: {:.4f} s".format(legacy))
+    print("sync scan:   {:.4f} s".format(sync))
+    print("speedup:     x{:.1f}".format(legacy/max(sync, 1e-9)))
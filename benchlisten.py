@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+"""
+Benchmarks the latency between the reception of octets on the antenna
+and their reading by the listening loop, comparing the ``select``-based
+``listening.get_data`` with the former 10 ms polling, over a pty-backed
+fake antenna.
+
+Usage: python benchlisten.py [number of packets]
+"""
+
+
+def legacy_get_data(antenna):
+    """
+    The former polling of ``listening.get_data``, for reference
+    """
+    time.sleep(0.01)  # Don't kill the CPU
+    n = antenna.in_waiting()
+    if n < 0:
+        return None
+    data = antenna.read(size=n)
+    if data is None:
+        return None
+    if len(data) == 0:
+        return None
+    return Byt(data)
+
+
+def bench(get_data, antenna, n=200, idle=1.):
+    """
+    Feeds ``n`` packets to the ``antenna`` at random times, returns the
+    reception latencies in sec and the CPU time in sec spent over
+    ``idle`` sec without incoming data
+    """
+    packet = Byt('\x10\x80\x00\x05hello')
+    latencies = []
+    for _ in range(n):
+        time.sleep(random.uniform(0, 0.005))
+        t = time.time()
+        antenna.feed(packet)
+        got = Byt()
+        while len(got) < len(packet):
+            data = get_data()
+            if data is not None:
+                got += data
+        latencies.append(time.time() - t)
+    cpu = sum(os.times()[:2])
+    t = time.time()
+    while time.time() - t < idle:
+        get_data()
+    cpu = sum(os.times()[:2]) - cpu
+    return latencies, cpu
+
+
+def summary(name, latencies, cpu):
+    latencies = sorted(latencies)
+    print("{:8s} mean {:7.3f} ms  p50 {:7.3f} ms  p99 {:7.3f} ms  "
+          "idle CPU {:5.1f} %".format(name,
+            1000*sum(latencies)/len(latencies),
+            1000*latencies[len(latencies)//2],
+            1000*latencies[int(len(latencies)*0.99)],
+            100*cpu))
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    import random
+    from byt import Byt
+    from nanoutils.fakeantenna import FakeAntenna
+    from nanoapps import listening
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    antenna = FakeAntenna()
+    listening.ANTENNA = antenna
+    listening.ANTENNAFD = listening.get_antenna_fd(antenna)
+    print("{} packets over {}".format(n, antenna.port))
+    summary('legacy', *bench(lambda: legacy_get_data(antenna), antenna, n))
+    summary('select', *bench(listening.get_data, antenna, n))
+    antenna.close()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+"""
+Benchmarks the generation of telecommand packets for high-rate command
+sequences, comparing ``TCTemplate.generate`` with
+``Command._generate_packet``, and the header packing alone.
+Packet ids are taken from a local counter, the packet id file is left
+untouched.
+
+Usage: python benchtc.py [number of packets] [data length]
+"""
+
+
+FLASHWRITE = {'number': 1,
+              'name': 'flash_write',
+              'pid': 'payload',
+              'desc': "Writes a chunk in the flash",
+              'lparam': "*",
+              'subsystem': 'payload',
+              'param': (('address', 'blah', '0:4294967295', 'uint32', 1),
+                        ('chunk', 'blah', '0:255', 'str', '1:255'),
+                        ('crc', 'blah', '0:4294967295', 'uint32', 1))}
+
+
+def timeit(fct, n):
+    """
+    Returns the best mean time in sec of ``n`` calls to ``fct``
+    """
+    best = None
+    for _ in range(3):
+        t = time.time()
+        for i in range(n):
+            fct(i)
+        t = (time.time() - t) / n
+        best = t if best is None else min(best, t)
+    return best
+
+
+def bench(cmd, n, size, signit):
+    """
+    Times the generation of ``n`` packets of ``size`` octets of data,
+    checks both ways agree
+    """
+    tpl = TCTemplate(cmd, signit=signit)
+    chunk = 'x' * size
+    for i in range(3):
+        core.get_set_next_tc_packet_id = lambda: i
+        legacy = cmd._generate_packet(address=i, chunk=chunk, signit=signit)
+        packet = tpl.generate(address=i, chunk=chunk)
+        if bytes(legacy[0]) != bytes(packet[0]) or legacy[1] != packet[1]:
+            raise AssertionError("Template and command packets disagree")
+    ids = itertools.count()
+    core.get_set_next_tc_packet_id = lambda: next(ids) % 16384
+    data, inputs = cmd.generate_data(address=0, chunk=chunk)
+    return {'command': timeit(lambda i: cmd._generate_packet(address=i,
+                                            chunk=chunk, signit=signit), n),
+            'template': timeit(lambda i: tpl.generate(address=i,
+                                                      chunk=chunk), n),
+            'command headers': timeit(lambda i: cmd._add_siggy(
+                                    cmd._seal_packet(TCPacker.pack(
+                                        pid=cmd._pidstr, TCdata=data,
+                                        TCid=cmd.number, retvalues=False,
+                                        signit=False), inputs),
+                                    signit=signit), n),
+            'template headers': timeit(lambda i: tpl._fill(i % 16384, None,
+                                                           data, inputs), n)}
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import itertools
+    from nanoparam import param_all
+    from nanoutils import core
+    from nanoctrl.ccsds import TCPacker
+    from nanoctrl.cmd.cmd_patch import genericCrcPatch
+    from nanoctrl.cmd.tctemplate import TCTemplate
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+    cmd = genericCrcPatch(**FLASHWRITE)
+    print("{} packets of {} octets of data".format(n, size))
+    for signit in sorted(set([False, param_all.USESIGGY])):
+        timing = bench(cmd, n, size, signit)
+        print("signed: {}".format(signit))
+        for name in ['command', 'template', 'command headers',
+                     'template headers']:
+            print("  {:<17} {:.1f} us".format(name+':', timing[name]*1e6))
+        print("  speedup:          x{:.1f} (headers x{:.1f})".format(
+                timing['command']/max(timing['template'], 1e-9),
+                timing['command headers']/max(timing['template headers'],
+                                              1e-9)))
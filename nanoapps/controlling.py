@@ -37,7 +37,7 @@ from nanoutils import core
 from nanoutils import ctrlexception
 from nanoutils.report import REPORTS, EXTRADISPKEY
 from nanoutils import param_sys
-from nanoctrl.ccsds import CCSDSBlob
+from nanoctrl.ccsds import get_scanner
 from nanoctrl.kiss import Framer
 from nanoctrl.ccsds import TMUnPacker
 from nanoctrl.ccsds import TCUnPacker
@@ -96,14 +96,9 @@ class ControlRec(hein.SocReceiver):
                 pkid = res[param_ccsds.PACKETID.name]
                 db.update_sent_TC_time(pkid, data['t'])
         elif key == 'dic':
-            blobparser = CCSDSBlob(blobish)
-            start = 0
-            pk = blobparser.grab_first_packet(start=start)
-            while pk is not None:
+            for _, pk in get_scanner(mode='tm').iter_packets(blobish):
                 data['data'] = Byt(pk)
                 process_incoming(**data)
-                start += len(pk)
-                pk = blobparser.grab_first_packet(start=start)
 
 
 def process_incoming(**kwargs):
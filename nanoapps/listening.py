@@ -27,16 +27,18 @@
 
 import time
 import os
-import glob
+import select
 import hein
 from byt import Byt
-from threading import Thread
 
 from nanoutils.report import REPORTS
 from nanoutils import core
 from nanoparam import param_all_processed as param_all
 import nanoantennae
 from nanoutils import ctrlexception
+from nanoutils import param_sys
+from nanoutils import OrderedPool
+from nanoutils import RawStore
 
 
 __all__ = ['process_data', 'init', 'close', 'report', 'theloop']
@@ -45,6 +47,10 @@ __all__ = ['process_data', 'init', 'close', 'report', 'theloop']
 LISTEN_TRANS = None
 LISTEN_REC_CONTROL = None
 ANTENNA = None
+ANTENNAFD = None
+POOL = None
+STORE = None
+LASTPOOLREPORT = 0
 running = False
 
 
@@ -84,24 +90,31 @@ class ListenRec(hein.SocReceiver):
             report('sentTC', t=now, data=data)
 
 
-def process_data(data):
+def process_data(t, segment, offset, data):
     """
-    A callback function that saves the package and sends it
-    over the TM socket
+    A callback function, run by the workers, that returns what to send
+    over the TM socket for a package stored in the raw store
     """
-    if len(data) == 0:
-        return
-    now = core.now()
-    name = now.strftime(param_all.TELEMETRYNAMEFORMAT)
-    name = param_all.Pathing(param_all.TELEMETRYDUMPFOLDER, name)
-    if name.isfile:  # already exists
-        name.path += ".{}".format(len(glob.glob(name.path))+1)
-    # locally saved
-    f = open(name.path, mode='wb')
-    f.write(data)
-    f.close()
-    # sends packets on the socket
-    LISTEN_TRANS.tell_dict(t=now, path=name.path, data=data)
+    return {'t': t, 'segment': segment, 'offset': offset, 'data': data}
+
+
+def send_data(res):
+    """
+    A callback function that sends the saved packages over the TM
+    socket, in the order they were received
+    """
+    global LASTPOOLREPORT
+    LISTEN_TRANS.tell_dict(**res)
+    if time.time() - LASTPOOLREPORT >= param_sys.LISTENPOOLREPORT:
+        LASTPOOLREPORT = time.time()
+        report('listenQueue', **POOL.stats())
+
+
+def failed_data(error, t, segment, offset, data):
+    """
+    A callback function if the package could not be processed
+    """
+    report('failedBlob', segment=segment, offset=offset, error=repr(error))
 
 
 def report(*args, **kwargs):
@@ -113,10 +126,51 @@ def report(*args, **kwargs):
     LISTEN_TRANS.tell_report(**rp)
 
 
-def get_data():
-    time.sleep(0.01)  # Don't kill the CPU
+def get_antenna_fd(antenna):
+    """
+    Returns the file descriptor of the antenna to wait on for incoming
+    data, or ``None`` if the backend does not expose one
+    """
+    fileno = getattr(antenna, 'fileno', None)
+    if fileno is None:
+        return None
+    try:
+        fd = fileno()
+    except (IOError, OSError, ValueError, AttributeError):
+        return None
+    if not isinstance(fd, int) or fd < 0:
+        return None
+    return fd
+
+
+def wait_data(timeout=None):
+    """
+    Waits for incoming data on the antenna, at most ``timeout`` sec
+    (defaults to ``param_sys.ANTENNAWAIT``) so that the loop can check
+    whether it should stop. Falls back on a short sleep if the antenna
+    has no file descriptor
+    """
+    if timeout is None:
+        timeout = param_sys.ANTENNAWAIT
+    if ANTENNAFD is None:
+        time.sleep(param_sys.ANTENNAPOLL)  # Don't kill the CPU
+        return True
+    try:
+        ready = select.select([ANTENNAFD], [], [], timeout)[0]
+    except (IOError, OSError, select.error, ValueError):
+        # fd closed or interrupted, let the caller check ``running``
+        return False
+    return len(ready) > 0
+
+
+def get_data(timeout=None):
+    if not wait_data(timeout=timeout):
+        return None
     n = ANTENNA.in_waiting()
-    if n < 0:
+    if n <= 0:
+        if ANTENNAFD is not None:
+            # readable but nothing to read: hang-up, don't spin on it
+            time.sleep(param_sys.ANTENNAPOLL)
         return None
     # grab data
     data = ANTENNA.read(size=n)
@@ -129,11 +183,14 @@ def get_data():
 
 
 def proceed(data):
+    if len(data) == 0:
+        return
     report('GotBlob', ll=len(data), blob=data)
-    # deal with it in a separate thread
-    loopy = Thread(target=process_data, args=(data,))
-    loopy.daemon = True
-    loopy.start()
+    # stored locally in reception order
+    now = core.now()
+    segment, offset = STORE.append(data, t=now)
+    # deal with it in the workers, blocks if too many are pending
+    POOL.put(now, segment, offset, data)
 
 
 if not param_all.FRAMESFLOW:
@@ -145,18 +202,16 @@ if not param_all.FRAMESFLOW:
             proceed(data)
 else:
     def theloop():
-        inbuff = Byt()
+        reassembler = core.get_flow_reassembler()
         while running:
             data = get_data()
             if data is None:
                 continue
-            inbuff += data
-            res = core.split_flow(data=inbuff, n=-1)
-            if len(res) < 2:
-                continue  # didn't find a full packet yet
-            inbuff = res.pop(-1)
-            for packet in res:
+            dropped = reassembler.dropped
+            for packet in reassembler.feed(data):
                 proceed(packet)
+            if reassembler.dropped > dropped:
+                report('flowResync', ll=reassembler.dropped - dropped)
 
 
 def init(antenna):
@@ -166,10 +221,17 @@ def init(antenna):
     ``antenna`` can be:
       * ``checkoutbox``: the ISIS rfcheckoutbox
       * ``serial``: the serial/USB port
+      * an antenna object, e.g. ``nanoutils.fakeantenna.FakeAntenna``
+
+    If the antenna exposes a ``fileno``, the listening loop waits on it
+    with ``select`` instead of polling
     """
     global LISTEN_TRANS
     global LISTEN_REC_CONTROL
     global ANTENNA
+    global ANTENNAFD
+    global POOL
+    global STORE
     global running
     if running:
         return
@@ -182,8 +244,17 @@ def init(antenna):
                                 connectWait=0.5,
                                 portname=param_all.CONTROLLINGPORT[1],
                                 hostname = 'localhost')
-    report('SettingUpAntenna', antenna=antenna)
-    ANTENNA = getattr(nanoantennae, antenna).ANT()
+    if isinstance(antenna, str):
+        report('SettingUpAntenna', antenna=antenna)
+        ANTENNA = getattr(nanoantennae, antenna).ANT()
+    else:
+        report('SettingUpAntenna', antenna=type(antenna).__name__)
+        ANTENNA = antenna
+    ANTENNAFD = get_antenna_fd(ANTENNA)
+    STORE = RawStore(param_all.Pathing(param_all.TELEMETRYDUMPFOLDER).path)
+    POOL = OrderedPool(process_data, nworkers=param_sys.LISTENWORKERS,
+                       maxsize=param_sys.LISTENQUEUEMAXSIZE,
+                       whenDone=send_data, whenFailed=failed_data)
     running = True
 
 
@@ -194,10 +265,15 @@ def close():
     global LISTEN_TRANS
     global LISTEN_REC_CONTROL
     global ANTENNA
+    global ANTENNAFD
+    global POOL
+    global STORE
     global running
     if not running:
         return
     running = False
+    POOL.close()
+    STORE.close()
     LISTEN_TRANS.close()
     LISTEN_REC_CONTROL.stop_connectLoop()
     LISTEN_REC_CONTROL.close()
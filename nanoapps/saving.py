@@ -32,10 +32,13 @@ import paramiko
 from byt import Byt
 from nanoutils import core
 from nanoutils import ctrlexception
+from nanoutils import RawStore
+from nanoutils import Archiver
+from nanoutils import param_sys
 from nanoparam import param_all_processed as param_all
 from nanoutils.report import REPORTS
-from nanoctrl.telemetry import Telemetry
-from nanoctrl.ccsds import CCSDSBlob
+from nanoctrl.tmwriter import TMWriter
+from nanoctrl.ccsds import get_scanner
 from nanoctrl.kiss import Framer
 
 
@@ -46,7 +49,18 @@ __all__ = ['init', 'close', 'report']
 SAVE_TRANS = None
 SAVE_REC_LISTEN = None
 running = False
-SERVER = [None, None]
+WRITER = None
+ARCHIVER = None
+STORE = None
+CHECKPOINT = {}
+ARCHIVING = set()
+ARCHIVED = []
+# segments uploaded past the archived one of the checkpoint
+UPLOADED = set()
+# (segment, offset) of the last raw record queued for saving
+LASTRECORD = None
+# (segment, offset) that the next raw record has if none was missed
+NEXTRECORD = None
 
 
 class SaveTrans(hein.SocTransmitter):
@@ -74,35 +88,94 @@ class SaveRec(hein.SocReceiver):
         if key == 'rpt':
             return
         report('receivedTM')
-        if param_all.AX25ENCAPS:
-            source, destination, blobish = Framer.decode_radio(data['data'])
-            if source == Byt():
-                report('receivedCallsignTM', source=source, ll=len(blobish),
-                            destination=destination)
-            else:
-                report('junkFromRF')
-        else:
-            blobish = data['data']
-            report('receivedRawTM', ll=len(blobish))
-        blobparser = CCSDSBlob(blobish)
-        start = 0
-        pk = blobparser.grab_first_packet(start=start)
-        while pk is not None:
-            data['data'] = Byt(pk)
-            process_incoming(**data)
-            start += len(pk)
-            pk = blobparser.grab_first_packet(start=start)
+        segment = str(data['segment'])
+        offset = int(data['offset'])
+        if (segment, offset) != NEXTRECORD:
+            # records stored while the saver was not listening, only
+            # read from the store when the record is not the next one
+            catch_up(segment, offset)
+        if not new_record(segment, offset, data['data']):
+            # already queued from the raw store
+            return
+        process_record(core.strISOstamp2datetime(data['t']), segment, offset,
+                       data['data'])
         return
 
 
-def moveto_save_folder(sftp, t=None):
+def new_record(segment, offset, data):
+    """
+    Whether the raw record comes after the last one queued for saving,
+    it then becomes the last one
+    """
+    global LASTRECORD
+    global NEXTRECORD
+    if LASTRECORD is not None and (segment, offset) <= LASTRECORD:
+        return False
+    LASTRECORD = (segment, offset)
+    NEXTRECORD = (segment, offset + STORE.record_size(data))
+    return True
+
+
+def process_record(t, segment, offset, data):
+    """
+    Splits a raw record into packets and queues them for saving
+    """
+    if param_all.AX25ENCAPS:
+        source, destination, blobish = Framer.decode_radio(data, view=True)
+        if source == Byt():
+            report('receivedCallsignTM', source=source, ll=len(blobish),
+                        destination=destination)
+        else:
+            report('junkFromRF')
+    else:
+        blobish = data
+        report('receivedRawTM', ll=len(blobish))
+    for _, pk in get_scanner(mode='tm').iter_packets(blobish):
+        process_incoming(t=t, segment=segment, offset=offset, data=Byt(pk))
+
+
+def catch_up(segment=None, offset=None):
+    """
+    Queues for saving the records of the raw store following the last
+    one queued, up to the record at ``segment``/``offset`` excluded, or
+    up to the end of the store. Returns the number of records queued
+
+    Args:
+      * segment (str): the segment of the record to stop at
+      * offset (int): the offset of the record to stop at
+    """
+    if LASTRECORD is None:
+        return 0
+    if segment == LASTRECORD[0]:
+        segments = [segment]
+    else:
+        segments = [item for item in STORE.segments()
+                    if item >= LASTRECORD[0]
+                    and (segment is None or item <= segment)]
+    n = 0
+    for seg in segments:
+        start = LASTRECORD[1] if seg == LASTRECORD[0] else 0
+        try:
+            for off, t, data in STORE.iter_records(seg, start):
+                if segment is not None and (seg, off) >= (segment, offset):
+                    return n
+                if new_record(seg, off, data):
+                    process_record(t, seg, off, data)
+                    n += 1
+        except ctrlexception.RawRecordCorrupted as e:
+            # the rest of the segment cannot be read
+            report('failedTM', path="{}@{}".format(seg, start),
+                   error=repr(e))
+    return n
+
+
+def get_save_folder(t=None):
     """
-    Given the sftp object, cd to the save folder after
-    creating it if it didn't exist.
+    Returns the save folder on the server
 
     Args:
-      * t (datetime): if None, goes to the user_id save folder,
-        otherwise to the user_id/YYYYMMDD save folder
+      * t (datetime): if None, the user_id save folder, otherwise the
+        user_id/YYYYMMDD save folder
     """
     path = param_all.TELEMETRYSAVEFOLDER.rstrip('/')\
                     .format(user_id=param_all.RECEIVERID)
@@ -110,45 +183,127 @@ def moveto_save_folder(sftp, t=None):
         path = path[:path.rfind('/')]  # server is linux
     else:
         path = t.strftime(path)
-    try:
-        sftp.chdir(path)  # Test if remote_path exists
-    except IOError:
-        sftp.mkdir(path)  # Create remote path
-        sftp.chdir(path)  # cd there
-    return sftp
+    return path
+
+
+def connect_server():
+    """
+    Opens a SFTP connection to the save server, returns the ssh and
+    sftp clients
+    """
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.load_host_keys(os.path.expanduser( os.path.join("~", ".ssh",
+                                                        "known_hosts")))
+    ssh.connect(param_all.TELEMETRYSAVESERVER,
+                username=param_all.TELEMETRYSAVEUSER,
+                password=param_all.TELEMETRYSAVEPASS)
+    return ssh, ssh.open_sftp()
 
 
-def process_incoming(t, path, data, **kwargs):
+def process_incoming(t, segment, offset, data, **kwargs):
     """
     A callback function that saves the package in the database after
     parsing it
     """
-    global SERVER
-    path = str(path)
-    if not os.path.isfile(path):
-        raise ctrlexception.PacketFileMissing(path)
-    #f = open(path, mode='rb')
-    #dd = Byt(f.read())
-    #f.close()
-    #if not dd == data:
-    #    raise ctrlexception.PacketMismatch(path)
-    t = core.strISOstamp2datetime(t)
-    if not t == core.packetfilename2datetime(path):
-        raise ctrlexception.PacketDateMismatch(path)
-    # create tmp file to indicate on-going copy and saving
-    open(path+'.tmp', 'w').close()
-    # copy raw file to server
-    if param_all.SAVERAWFILE:
-        # determine folderw ith date, creates it if missing and goes into it
-        SERVER[1] = moveto_save_folder(sftp=SERVER[1], t=t)
-        SERVER[1].put(path, '.')
-    # save TM to DB
-    tm = Telemetry._fromPacket(data, time_received=t)
-    # remove temp file after copy and DB saving successful
-    os.remove(path+'.tmp')
+    # queue TM for saving to DB
+    WRITER.put(data, time_received=t, segment=str(segment),
+               offset=int(offset))
+
+
+def saved_incoming(dbid, segment, offset):
+    """
+    A callback function called by the DB writer once the packet
+    is saved
+    """
+    # packets come in the order of the raw store
+    CHECKPOINT['segment'] = segment
+    CHECKPOINT['offset'] = offset
+    ###report('savedTM', dbid=dbid)
+
+
+def failed_incoming(error, segment, offset):
+    """
+    A callback function called by the DB writer if the packet
+    could not be saved
+    """
+    report('failedTM', path="{}@{}".format(segment, offset),
+           error=repr(error))
+    CHECKPOINT['segment'] = segment
+    CHECKPOINT['offset'] = offset
+
+
+def flushed_incoming(stats):
+    """
+    A callback function called by the DB writer after each commit
+    """
+    report('saveQueue', **stats)
+    STORE.save_checkpoint(param_all.SAVINGNAME, **CHECKPOINT)
+    archive_segments()
+
+
+def archive_segments():
+    """
+    Queues for upload to the server and/or removes the raw segments of
+    which all packets were processed, i.e. older than the checkpoint
+    segment
+    """
+    if 'segment' not in CHECKPOINT:
+        return
+    # segments uploaded by the archiver since last call
+    while len(ARCHIVED) > 0:
+        remove_segment(ARCHIVED.pop(0))
+    for segment in STORE.segments():
+        if segment >= CHECKPOINT['segment']:
+            break
+        if segment <= CHECKPOINT.get('archived', '')\
+                or segment in ARCHIVING or segment in UPLOADED:
+            continue
+        if param_all.SAVERAWFILE:
+            ARCHIVING.add(segment)
+            ARCHIVER.put(STORE.files(segment),
+                         t=STORE.segment_time(segment), segment=segment)
+        else:
+            remove_segment(segment)
+
+
+def remove_segment(segment):
+    """
+    Removes the raw segment if required, once archived
+    """
+    ARCHIVING.discard(segment)
     if param_all.REMOVERAWFILEAFTERSAVE:
-        os.remove(path)
-    ###report('savedTM', dbid=tm.id)
+        STORE.remove(segment)
+    UPLOADED.add(segment)
+    # only move the checkpoint over uploaded segments with no failed
+    # one in between, which is then uploaded again
+    archived = CHECKPOINT.get('archived', '')
+    for item in sorted(UPLOADED.union(STORE.segments())):
+        if item > archived:
+            if item not in UPLOADED:
+                break
+            archived = item
+        UPLOADED.discard(item)
+    CHECKPOINT['archived'] = archived
+    STORE.save_checkpoint(param_all.SAVINGNAME, **CHECKPOINT)
+
+
+def archived_segment(segment):
+    """
+    A callback function called by the archiver once the segment is
+    uploaded
+    """
+    # finished by the DB writer thread which owns the checkpoint
+    ARCHIVED.append(segment)
+
+
+def failed_segment(error, segment):
+    """
+    A callback function called by the archiver if the segment could
+    not be uploaded, it is queued again later
+    """
+    report('failedArchive', segment=segment, error=repr(error))
+    ARCHIVING.discard(segment)
 
 
 def report(*args, **kwargs):
@@ -167,28 +322,41 @@ def init():
     global SAVE_TRANS
     global SAVE_REC_LISTEN
     global running
-    global SERVER
+    global WRITER
+    global ARCHIVER
+    global STORE
+    global CHECKPOINT
+    global LASTRECORD
+    global NEXTRECORD
     if running:
         return
+    STORE = RawStore(param_all.Pathing(param_all.TELEMETRYDUMPFOLDER).path)
+    CHECKPOINT = STORE.load_checkpoint(param_all.SAVINGNAME)
+    # resume after the last record processed, if any, otherwise start
+    # with the first record received
+    LASTRECORD = None
+    NEXTRECORD = None
+    if 'segment' in CHECKPOINT:
+        LASTRECORD = (CHECKPOINT['segment'], CHECKPOINT['offset'])
+    # the writer queues the finished segments to the archiver
+    if param_all.SAVERAWFILE:
+        ARCHIVER = Archiver(connect=connect_server, remotepath=get_save_folder,
+                            bundle=param_sys.ARCHIVEBUNDLE,
+                            whenArchived=archived_segment,
+                            whenFailed=failed_segment)
+    WRITER = TMWriter(whenSaved=saved_incoming, whenFailed=failed_incoming,
+                        whenFlushed=flushed_incoming)
     SAVE_TRANS = SaveTrans(port=param_all.SAVINGPORT[0],
                             nreceivermax=len(param_all.SAVINGPORTLISTENERS),
                             start=True, portname=param_all.SAVINGPORT[1])
+    # queue what the listener stored while the saver was down
+    n = catch_up()
+    if n > 0:
+        report('caughtUpTM', n=n)
     SAVE_REC_LISTEN = SaveRec(port=param_all.LISTENINGPORT[0],
                                 name=param_all.SAVINGNAME, connect=True,
                                 connectWait=0.5,
                                 portname=param_all.LISTENINGPORT[1])
-    if param_all.SAVERAWFILE:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.load_host_keys(os.path.expanduser( os.path.join("~", ".ssh",
-                                                            "known_hosts")))
-        ssh.connect(param_all.TELEMETRYSAVESERVER,
-                    username=param_all.TELEMETRYSAVEUSER,
-                    password=param_all.TELEMETRYSAVEPASS)
-        sftp = ssh.open_sftp()
-        # creates the root user-folder if missing and moves into it
-        sftp = moveto_save_folder(sftp=sftp)
-        SERVER = [ssh, sftp]
     running = True
 
 
@@ -199,15 +367,24 @@ def close():
     global SAVE_TRANS
     global SAVE_REC_LISTEN
     global running
-    global SERVER
+    global WRITER
+    global ARCHIVER
+    global STORE
     if not running:
         return
     running = False
-    if param_all.SAVERAWFILE:
-        SERVER[0].close()
-        SERVER[1].close()
-    SAVE_TRANS.close()
+    # stop receiving, then save what is pending
     SAVE_REC_LISTEN.stop_connectLoop()
     SAVE_REC_LISTEN.close()
+    WRITER.close()
+    WRITER = None
+    # upload what is pending
+    if param_all.SAVERAWFILE:
+        ARCHIVER.close()
+        ARCHIVER = None
+        while len(ARCHIVED) > 0:
+            remove_segment(ARCHIVED.pop(0))
+    STORE = None
+    SAVE_TRANS.close()
     SAVE_TRANS = None
     SAVE_REC_LISTEN = None
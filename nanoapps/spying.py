@@ -75,7 +75,8 @@ def process_data(data):
     """
     if len(data) == 0:
         return
-    filename = os.path.split(str(data['path']))[1]
+    filename = "{}.{}".format(os.path.splitext(str(data['segment']))[0],
+                              data['offset'])
     local_path = os.path.join(DIRNAME, 'tm_data', filename)
     print("Spying: '{}' >> {}".format(data['data'].hex(), local_path))
     # locally saved
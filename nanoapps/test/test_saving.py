@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import shutil
+import tempfile
+from byt import Byt
+from nanoutils import RawStore
+from nanoapps import saving
+
+
+class Writer(object):
+    def __init__(self):
+        self.items = []
+
+    def put(self, data, time_received=None, segment=None, offset=None):
+        self.items.append((segment, offset, bytes(data)))
+
+
+class Archiver(object):
+    def __init__(self):
+        self.items = []
+
+    def put(self, files, t=None, segment=None):
+        self.items.append(segment)
+
+
+class SyncWriter(object):
+    """
+    A TM writer saving and flushing each packet at once
+    """
+    def __init__(self, whenSaved, whenFailed, whenFlushed):
+        self.whenSaved = whenSaved
+        self.whenFlushed = whenFlushed
+        self.items = []
+
+    def put(self, data, time_received=None, segment=None, offset=None):
+        self.items.append((segment, offset, bytes(data)))
+        self.whenSaved(len(self.items), segment, offset)
+        self.whenFlushed({})
+
+
+class Connection(object):
+    def __init__(self, **kwargs):
+        pass
+
+
+class Pathing(object):
+    def __init__(self, path):
+        self.path = path
+
+
+class Scanner(object):
+    def iter_packets(self, blob):
+        yield 0, blob
+
+
+SAVED = {}
+PARAMS = {'AX25ENCAPS': False, 'SAVERAWFILE': True,
+          'REMOVERAWFILEAFTERSAVE': True, 'SAVINGNAME': 'saving',
+          'TELEMETRYDUMPFOLDER': '', 'SAVINGPORT': (1, 'save'),
+          'SAVINGPORTLISTENERS': [], 'LISTENINGPORT': (2, 'listen'),
+          'Pathing': Pathing}
+
+
+def _patch():
+    for key in ['STORE', 'WRITER', 'ARCHIVER', 'LASTRECORD', 'NEXTRECORD',
+                'CHECKPOINT',
+                'ARCHIVING', 'ARCHIVED', 'UPLOADED', 'report',
+                'get_scanner', 'running', 'SAVE_TRANS', 'SAVE_REC_LISTEN',
+                'RawStore', 'TMWriter', 'Archiver', 'SaveTrans', 'SaveRec']:
+        SAVED[key] = getattr(saving, key)
+    for key, value in PARAMS.items():
+        SAVED['param_all.' + key] = getattr(saving.param_all, key, None)
+        setattr(saving.param_all, key, value)
+    saving.report = lambda *args, **kwargs: None
+    saving.get_scanner = lambda mode: Scanner()
+    saving.WRITER = Writer()
+    saving.ARCHIVER = Archiver()
+    saving.CHECKPOINT = {}
+    saving.ARCHIVING = set()
+    saving.ARCHIVED = []
+    saving.UPLOADED = set()
+
+
+def _unpatch():
+    for key, value in SAVED.items():
+        if key.startswith('param_all.'):
+            setattr(saving.param_all, key[len('param_all.'):], value)
+        else:
+            setattr(saving, key, value)
+    SAVED.clear()
+
+
+def _store(n):
+    folder = tempfile.mkdtemp()
+    # three records per segment
+    store = RawStore(folder, prefix='raw', maxsize=3*(20+6), maxtime=3600)
+    records = [store.append(Byt('blob{:02d}'.format(i)), t=1600000000 + i)
+               for i in range(n)]
+    return folder, store, records
+
+
+def _live(segment, offset, data):
+    rec = saving.SaveRec.__new__(saving.SaveRec)
+    rec.process('tm', {'t': '2020-09-13T12:26:40+00:00', 'segment': segment,
+                       'offset': offset, 'data': Byt(data)})
+
+
+def test_catch_up_init():
+    _patch()
+    try:
+        folder, store, records = _store(8)
+        saving.STORE = store
+        # checkpoint at the second record
+        saving.LASTRECORD = records[1]
+        assert saving.catch_up() == 6
+        assert [item[:2] for item in saving.WRITER.items] == records[2:]
+        assert saving.WRITER.items[0][2] == b'blob02'
+        assert saving.LASTRECORD == records[-1]
+        # nothing new
+        assert saving.catch_up() == 0
+        # no checkpoint, no catch-up
+        saving.LASTRECORD = None
+        assert saving.catch_up() == 0
+        store.close()
+        shutil.rmtree(folder)
+    finally:
+        _unpatch()
+
+
+def test_catch_up_live():
+    _patch()
+    try:
+        folder, store, records = _store(8)
+        saving.STORE = store
+        saving.LASTRECORD = records[1]
+        # records 2 to 4 were missed, across segments
+        _live(records[5][0], records[5][1], 'blob05')
+        # already queued from the store
+        _live(records[4][0], records[4][1], 'blob04')
+        _live(records[6][0], records[6][1], 'blob06')
+        assert [item[:2] for item in saving.WRITER.items] == records[2:7]
+        assert [item[2] for item in saving.WRITER.items] ==\
+                    [bytes(Byt('blob{:02d}'.format(i))) for i in range(2, 7)]
+        store.close()
+        shutil.rmtree(folder)
+    finally:
+        _unpatch()
+
+
+def test_live_no_read():
+    _patch()
+    try:
+        folder, store, records = _store(8)
+        saving.STORE = store
+        saving.LASTRECORD = records[1]
+        reads = []
+        iter_records = store.iter_records
+
+        def counted(segment, offset=0):
+            reads.append((segment, offset))
+            return iter_records(segment, offset)
+
+        store.iter_records = counted
+        for i in range(2, 8):
+            _live(records[i][0], records[i][1], 'blob{:02d}'.format(i))
+        assert [item[:2] for item in saving.WRITER.items] == records[2:]
+        # the first record and the first ones of the next segments are
+        # checked against the store, not their direct successors
+        assert [item[0] for item in reads] ==\
+                    [records[1][0], records[1][0], records[3][0],
+                     records[3][0], records[6][0]]
+        store.close()
+        shutil.rmtree(folder)
+    finally:
+        _unpatch()
+
+
+def test_archive_failed_segment():
+    _patch()
+    try:
+        folder, store, records = _store(12)
+        saving.STORE = store
+        segments = store.segments()
+        assert len(segments) == 4
+        # all records of the first three segments are saved
+        saving.CHECKPOINT.update(segment=records[-1][0],
+                                 offset=records[-1][1])
+        saving.archive_segments()
+        assert saving.ARCHIVER.items == segments[:3]
+        # the first upload fails, the next ones succeed
+        saving.failed_segment(IOError('down'), segments[0])
+        saving.archived_segment(segments[1])
+        saving.archived_segment(segments[2])
+        saving.archive_segments()
+        # the failed segment is kept and queued again, alone
+        assert saving.CHECKPOINT.get('archived', '') < segments[0]
+        assert store.segments() == [segments[0], segments[3]]
+        assert saving.ARCHIVER.items == segments[:3] + segments[:1]
+        assert store.load_checkpoint('saving') == saving.CHECKPOINT
+        # nothing queued twice while uploading
+        saving.archive_segments()
+        assert saving.ARCHIVER.items == segments[:3] + segments[:1]
+        # then it succeeds
+        saving.archived_segment(segments[0])
+        saving.archive_segments()
+        assert saving.CHECKPOINT['archived'] == segments[2]
+        assert store.segments() == segments[3:]
+        assert len(saving.UPLOADED) == 0
+        assert saving.ARCHIVER.items == segments[:3] + segments[:1]
+        store.close()
+        shutil.rmtree(folder)
+    finally:
+        _unpatch()
+
+
+def test_init_catch_up_archives():
+    _patch()
+    try:
+        folder, store, records = _store(8)
+        # the saver stopped at the second record
+        store.save_checkpoint('saving', segment=records[1][0],
+                              offset=records[1][1])
+        archiver = Archiver()
+        saving.ARCHIVER = None
+        saving.RawStore = lambda path: store
+        saving.TMWriter = SyncWriter
+        saving.Archiver = lambda **kwargs: archiver
+        saving.SaveTrans = Connection
+        saving.SaveRec = Connection
+        saving.init()
+        # the catch-up finished the first two segments while saving
+        assert [item[:2] for item in saving.WRITER.items] == records[2:]
+        segments = store.segments()
+        assert archiver.items == segments[:2]
+        assert saving.CHECKPOINT['segment'] == records[-1][0]
+        store.close()
+        shutil.rmtree(folder)
+    finally:
+        _unpatch()
@@ -41,3 +41,4 @@ from . import kiss
 from ._version import __version__, __major__, __minor__, __micro__
 from .telecommand import *
 from .telemetry import *
+from .tmwriter import *
@@ -28,6 +28,7 @@ from nanoutils.ccsds import ccsdsexception
 
 
 from .ccsdsblob import CCSDSBlob
+from .ccsdsscanner import CCSDSScanner, get_scanner, invalidate_scanners
 from .ccsdsunpacker import CCSDSUnPacker as _CCSDSUnPacker
 from .ccsdspacker import CCSDSPacker as _CCSDSPacker
 
@@ -25,17 +25,10 @@
 ###############################################################################
 
 
-from byt import Byt
-import math
-from nanoparam import param_apid
-from nanoparam.categories import param_category_common as pcc
-from nanoparam.categories import param_category
 from nanoparam import param_ccsds
-from nanoutils import bincore
-from nanoutils.ccsds import ccsdsexception as exc
 
 
-from .ccsdspacker import CCSDSPacker
+from .ccsdsscanner import get_scanner
 
 
 __all__ = ['CCSDSBlob']
@@ -53,23 +46,19 @@ class CCSDSBlob(object):
         * mode: 'tm' or 'tc'
         """
         self.blob = blob
-        pk = CCSDSPacker(mode=mode)
-        vals = {param_ccsds.PID.name: '',
-                param_ccsds.PACKETCATEGORY.name:\
-                    list(pcc.CATEGORIESCOMMON.keys())[0]}
-                    # just pick first common one cause it is not
-                    # taken into account in auth_start anyways
-        # building of possible packet start flags
-        self.auth_bits = []
-        self.octcut = int(math.ceil(param_ccsds.AUTHPACKETLENGTH / 8.))
-        for item in param_apid.PIDREGISTRATION.keys():
-            vals[param_ccsds.PID.name] = item
-            possible_head = bincore.hex2bin(
-                                pk.pack_primHeader(values=vals, datalen=0,
-                                        retvalues=False,
-                                        withPacketID=False)[:self.octcut])[\
-                                    :param_ccsds.AUTHPACKETLENGTH]
-            self.auth_bits.append(possible_head)
+        self._scanner = get_scanner(mode=mode)
+
+    @property
+    def auth_bits(self):
+        """
+        The possible packet start flags
+        """
+        self._scanner._refresh()
+        return self._scanner.auth_bits
+
+    @property
+    def octcut(self):
+        return self._scanner.octcut
 
     def find(self, start=0):
         """
@@ -79,25 +68,10 @@ class CCSDSBlob(object):
         Args:
         * start (int): from where the search should start
         """
-        if len(self.blob[start:start+self.octcut]) == 0:
-            # empty blob
-            return 0
-        for i in range(len(self.blob[start:-self.octcut-1])):
-            # read the ccsds head one octet more for further checks
-            headhex = self.blob[start+i:start+i+self.octcut+1]
-            head = bincore.hex2bin(headhex, pad=True)
-            # check if first bits are in authorized header
-            if head[:param_ccsds.AUTHPACKETLENGTH] in self.auth_bits:
-                # check sequence flag
-                seq = param_ccsds.SEQUENCEFLAG.unpack(headhex)
-                if seq == param_ccsds.SEQUENCEFLAG.dic_force:
-                    # check packet category
-                    pld = int(param_ccsds.PAYLOADFLAG.unpack(headhex))
-                    cat = int(param_ccsds.PACKETCATEGORY.unpack(headhex))
-                    if cat in param_category.CATEGORIES[pld].keys():
-                        return i
-        else:
+        idx = self._scanner.find(self.blob, start=start)
+        if idx is None:
             return None
+        return idx - start
 
     def grab_data_length(self, start):
         """
@@ -107,8 +81,7 @@ class CCSDSBlob(object):
         Args:
         * start (int): the first bit of the packet in the blob
         """
-        dum = bincore.hex2bin(self.blob[start:
-                                        start+param_ccsds.HEADER_P_KEYS.size])
+        dum = self.blob[start:start+param_ccsds.HEADER_P_KEYS.size]
         return param_ccsds.DATALENGTH.unpack(dum) - param_ccsds.LENGTHMODIFIER
 
     def find_first_packet(self, start=0):
@@ -120,24 +93,7 @@ class CCSDSBlob(object):
         Args:
         * start (int): from where the search should start
         """
-        idx = self.find(start=start)
-        if idx is None:
-            return None
-        start += idx
-        try:
-            length = self.grab_data_length(start=start)
-        except:
-            # issue, maybe the packet is cut before the data length bit
-            return None
-        # bullshit length, just restart search further
-        if length < param_ccsds.HEADER_P_KEYS.size:
-            return self.find_first_packet(start=start+1)
-        # bang on, found a new start where you expected it
-        elif self.find(start=start+param_ccsds.HEADER_P_KEYS.size+length) == 0:
-            return slice(start, start + param_ccsds.HEADER_P_KEYS.size + length)
-        # try again
-        else:
-            return self.find_first_packet(start=start+1)
+        return self._scanner.find_packet(self.blob, start=start)
 
     def grab_first_packet(self, start=0):
         """
@@ -106,25 +106,14 @@ class CCSDSPacker(object):
             for (key, sht, defa) in morevalues:
                 hd[key] = int(kwargs.pop(sht, hd.get(key, defa)))
             # process the "at" optional parameter
-            at = kwargs.pop('at', None)
-            if at is not None:
-                if isinstance(at, (tuple, list)):
-                    at = fcts.PosixUTC(*at[:6])
-                elif isinstance(at, datetime.datetime):
-                    at = fcts.PosixUTC.fromdatetime(at)
-                elif isinstance(at, PosixUTC):
-                    pass
-                else:
-                    raise exc.WrongAt(at)
-                # time in past: remove
-                if fcts.PosixUTC.now().totimestamp() > at.totimestamp():
-                    at = None
+            at = self.check_at(kwargs.pop('at', None))
         else:
             hd[param_ccsds.PACKETCATEGORY.name] = int(pktCat)
             at = None
         # header prim
         retprim = self.pack_primHeader(values=hd, datalen=len(TCdata),
-                                        retvalues=True, at=at)
+                                        retvalues=True,
+                                        withPacketID=withPacketID, at=at)
         # header sec
         retsec = self.pack_secHeader(values=hd, retvalues=True)
         # make header return values
@@ -158,10 +147,7 @@ class CCSDSPacker(object):
         else:
             # append timestamp before data
             if at is not None:
-                msstamp, daystamp = core.time2stamps(at)
-                TS = param_ccsds.EXTRATS_TELECOMMAND.pack(
-                        {param_ccsds.MSECSINCEREF_TELEMETRY.name: msstamp,
-                         param_ccsds.DAYSINCEREF_TELEMETRY.name: daystamp})[0]
+                TS = self.pack_timestamp(at)
                 TCdata = TS + TCdata
                 retprim = self.increment_data_length(
                                         datalen=len(TS),
@@ -187,6 +173,16 @@ class CCSDSPacker(object):
         if not kwargs.pop('signit', param_all.USESIGGY)\
                                 or self.mode == 'telemetry':
             return fullPacket, None
+        siggy = self.make_siggy(fullPacket)
+        # return concatenated turd
+        return fcts.setstr(fullPacket, self.siggy_slice(), siggy), siggy
+
+    def make_siggy(self, fullPacket):
+        """
+        Returns the signature of the input full packet with null
+        signature (fullPacket), masked and ready to be set at
+        ``siggy_slice`` in the packet
+        """
         # calculates the signature from full packet
         siggy = hmac(fullPacket)
         # apply mask
@@ -195,14 +191,53 @@ class CCSDSPacker(object):
         # fuck endians
         if bincore.TWINKLETWINKLELITTLEINDIA:
             siggy = siggy[::-1]
+        return siggy
+
+    def siggy_slice(self):
+        """
+        Returns the slice of the signature in a full packet
+        """
         # grab the bounds of the siggy location, to chunk it into the packet
         startSiggy = param_ccsds.HEADER_P_KEYS.size +\
                                 param_ccsds.SIGNATURE.start//8
-        # return concatenated turd
-        return fcts.setstr(fullPacket,
-                           slice(startSiggy,
-                                 startSiggy + param_ccsds.SIGNATURE.len//8),
-                           siggy), siggy
+        return slice(startSiggy, startSiggy + param_ccsds.SIGNATURE.len//8)
+
+    def check_at(self, at):
+        """
+        Returns the "at" execution time of a telecommand as
+        ``PosixUTC``, or ``None`` if it is not given or in the past
+
+        Args:
+          * at (datetime or timetuple): the time at which the TC shall be
+            executed
+        """
+        if at is None:
+            return None
+        if isinstance(at, (tuple, list)):
+            at = fcts.PosixUTC(*at[:6])
+        elif isinstance(at, datetime.datetime):
+            at = fcts.PosixUTC.fromdatetime(at)
+        elif isinstance(at, fcts.PosixUTC):
+            pass
+        else:
+            raise exc.WrongAt(at)
+        # time in past: remove
+        if fcts.PosixUTC.now().totimestamp() > at.totimestamp():
+            return None
+        return at
+
+    def pack_timestamp(self, at):
+        """
+        Returns the timestamp prepended to the data of a telecommand
+        executed at ``at``
+
+        Args:
+          * at (PosixUTC): the time at which the TC shall be executed
+        """
+        msstamp, daystamp = core.time2stamps(at)
+        return param_ccsds.EXTRATS_TELECOMMAND.pack(
+                        {param_ccsds.MSECSINCEREF_TELEMETRY.name: msstamp,
+                         param_ccsds.DAYSINCEREF_TELEMETRY.name: daystamp})[0]
 
     def pack_primHeader(self, values, datalen=0, retvalues=False,
                         withPacketID=True, at=None):
@@ -287,16 +322,15 @@ class CCSDSPacker(object):
             be returned instead of the dictionary
         """
         lenkey = param_ccsds.DATALENGTH
-        # this will give hex if CCSDSKey.octets is True, else bits
-        ll = lenkey.pack(lenkey.unpack(primaryHDpacket) + datalen)
+        newlen = lenkey.unpack(primaryHDpacket) + datalen
         # if CCSDSKey packet length is not octets compatible
         if not lenkey.octets:
-            # grab a hex chunck to edit for length update
-            bits = bincore.hex2bin(primaryHDpacket[lenkey._hex_slice], pad=True)
-            # replace the corresponding bits
-            bits = fcts.setstr(bits, lenkey._bin_sub_slice, ll)
-            # get the hex chunk back to hex
-            ll = bincore.bin2hex(bits, pad=len(bits)//8)
+            # replace the field straight in the integer value of the
+            # hex chunk holding it
+            ll = lenkey._bitfield.pack(primaryHDpacket[lenkey._hex_slice],
+                                       newlen)
+        else:
+            ll = lenkey.pack(newlen)
         primaryHDpacket = fcts.setstr(primaryHDpacket, lenkey._hex_slice, ll)
         if primaryHDdict is not None:
             primaryHDdict[param_ccsds.DATALENGTH.name] += datalen
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import math
+import re
+from byt import Byt
+from nanoparam import param_apid
+from nanoparam.categories import param_category_common as pcc
+from nanoparam.categories import param_category
+from nanoparam import param_ccsds
+from nanoutils import bincore
+from nanoutils import BitField
+
+
+from .ccsdspacker import CCSDSPacker
+
+
+__all__ = ['CCSDSScanner', 'get_scanner', 'invalidate_scanners']
+
+
+# scanners shared by all blobs, indexed by mode
+_SCANNERS = {}
+
+
+def _mode_key(mode):
+    """
+    Normalizes the mode the same way ``CCSDSPacker`` does
+    """
+    return 'tm' if str(mode).lower()[1] == 'm' else 'tc'
+
+
+def get_scanner(mode='tm'):
+    """
+    Returns the scanner of the mode, built at first use and then
+    shared by all blobs of the process
+
+    Args:
+    * mode: 'tm' or 'tc'
+    """
+    key = _mode_key(mode)
+    scanner = _SCANNERS.get(key)
+    if scanner is None:
+        scanner = CCSDSScanner(mode=key)
+        _SCANNERS[key] = scanner
+    return scanner
+
+
+def invalidate_scanners():
+    """
+    Drops the shared scanners, so that their authorized-header table
+    gets rebuilt at next use. Call it whenever the APID registry
+    (``param_apid``) or the categories are reloaded
+    """
+    _SCANNERS.clear()
+
+
+class CCSDSScanner(object):
+    def __init__(self, mode='tm'):
+        """
+        Finds the valid packets in blobs of bytes, assuming the packet
+        parameters. Build it once and feed it all the blobs: neither
+        the blobs nor the candidate headers are copied while scanning
+
+        Args:
+        * mode: 'tm' or 'tc'
+        """
+        self.mode = mode
+        self.octcut = int(math.ceil(param_ccsds.AUTHPACKETLENGTH / 8.))
+        # the ccsds head is read one octet more for further checks
+        self._head = self.octcut + 1
+        # octets to read to get the data length
+        self._lensize = int(math.ceil(param_ccsds.DATALENGTH.end / 8.))
+        self._compile()
+
+    def _compile(self):
+        """
+        Builds the authorized headers of all registered PIDs and
+        compiles them into a single regular expression over octets,
+        that matches at every position of the blob where an authorized
+        header starts, so that all candidate starts are found in one
+        linear pass.
+        Each authorized header is turned into the list of octet
+        values allowed at each position of the candidate head
+        """
+        self._lit = bincore.TWINKLETWINKLELITTLEINDIA
+        pk = CCSDSPacker(mode=self.mode)
+        vals = {param_ccsds.PID.name: '',
+                param_ccsds.PACKETCATEGORY.name:\
+                    list(pcc.CATEGORIESCOMMON.keys())[0]}
+                    # just pick first common one cause it is not
+                    # taken into account in auth_start anyways
+        # building of possible packet start flags
+        self.auth_bits = []
+        for item in param_apid.PIDREGISTRATION.keys():
+            vals[param_ccsds.PID.name] = item
+            possible_head = bincore.hex2bin(
+                                pk.pack_primHeader(values=vals, datalen=0,
+                                        retvalues=False,
+                                        withPacketID=False)[:self.octcut])[\
+                                    :param_ccsds.AUTHPACKETLENGTH]
+            self.auth_bits.append(possible_head)
+        n = self._head
+        bitfield = BitField(start=0, l=param_ccsds.AUTHPACKETLENGTH, size=n)
+        fieldmask = bitfield.mask << bitfield.shift
+        patterns = []
+        for head in set(self.auth_bits):
+            value = int(bincore.reverse_if_little_endian(head), 2)\
+                        << bitfield.shift
+            pattern = []
+            for idx in range(n):
+                pos = 8*idx if self._lit else 8*(n - 1 - idx)
+                m = (fieldmask >> pos) & 0xff
+                v = (value >> pos) & 0xff
+                if m == 0:
+                    pattern.append(b'.')
+                elif m == 0xff:
+                    pattern.append(re.escape(bytes(bytearray([v]))))
+                else:
+                    pattern.append(b'[' + b''.join(
+                            re.escape(bytes(bytearray([o])))\
+                                for o in range(256) if o & m == v) + b']')
+            while pattern and pattern[-1] == b'.':
+                pattern.pop()
+            patterns.append(b''.join(pattern))
+        # lookahead so that overlapping candidates are all found
+        self._sync = re.compile(b'(?=' + b'|'.join(patterns) + b')',
+                                re.DOTALL)
+        # bits of the head checked beyond the authorized header, and
+        # cache of the checks indexed by the value of these bits
+        self._checkmask = 0
+        for key in [param_ccsds.SEQUENCEFLAG, param_ccsds.PAYLOADFLAG,
+                    param_ccsds.PACKETCATEGORY]:
+            bitfield = BitField(start=key.start, l=key.len, size=n)
+            self._checkmask |= bitfield.mask << bitfield.shift
+        self._checked = {}
+        lenkey = param_ccsds.DATALENGTH
+        self._lenfield = BitField(start=lenkey.start, l=lenkey.len,
+                                  size=self._lensize)
+
+    def _refresh(self):
+        """
+        Recompiles the scanner if the endianness changed since the
+        last compilation
+        """
+        if self._lit != bincore.TWINKLETWINKLELITTLEINDIA:
+            self._compile()
+
+    def _check_head(self, value):
+        """
+        Checks the sequence flag and the packet category of a candidate
+        head, given the integer value of its checked bits
+        """
+        if value not in self._checked:
+            headhex = bincore.int2hex(value, pad=self._head)
+            res = False
+            # check sequence flag
+            seq = param_ccsds.SEQUENCEFLAG.unpack(headhex)
+            if seq == param_ccsds.SEQUENCEFLAG.dic_force:
+                # check packet category
+                pld = int(param_ccsds.PAYLOADFLAG.unpack(headhex))
+                cat = int(param_ccsds.PACKETCATEGORY.unpack(headhex))
+                res = cat in param_category.CATEGORIES[pld].keys()
+            self._checked[value] = res
+        return self._checked[value]
+
+    def find(self, buffer, start=0):
+        """
+        Finds the possible start of a packet in the buffer.
+        Returns the index of the start in the buffer, or ``None`` if
+        not found
+
+        Args:
+        * buffer (bytes or memoryview): the blob
+        * start (int): from where the search should start
+        """
+        self._refresh()
+        if start >= len(buffer):
+            # empty blob
+            return start
+        stop = len(buffer) - self._head
+        # the sync pattern only stops where the first bits are in
+        # authorized header
+        for match in self._sync.finditer(buffer, start):
+            i = match.start()
+            if i >= stop:
+                break
+            value = bincore.buffer2int(buffer[i:i+self._head])
+            if self._check_head(value & self._checkmask):
+                return i
+        return None
+
+    def grab_data_length(self, buffer, start):
+        """
+        Returns the data-lengh as int, contained in the header of the
+        packet, or ``None`` if the header is truncated
+
+        Args:
+        * buffer (bytes or memoryview): the blob
+        * start (int): the first octet of the packet in the buffer
+        """
+        if start + self._lensize > len(buffer):
+            return None
+        lenkey = param_ccsds.DATALENGTH
+        chunk = buffer[start:start+self._lensize]
+        if lenkey._bitdec:
+            value = lenkey._bit_unpack(self._lenfield.extract(
+                                            bincore.buffer2int(chunk)))
+            if lenkey.fctfix is not None:
+                value = lenkey.fctfix(value)
+        else:
+            value = lenkey.unpack(Byt(chunk))
+        return value - param_ccsds.LENGTHMODIFIER
+
+    def find_packet(self, buffer, start=0):
+        """
+        Finds the first valid packet in the buffer.
+        Returns a slice, or ``None`` if no valid packet found
+
+        Args:
+        * buffer (bytes or memoryview): the blob
+        * start (int): from where the search should start
+        """
+        size = param_ccsds.HEADER_P_KEYS.size
+        while True:
+            idx = self.find(buffer, start=start)
+            if idx is None:
+                return None
+            length = self.grab_data_length(buffer, start=idx)
+            # issue, maybe the packet is cut before the data length bit
+            if length is None:
+                return None
+            end = idx + size + length
+            # bang on, found a new start where you expected it, or the
+            # end of the buffer
+            if length >= size and end <= len(buffer)\
+                    and self.find(buffer, start=end) == end:
+                return slice(idx, end)
+            # bullshit length or no new start, just restart search further
+            start = idx + 1
+
+    def iter_packets(self, buffer, start=0):
+        """
+        Generator over the valid packets of the buffer, yields the
+        offset of each packet in the buffer and the packet as a
+        ``memoryview`` on the buffer. The search resumes where the
+        previous packet ended
+
+        Args:
+        * buffer (bytes or memoryview): the blob
+        * start (int): from where the search should start
+        """
+        view = memoryview(buffer)
+        slc = self.find_packet(view, start=start)
+        while slc is not None:
+            yield slc.start, view[slc]
+            slc = self.find_packet(view, start=slc.stop)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import random
+from byt import Byt
+from nanoutils import bincore
+from nanoparam import param_apid
+from nanoparam.categories import param_category
+from nanoctrl.ccsds import TMPacker, CCSDSBlob
+
+
+def _packets():
+    res = []
+    for pid in sorted(param_apid.PIDREGISTRATION.keys()):
+        pld = param_apid.PLDREGISTRATION[pid]
+        for cat in sorted(param_category.CATEGORIES[pld].keys()):
+            if param_category.CATEGORIES[pld][cat].aux_size == 0:
+                res.append(TMPacker.pack(pid, pktCat=cat, retvalues=False))
+    return res
+
+
+def _noise(n, seed):
+    rand = random.Random(seed)
+    return Byt(bytes(bytearray(rand.randint(0, 255) for _ in range(n))))
+
+
+def _all_packets(blob):
+    res = []
+    slc = blob.find_first_packet()
+    while slc is not None:
+        res.append(slc)
+        slc = blob.find_first_packet(start=slc.stop)
+    return res
+
+
+def test_find_starts():
+    for lit in [False, True]:
+        bincore.TWINKLETWINKLELITTLEINDIA = lit
+        try:
+            pks = _packets()
+            blob = Byt()
+            offsets = []
+            for i, pk in enumerate(pks):
+                blob += _noise(50, i)
+                offsets.append(len(blob))
+                blob += pk
+            bl = CCSDSBlob(blob)
+            starts = []
+            start = 0
+            idx = bl.find(start=start)
+            while idx is not None:
+                starts.append(start + idx)
+                start += idx + 1
+                idx = bl.find(start=start)
+            assert set(offsets) <= set(starts)
+            # the offset is relative to start
+            assert bl.find(start=offsets[1]) == 0
+            assert bl.find(start=offsets[1] - 3) == 3
+        finally:
+            bincore.TWINKLETWINKLELITTLEINDIA = False
+
+
+def test_find_resync():
+    pks = _packets()
+    # noise, then a packet cut after its header, then packets
+    head = _noise(30, 1) + pks[0][:8]
+    bl = CCSDSBlob(head + pks[1] + pks[2] + pks[3])
+    assert bl.find_first_packet() == slice(len(head),
+                                           len(head) + len(pks[1]))
+    assert bl.grab_first_packet() == pks[1]
+    assert [bl.blob[slc] for slc in _all_packets(bl)] == pks[1:]
+
+
+def test_find_split_packet():
+    pks = _packets()
+    # the last packet is split, its end is in the next blob
+    half = len(pks[1]) // 2
+    bl = CCSDSBlob(pks[0] + pks[1][:half])
+    assert bl.find_first_packet() == slice(0, len(pks[0]))
+    assert bl.find_first_packet(start=len(pks[0])) is None
+    bl = CCSDSBlob(pks[1][half:] + pks[2])
+    assert bl.grab_first_packet() == pks[2]
+    # nothing to find
+    assert CCSDSBlob(Byt()).find_first_packet() is None
+    assert CCSDSBlob(pks[0][:2]).find_first_packet() is None
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+from nanoparam import param_apid
+from nanoparam.categories import param_category
+from nanoctrl.ccsds import TMPacker, CCSDSBlob
+from nanoctrl.ccsds import get_scanner, invalidate_scanners
+
+
+def _packets():
+    res = []
+    for pid in sorted(param_apid.PIDREGISTRATION.keys()):
+        pld = param_apid.PLDREGISTRATION[pid]
+        for cat in sorted(param_category.CATEGORIES[pld].keys()):
+            if param_category.CATEGORIES[pld][cat].aux_size == 0:
+                res.append(TMPacker.pack(pid, pktCat=cat, retvalues=False))
+    return res
+
+
+def test_iter_packets():
+    pks = _packets()
+    blob = Byt('\x00\xff')
+    offsets = []
+    for pk in pks:
+        offsets.append(len(blob))
+        blob += pk
+    res = list(get_scanner().iter_packets(blob))
+    assert [item[0] for item in res] == offsets
+    assert [Byt(item[1]) for item in res] == pks
+    assert isinstance(res[0][1], memoryview)
+    assert list(get_scanner().iter_packets(blob, start=offsets[-1]+1)) == []
+
+
+def test_shared_scanner():
+    sc = get_scanner('tm')
+    assert get_scanner('TM') is sc
+    assert get_scanner('tc') is not sc
+    assert CCSDSBlob(Byt())._scanner is sc
+    invalidate_scanners()
+    assert get_scanner('tm') is not sc
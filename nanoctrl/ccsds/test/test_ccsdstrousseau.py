@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+from nanoutils.ccsds import CCSDSTrousseau
+from nanoutils import bincore
+
+
+def unram(x, **kwargs):
+    """
+    verbose = 3*x/16.
+    """
+    return 3*x/16.
+
+
+KEYS = [dict(name='a', start=0, l=8, typ='uint'),
+        dict(name='b', start=8, l=16, typ='sint', fctunram=unram),
+        dict(name='c', start=24, l=24, typ='uint'),
+        dict(name='d', start=56, l=32, typ='float'),
+        dict(name='e', start=88, l=16, typ='hex'),
+        dict(name='f', start=104, l=40, typ='text'),
+        dict(name='g', start=144, l=8, dic={'x': Byt('\x01'),
+                                            'y': Byt('\x02')}),
+        dict(name='h', start=152, l=64, typ='sint')]
+
+DATA = Byt('\x01\xff\xfe\x00\x01\x02\xaa\x3f\x80\x00\x00\xde\xad'
+           'hello\x02\x80\x00\x00\x00\x00\x00\x00\x01')
+
+
+def _slow(tr, data):
+    compiled, tr._struct = tr._struct, None
+    try:
+        return tr.unpack(data)
+    finally:
+        tr._struct = compiled
+
+
+def test_compiled():
+    tr = CCSDSTrousseau(KEYS)
+    assert tr._struct is not None
+    assert tr._struct.format == '>Bh3s1x4s2s5s1sq'
+    tr = CCSDSTrousseau(KEYS[:1] + KEYS[2:3] + KEYS[1:2])
+    assert tr._struct is None
+
+
+def test_fast_unpack():
+    tr = CCSDSTrousseau(KEYS)
+    for lit in [True, False]:
+        bincore.TWINKLETWINKLELITTLEINDIA = lit
+        res = tr.unpack(DATA)
+        assert repr(res) == repr(_slow(tr, DATA))
+        assert res['g'] == 'y'
+        assert res['f'] == 'hello'
+    assert res['a'] == 1
+    assert res['b'] == -2
+    assert res['b_cv'] == -6/16.
+    assert res['h'] == -2**63 + 1
+
+
+def test_fast_unpack_listof():
+    tr = CCSDSTrousseau(KEYS, listof=True)
+    data = DATA*3 + Byt('\x00')
+    res = tr.unpack(data)
+    assert len(res) == 3
+    assert repr(res) == repr(_slow(tr, data))
+
+
+BITKEYS = [dict(name='a', start=0, l=3, typ='uint'),
+           dict(name='b', start=3, l=1, typ='bool'),
+           dict(name='c', start=4, l=11, typ='sint'),
+           dict(name='d', start=15, l=2, dic={'x': '01', 'y': '10'}),
+           dict(name='e', start=17, l=15, typ='uint')]
+
+BITVALUES = {'a': 5, 'b': True, 'c': -3, 'd': 'y', 'e': 12345}
+
+
+def test_bitfields():
+    tr = CCSDSTrousseau(BITKEYS)
+    assert tr._struct is None
+    assert len(tr._bitfields) == 5
+    bincore.TWINKLETWINKLELITTLEINDIA = False
+    data = tr.pack(BITVALUES)[0]
+    assert data == Byt('\xbf\xfb\x30\x39')
+    for lit in [True, False]:
+        bincore.TWINKLETWINKLELITTLEINDIA = lit
+        data = tr.pack(BITVALUES)[0]
+        res = tr.unpack(data)
+        assert res == BITVALUES
+        bitfields, tr._bitfields = tr._bitfields, None
+        assert repr(tr.unpack(data)) == repr(res)
+        tr._bitfields = bitfields
+
+
+def test_unpack_columns():
+    tr = CCSDSTrousseau(KEYS, listof=True)
+    data = DATA*3 + Byt('\x00')
+    for lit in [True, False]:
+        bincore.TWINKLETWINKLELITTLEINDIA = lit
+        rows = tr.unpack(data)
+        cols = tr.unpack_columns(data)
+        assert sorted(cols.keys()) == sorted(rows[0].keys())
+        for name, col in cols.items():
+            assert len(col) == 3
+            assert list(col) == [row[name] if not isinstance(row[name], tuple)
+                                 else row[name][0] for row in rows]
+    assert cols['b'].dtype.kind == 'i'
+    assert cols['b_cv'].dtype.kind == 'f'
+    assert list(cols['g']) == ['y', 'y', 'y']
+    tr = CCSDSTrousseau(BITKEYS, listof=True)
+    data = tr.pack(BITVALUES)[0]*2
+    cols = tr.unpack_columns(data)
+    assert list(cols['c']) == [-3, -3]
+    assert list(cols['d']) == ['y', 'y']
@@ -73,14 +73,7 @@ class genericCrcPatch(CommandPatch):
         kwargs[self._crcParamName] = 0
         return super(genericCrcPatch, self).generate_data(*args, **kwargs)
 
-    def _generate_packet(self, *args, **kwargs):
-        # record  whether to sign or not if given as input
-        signit = kwargs.get('signit')
-        # force no signature as first step
-        kwargs['signit'] = False
-        # call mother's method
-        packet, hd, hdx, inputs = super(genericCrcPatch, self)\
-                                  ._generate_packet(*args, **kwargs)
+    def _seal_packet(self, packet, inputs):
         # calculation of CRC on sec header and data
         # 4 is the length of CRC
         bytesForCrc = packet[param_ccsds.HEADER_P_KEYS.size:-4]
@@ -88,14 +81,9 @@ class genericCrcPatch(CommandPatch):
         # replacement of CRC in inputs
         inputs[self._crcParamName] = crc
         # force CRC at the end of packet
-        packet[-4:] = crc
-        if signit is None:  # signit not given, follow default
-            kwargs.pop('signit', None)
-            packet, sig = self._add_siggy(packet, **kwargs)
-        elif signit is True:  # signit was passed and True
-            kwargs['signit'] = True
-            packet, sig = self._add_siggy(packet, **kwargs)
-        return packet, hd, hdx, inputs
+        param = [item for item in self._params\
+                    if item.name == self._crcParamName][0]
+        return packet[:-4] + param.tohex(crc)
 
 
 # real time clock at bootloader level, just bind auto-CRC and simple-datetime
@@ -122,3 +122,21 @@ class WrongCommandLength(CMDException):
         self._init(cmd, l, ll, *args, **kwargs)
         self.message = "Total length '{}' of the input is not valid "\
                        "for command '{}', should be '{}'".format(l, cmd, ll)
+
+class PatchedTemplate(CMDException):
+    """
+    If a command generating its own packet is compiled into a template
+    """
+    def __init__(self, cmd, *args, **kwargs):
+        self._init(cmd, *args, **kwargs)
+        self.message = "Command '{}' generates its own packet and cannot "\
+                       "be compiled into a template".format(cmd)
+
+class FixedTemplateInput(CMDException):
+    """
+    If a header input is given at the call of a template
+    """
+    def __init__(self, cmd, inp, *args, **kwargs):
+        self._init(cmd, inp, *args, **kwargs)
+        self.message = "Input '{}' is fixed at the compilation of the "\
+                       "template of command '{}'".format(inp, cmd)
@@ -67,11 +67,21 @@ class Command(Cm):
         input parameters used to generate the data (dict).
         """
         data, inputs = self.generate_data(**kwargs)
+        signit = kwargs.pop('signit', param_all.USESIGGY)
         packet, hd, hdx, dat = TCPacker.pack(pid=self._pidstr, TCdata=data,
                                              TCid=self.number, retvalues=True,
-                                             **kwargs)
+                                             signit=False, **kwargs)
+        packet = self._seal_packet(packet, inputs)
+        packet, sig = self._add_siggy(packet, signit=signit)
         return packet, hd, hdx, inputs
-    
+
+    def _seal_packet(self, packet, inputs):
+        """
+        Last changes of the full packet with null signature before it
+        gets signed, returns the packet
+        """
+        return packet
+
     def _add_siggy(self, fullPacket, **kwargs):
         """
         Just a shortcut for adding signature to a packet
@@ -101,6 +111,13 @@ class Command(Cm):
         """
         # generates the packet
         packet, hd, hdx, inputs = self._generate_packet(**kwargs)
+        return self._send_packet(packet, hd, hdx, inputs, **kwargs)
+
+    def _send_packet(self, packet, hd, hdx, inputs, **kwargs):
+        """
+        Stores the generated packet in the database and returns the
+        ``Telecommand`` sending it
+        """
         hd['raw_file'] = param_all.RAWPACKETFOLDER
         hd['time_given'] = fcts.now()
         # left None until confirmation sent by antenna
@@ -121,6 +138,21 @@ class Command(Cm):
         """
         return self._generate_packet(withPacketID=False, **kwargs)
 
+    def template(self, **kwargs):
+        """
+        Returns the ``TCTemplate`` of the command, for sending it
+        repeatedly with the same header values
+
+        Kwargs:
+          * rack (bool): ``True`` to get the acknowledgement of reception
+          * fack (bool): ``True`` to get the acknowledgement of format
+          * eack (bool): ``True`` to get the acknowledgement of execution
+          * emitter (int): the id of the emitter
+          * signit (bool): ``True`` to sign the telecommands
+        """
+        from .tctemplate import TCTemplate
+        return TCTemplate(self, **kwargs)
+
     @classmethod
     def _initfromCm(cls, cmd):
         return cls(**cmd.to_dict())
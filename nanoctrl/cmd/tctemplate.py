@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+from nanoparam import param_all
+from nanoparam import param_ccsds
+from nanoutils import bincore
+from nanoutils import core
+from nanoutils import fcts
+from nanoutils.bitfield import BitField
+
+
+from . import cmdexception
+from .command import Command
+from ..ccsds import TCPacker
+
+
+__all__ = ['TCTemplate']
+
+
+# the inputs of the header, fixed at the compilation of a template
+HEADERINPUTS = ('rack', 'fack', 'eack', 'emitter', 'signit')
+
+
+def _generate_packet_of(klass):
+    fct = klass._generate_packet
+    return getattr(fct, '__func__', fct)
+
+
+class TCTemplate(object):
+    def __init__(self, command, **kwargs):
+        """
+        A telecommand compiled once from a command, with all the
+        constant header octets pre-packed. Generating a packet only
+        patches the packet id, the data length, the packet category,
+        the timestamp and the data into a preallocated buffer, then
+        seals and signs it, instead of packing all headers from scratch
+
+        Args:
+          * command (Command): the command to compile
+
+        Kwargs:
+          * rack (bool) [default: REQACKRECEPTION]: ``True`` to recieve the
+            acknowledgement of reception
+          * fack (bool) [default: REQACKFORMAT]: ``True`` to recieve the
+            acknowledgement of format
+          * eack (bool) [default: REQACKEXECUTION]: ``True`` to recieve the
+            acknowledgement of execution
+          * emitter (int) [default: EMITTERID]: the id of the emitter
+          * signit (bool) [default: USESIGGY]: sign the packets or not
+        """
+        if _generate_packet_of(type(command))\
+                is not _generate_packet_of(Command):
+            raise cmdexception.PatchedTemplate(command.name)
+        self.command = command
+        self.signit = bool(kwargs.pop('signit', param_all.USESIGGY))
+        # headers of an immediate TC without data nor packet id
+        packet, hd, hdx, dat = TCPacker.pack(pid=command._pidstr,
+                                             TCid=command.number,
+                                             retvalues=True,
+                                             withPacketID=False,
+                                             signit=False, **kwargs)
+        self._hd = hd
+        self._hdx = hdx
+        self._size = len(packet)
+        self._psize = param_ccsds.HEADER_P_KEYS.size
+        self._baselength = int(hd[param_ccsds.DATALENGTH.name])
+        # primary headers of immediate and timed TCs, as integers
+        timed = TCPacker.pack_primHeader(
+                            values={param_ccsds.PID.name: command._pidstr},
+                            withPacketID=False, at=True)
+        self._words = {False: bincore.hex2int(packet[:self._psize]),
+                       True: bincore.hex2int(timed)}
+        self._categories = {False: '0', True: '1'}
+        self._idfield = BitField(start=param_ccsds.PACKETID.start,
+                                 l=param_ccsds.PACKETID.len,
+                                 size=self._psize)
+        self._lenfield = BitField(start=param_ccsds.DATALENGTH.start,
+                                  l=param_ccsds.DATALENGTH.len,
+                                  size=self._psize)
+        self._sigslice = TCPacker.siggy_slice()
+        self._buffer = bytearray(packet)
+
+    def __repr__(self):
+        return "<TCTemplate of {}>".format(self.command.name)
+
+    __str__ = __repr__
+
+    def __call__(self, *args, **kwargs):
+        return self.send(**kwargs)
+
+    def _check_inputs(self, kwargs):
+        for key in HEADERINPUTS:
+            if key in kwargs:
+                raise cmdexception.FixedTemplateInput(self.command.name, key)
+
+    def generate(self, **kwargs):
+        """
+        Generates the full packet and returns the packet (Byt),
+        the values used to generate the prim/sec headers (dict) and the
+        input parameters used to generate the data (dict), the same way
+        ``Command._generate_packet`` does
+
+        Kwargs:
+          * the input parameters of the command
+          * at (datetime, timetuple): the time at which the TC shall be
+            executed. Leave empty for immediate execution.
+        """
+        self._check_inputs(kwargs)
+        at = TCPacker.check_at(kwargs.pop('at', None))
+        data, inputs = self.command.generate_data(**kwargs)
+        packetid = core.get_set_next_tc_packet_id()
+        return self._fill(packetid, at, data, inputs)
+
+    def generate_all(self, allinputs, **kwargs):
+        """
+        Generates the packets for all the input parameters, reserving
+        their packet ids at once. Returns a list of the tuples returned
+        by ``generate``
+
+        Args:
+          * allinputs (iterable of dict): the input parameters of the
+            command, for each packet
+
+        Kwargs:
+          * at (datetime, timetuple): the time at which the TCs shall be
+            executed. Leave empty for immediate execution.
+        """
+        allinputs = list(allinputs)
+        core.reserve_tc_packet_ids(len(allinputs))
+        res = []
+        for inputs in allinputs:
+            inputs = dict(inputs)
+            inputs.update(kwargs)
+            res.append(self.generate(**inputs))
+        return res
+
+    def _fill(self, packetid, at, data, inputs):
+        """
+        Patches the packet id, length, category, timestamp, data and
+        signature into the buffer, returns the same as ``generate``
+        """
+        timed = at is not None
+        buf = self._buffer
+        del buf[self._size:]
+        if timed:
+            buf.extend(TCPacker.pack_timestamp(at))
+        buf.extend(data)
+        length = self._baselength + len(buf) - self._size
+        if length > self._lenfield.mask:
+            raise cmdexception.WrongCommandLength(self.command.name,
+                        len(data), self._lenfield.mask - self._baselength)
+        word = self._idfield.insert(self._words[timed], packetid)
+        word = self._lenfield.insert(word, length)
+        buf[:self._psize] = bincore.int2hex(word, pad=self._psize)
+        packet = self.command._seal_packet(Byt(buf), inputs)
+        if self.signit:
+            packet = fcts.setstr(packet, self._sigslice,
+                                 TCPacker.make_siggy(packet))
+        hd = dict(self._hd)
+        hd['time_delay'] = at
+        hd[param_ccsds.PACKETCATEGORY.name] = self._categories[timed]
+        hd[param_ccsds.PACKETID.name] = packetid
+        hd[param_ccsds.DATALENGTH.name] = length
+        return packet, hd, dict(self._hdx), inputs
+
+    def send(self, *args, **kwargs):
+        """
+        Sends the command from the template and stores it in the
+        database
+
+        Args ar ignored
+
+        Kwargs:
+          * the input parameters of the command
+          * wait (bool): ``True`` to make a blocking telecommand, until
+            the acknowledgement is received, or ``timetout`` is elapsed
+          * timeout (int): the time in second to wait for acknowledgements
+          * at (datetime, timetuple): the time at which the TC shall be
+            executed. Leave empty for immediate execution.
+        """
+        packet, hd, hdx, inputs = self.generate(**kwargs)
+        return self.command._send_packet(packet, hd, hdx, inputs, **kwargs)
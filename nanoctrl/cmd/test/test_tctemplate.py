@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import hashlib
+import datetime
+from byt import Byt
+from nanoparam import param_all
+from nanoparam.commands.param_commands import RANGESEPARATOR
+from nanoutils import core
+from nanoctrl.ccsds import ccsdspacker
+from nanoctrl.ccsds import TCPacker
+from nanoctrl.cmd.command import Command
+from nanoctrl.cmd.cmd_patch import genericCrcPatch
+from nanoctrl.cmd.tctemplate import TCTemplate
+from nanoctrl.cmd import cmdexception
+
+
+def ftup(x, y):
+    return "{}{}{}".format(x, RANGESEPARATOR, y)
+
+
+flash = {'number': 12,
+         'name': 'flash_write',
+         'subsystem': 'obc',
+         'pid': 'payload',
+         'desc': "blah",
+         'lparam': '*',
+         'param': (('addr', 'blah', ftup(0, 4294967295), 'uint32', 1),
+                   ('chunk', 'blah', ftup(0, 255), 'str', ftup(1, 200)))}
+
+flashcrc = dict(flash, number=13,
+                param=flash['param'] +\
+                    (('crc', 'blah', ftup(0, 4294967295), 'uint32', 1),))
+
+AT = datetime.datetime(2031, 5, 6, 7, 8, 9)
+
+SAVED = {}
+
+
+def setup_module():
+    SAVED['hmac'] = getattr(ccsdspacker, 'hmac', None)
+    SAVED['KEYMASK'] = param_all.KEYMASK
+    SAVED['get_set_next_tc_packet_id'] = core.get_set_next_tc_packet_id
+    # a stand-in signature, masked to the length of the signature field
+    ccsdspacker.hmac = lambda p: Byt(hashlib.sha256(bytes(p)).digest())
+    sl = TCPacker.siggy_slice()
+    param_all.KEYMASK = '1' * (sl.stop - sl.start) + '0' * 32
+    # same packet id for the template and the command
+    core.get_set_next_tc_packet_id = lambda: 77
+
+
+def teardown_module():
+    ccsdspacker.hmac = SAVED.pop('hmac')
+    param_all.KEYMASK = SAVED.pop('KEYMASK')
+    core.get_set_next_tc_packet_id = SAVED.pop('get_set_next_tc_packet_id')
+
+
+def _compare(command, signit, **kwargs):
+    tpl = TCTemplate(command, signit=signit)
+    res = tpl.generate(**kwargs)
+    ref = command._generate_packet(signit=signit, **kwargs)
+    assert bytes(res[0]) == bytes(ref[0])
+    assert res[1] == ref[1]
+    assert res[2] == ref[2]
+    assert res[3] == ref[3]
+    # the buffer is reused
+    res2 = tpl.generate(**kwargs)
+    assert bytes(res2[0]) == bytes(ref[0])
+    return res
+
+
+def test_template_immediate():
+    c = Command(**flash)
+    for signit in [False, True]:
+        for size in [1, 7, 200]:
+            packet, hd, hdx, inputs = _compare(c, signit, addr=size,
+                                               chunk='x' * size)
+            assert hd['time_delay'] is None
+            assert hd['packet_id'] == 77
+
+
+def test_template_at():
+    c = Command(**flash)
+    for signit in [False, True]:
+        for at in [AT, (2031, 1, 2, 3, 4, 5)]:
+            packet, hd, hdx, inputs = _compare(c, signit, addr=3,
+                                               chunk='abc', at=at)
+            assert hd['time_delay'] is not None
+
+
+def test_template_signed():
+    c = Command(**flash)
+    unsigned = _compare(c, False, addr=3, chunk='abc')[0]
+    signed = _compare(c, True, addr=3, chunk='abc')[0]
+    sl = TCPacker.siggy_slice()
+    assert bytes(signed) != bytes(unsigned)
+    assert bytes(signed[:sl.start]) == bytes(unsigned[:sl.start])
+
+
+def test_template_crc():
+    c = genericCrcPatch(**flashcrc)
+    for signit in [False, True]:
+        for at in [None, AT]:
+            kwargs = {} if at is None else {'at': at}
+            packet, hd, hdx, inputs = _compare(c, signit, addr=1,
+                                               chunk='hello', **kwargs)
+            assert inputs['crc'] != 0
+
+
+def test_template_fixed_inputs():
+    tpl = TCTemplate(Command(**flash))
+    try:
+        tpl.generate(addr=1, chunk='a', rack=1)
+    except cmdexception.FixedTemplateInput:
+        pass
+    else:
+        assert False
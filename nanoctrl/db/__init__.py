@@ -26,3 +26,6 @@
 
 
 from .orm import *
+from .query import *
+from .values import *
+from .migration import *
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from sqlalchemy import select
+from sqlalchemy import bindparam
+from nanoparam.categories import param_category
+from nanoutils import param_sys
+from nanoutils import ctrlexception
+
+
+from . import orm
+from .values import encode_value, parse_legacy_value, is_legacy_value
+
+
+__all__ = ['migrate_values']
+
+
+def migrate_values(tables=None, chunksize=None, dryrun=False):
+    """
+    Rewrites the legacy ``repr`` values of the key-value tables with
+    ``encode_value``, table after table, in one transaction per chunk.
+    Returns a dictionary of the number of rows rewritten per table.
+    Safe to run on a live database and to run again
+
+    Args:
+      * tables (list of str): [optional] the tables to migrate, default
+        ``telecommand_data`` and the data tables of the TC answers
+      * chunksize (int): [optional] the number of rows per transaction,
+        default ``param_sys.DBINSERTCHUNK``
+      * dryrun (bool): only count the rows to rewrite
+    """
+    if not orm.running:
+        raise ctrlexception.NoDBConnection()
+    if tables is None:
+        tables = get_value_tables()
+    chunksize = int(param_sys.DBINSERTCHUNK if chunksize is None
+                    else chunksize)
+    res = {}
+    for tblnm in tables:
+        tbl = orm.METADATA.tables[tblnm]
+        update = tbl.update().where(tbl.c.id == bindparam('rowid'))\
+                    .values(value=bindparam('newvalue'))
+        res[tblnm] = 0
+        lastid = -1
+        while True:
+            with orm.ENGINE.begin() as conn:
+                rows = conn.execute(select(tbl.c.id, tbl.c.value)\
+                                        .where(tbl.c.id > lastid)\
+                                        .order_by(tbl.c.id)\
+                                        .limit(chunksize)).fetchall()
+                if len(rows) == 0:
+                    break
+                lastid = rows[-1][0]
+                todo = [{'rowid': rowid,
+                         'newvalue': encode_value(parse_legacy_value(value))}
+                        for rowid, value in rows
+                        if value is not None and is_legacy_value(value)]
+                res[tblnm] += len(todo)
+                if len(todo) > 0 and not dryrun:
+                    conn.execute(update, todo)
+    return res
+
+
+def get_value_tables():
+    """
+    Returns the names of the existing tables holding key-values
+    """
+    tables = []
+    if 'telecommand_data' in orm.METADATA.tables.keys():
+        tables.append('telecommand_data')
+    for (pldflag, catnum), desc in orm.DESCRIPTORS.items():
+        if catnum != param_category.TELECOMMANDANSWERCAT:
+            continue
+        datadesc = desc['data'].get(None)
+        if datadesc is not None and datadesc['name'] not in tables:
+            tables.append(datadesc['name'])
+    return tables
@@ -27,11 +27,25 @@
 
 from byt import Byt, DByt
 import time
+import os
+from contextlib import contextmanager
+import hashlib
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+import sqlalchemy
 from sqlalchemy.ext.automap import automap_base
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session
 from sqlalchemy import create_engine
 from sqlalchemy import update
 from sqlalchemy import and_
+from sqlalchemy import text
+from sqlalchemy import literal
+from sqlalchemy import union_all
+from sqlalchemy import select
+from sqlalchemy import MetaData
 #from sqlalchemy import or_
 from nanoparam.categories import param_category
 from nanoparam.categories import param_category_common as pcc
@@ -47,16 +61,118 @@ from nanoutils import ctrlexception
 from nanoparam import param_ccsds
 
 
-__all__ = ['init_DB', 'get_column_keys', 'save_TC_to_DB', 'close_DB',
-            'save_TM_to_DB', 'update_sent_TC_time', 'get_TC_dbid_from_pkid',
+from .values import encode_value, decode_value
+
+
+__all__ = ['init_DB', 'session_scope', 'get_column_keys', 'save_TC_to_DB', 'close_DB',
+            'save_TM_to_DB', 'save_TMs_to_DB', 'update_sent_TC_time', 'get_TC_dbid_from_pkid',
             'get_TM_dbid_from_pkid_and_pid', 'get_TC', 'get_RACK_TCid',
-            'get_TM', 'get_ACK_TCid', 'get_TMid_answer_from_TC',
-            'get_tcanswer_TCid']
+            'get_TM', 'get_TM_values', 'get_ACK_TCid',
+            'get_TMid_answer_from_TC', 'get_tcanswer_TCid']
 
 
 running = False
+# thread-local ORM session, for interactive use
 DB = None
+ENGINE = None
+SESSIONMAKER = None
 TABLES = {}
+# sqlalchemy MetaData of the DB tables
+METADATA = None
+# aux tables of the categories that can answer a TC
+ANSWERTABLES = []
+# column names of the tables, indexed by table name
+COLUMNS = {}
+# descriptors of the categories tables, indexed by (pldflag, catnum)
+DESCRIPTORS = {}
+
+
+# what the schema cache is checked against
+QUERYSCHEMACOLUMNS = """
+SELECT table_name, column_name, ordinal_position, data_type,
+    character_maximum_length, is_nullable, column_default
+FROM information_schema.columns
+WHERE table_schema = current_schema()
+ORDER BY table_name, ordinal_position
+"""
+
+QUERYSCHEMACONSTRAINTS = """
+SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE connamespace = current_schema()::regnamespace
+ORDER BY 1, 2
+"""
+
+
+class _LazyTables(dict):
+    """
+    The automap classes of the DB tables, indexed by table name. Each
+    table is only mapped when first accessed, together with the tables
+    referencing it, for its relationship collections, and the tables
+    these reference
+    """
+    def __init__(self, metadata):
+        super(_LazyTables, self).__init__()
+        self.metadata = metadata
+
+    def _names(self):
+        return [k for k, tbl in self.metadata.tables.items()
+                if len(tbl.primary_key) > 0]
+
+    def _related(self, table):
+        """
+        Returns the tables to map with ``table``
+        """
+        res = [table] + [tbl for tbl in self.metadata.tables.values()
+                         if tbl is not table
+                         and any(fk.column.table is table
+                                 for fk in tbl.foreign_keys)]
+        idx = 0
+        while idx < len(res):
+            for fk in res[idx].foreign_keys:
+                if fk.column.table not in res:
+                    res.append(fk.column.table)
+            idx += 1
+        return res
+
+    def _map(self, key):
+        if dict.__contains__(self, key):
+            return
+        if key not in self._names():
+            raise KeyError(key)
+        metadata = MetaData()
+        for tbl in self._related(self.metadata.tables[key]):
+            tbl.to_metadata(metadata)
+        Base = automap_base(metadata=metadata)
+        Base.prepare()
+        dict.__setitem__(self, key, Base.classes[key])
+
+    def __getitem__(self, key):
+        self._map(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return key in self._names()
+
+    def __iter__(self):
+        return iter(self._names())
+
+    def __len__(self):
+        return len(self._names())
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self[key]
+
+    def keys(self):
+        return self._names()
+
+    def values(self):
+        return [self[k] for k in self._names()]
+
+    def items(self):
+        return [(k, self[k]) for k in self._names()]
 
 
 def init_DB():
@@ -65,16 +181,32 @@ def init_DB():
     """
     global running
     global DB
+    global ENGINE
+    global SESSIONMAKER
     global TABLES
+    global METADATA
+    global ANSWERTABLES
+    global COLUMNS
+    global DESCRIPTORS
     if running:
         return
-    Base = automap_base()
-    engine = create_engine(param_all.DBENGINE)
-    Base.prepare(engine, reflect=True)
-    TABLES = {}
-    for k in Base.classes.keys():
-        TABLES[k] = Base.classes[k]
-    DB = Session(engine)
+    ENGINE = create_engine(param_all.DBENGINE,
+                           pool_size=param_sys.DBPOOLSIZE,
+                           max_overflow=param_sys.DBPOOLOVERFLOW,
+                           pool_pre_ping=True)
+    METADATA = load_schema(ENGINE)
+    # the ORM classes are only built if needed
+    TABLES = _LazyTables(METADATA)
+    COLUMNS = {}
+    for k, tbl in METADATA.tables.items():
+        COLUMNS[k] = tuple(tbl.columns.keys())
+    DESCRIPTORS = {}
+    for pldflag in [0, 1]:
+        for catnum, cat in param_category.CATEGORIES[pldflag].items():
+            DESCRIPTORS[(pldflag, catnum)] = get_category_descriptor(cat)
+    ANSWERTABLES = get_answer_tables()
+    SESSIONMAKER = sessionmaker(bind=ENGINE)
+    DB = scoped_session(SESSIONMAKER)
     running = True
 
 
@@ -83,15 +215,152 @@ def close_DB():
     Opens the database connection
     """
     global running
-    DB.close()
+    DB.remove()
+    ENGINE.dispose()
     running = False
 
 
+@contextmanager
+def session_scope(readonly=False):
+    """
+    Provides a new ORM session for a unit of work: it is committed
+    at the end, rolled back if an error occurs, and closed
+
+    Args:
+      * readonly (bool): if ``True``, the session is never committed,
+        its transaction is rolled back at closing. The loaded objects
+        stay readable once the session is closed
+    """
+    session = SESSIONMAKER()
+    try:
+        yield session
+        if not readonly:
+            session.commit()
+    except:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def get_schema_key(engine):
+    """
+    Returns a hash of the current schema of the DB: tables, columns
+    and constraints, with the sqlalchemy version and the DB url
+    """
+    with engine.connect() as conn:
+        cols = conn.execute(text(QUERYSCHEMACOLUMNS)).fetchall()
+        cons = conn.execute(text(QUERYSCHEMACONSTRAINTS)).fetchall()
+    key = repr((sqlalchemy.__version__, str(engine.url),
+                [tuple(item) for item in cols],
+                [tuple(item) for item in cons]))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def load_schema(engine):
+    """
+    Returns the MetaData of the DB tables. It is read from the
+    ``param_sys.DBSCHEMACACHE`` file if that matches the current
+    schema of the DB, otherwise the DB is reflected and the cache
+    file is updated
+    """
+    key = get_schema_key(engine)
+    path = param_sys.DBSCHEMACACHE
+    try:
+        with open(path, 'rb') as f:
+            cache = pickle.load(f)
+        if cache['key'] == key:
+            return cache['metadata']
+    except Exception:
+        # no cache, or not readable, reflect
+        pass
+    metadata = MetaData()
+    metadata.reflect(engine)
+    try:
+        tmppath = "{}.{}".format(path, os.getpid())
+        with open(tmppath, 'wb') as f:
+            pickle.dump({'key': key, 'metadata': metadata}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(tmppath, path)
+    except (IOError, OSError):
+        # can't write the cache, will reflect next time
+        pass
+    return metadata
+
+
 def get_column_keys(tbl):
     """
-    Returns the column names of the table ``tbl``
+    Returns the column names of the table ``tbl``, mapped class or
+    sqlalchemy Table
     """
-    return tbl.__table__.columns.keys()
+    tbl = getattr(tbl, '__table__', tbl)
+    if tbl.name not in COLUMNS:
+        COLUMNS[tbl.name] = tuple(tbl.columns.keys())
+    return COLUMNS[tbl.name]
+
+
+def get_table_descriptor(tblnm):
+    """
+    Returns a dictionary describing the table ``tblnm``: its ``name``,
+    core ``table``, ``columns`` names and the ``collection`` attribute
+    name of the relationship from its parent, or None if the table does
+    not exist
+    """
+    if tblnm is None or tblnm not in METADATA.tables.keys():
+        return None
+    return {'name': tblnm,
+            'table': METADATA.tables[tblnm],
+            'columns': get_column_keys(METADATA.tables[tblnm]),
+            'collection': tblnm + '_collection'}
+
+
+def get_category_descriptor(cat):
+    """
+    Returns a dictionary describing the tables of the category ``cat``:
+    the ``cat`` itself, the descriptor of the ``aux`` table, and the
+    descriptors of the ``data`` and ``conv`` tables indexed by the
+    meta-trousseau key value (None if not a meta-trousseau)
+    """
+    desc = {'cat': cat,
+            'aux': get_table_descriptor(cat.table_aux_name),
+            'data': {},
+            'conv': {}}
+    if cat.data_trousseau is None:
+        return desc
+    if cat.is_data_metatr and not cat._thatsTCANS:
+        metakey = cat.data_trousseau.key
+        trkeys = list(cat.data_trousseau.TROUSSEAUDIC.keys())
+    else:
+        metakey = None
+        trkeys = [None]
+    for trkey in trkeys:
+        hdx = {} if metakey is None else {metakey: trkey}
+        desc['data'][trkey] = get_table_descriptor(
+                                    cat.get_table_data_name(hdx=hdx))
+        desc['conv'][trkey] = get_table_descriptor(
+                                    cat.get_table_data_conv_name(hdx=hdx))
+    return desc
+
+
+def get_data_descriptor(desc, hdx):
+    """
+    Returns the descriptor of the data table of the category descriptor
+    ``desc``, given the aux header ``hdx`` of the packet
+
+    Args:
+      * desc (dict): the category descriptor
+      * hdx (dict): the aux header of the packet
+    """
+    cat = desc['cat']
+    if cat.data_trousseau is None:
+        return None
+    if cat.is_data_metatr and not cat._thatsTCANS:
+        trkey = hdx.get(cat.data_trousseau.key)
+        if trkey not in desc['data'].keys():
+            # raises the usual error
+            cat.get_table_data_name(hdx=hdx)
+        return desc['data'][trkey]
+    return desc['data'][None]
 
 
 def save_TC_to_DB(hd, hdx, inputs):
@@ -107,15 +376,16 @@ def save_TC_to_DB(hd, hdx, inputs):
     if not running:
         raise ctrlexception.NoDBConnection()
     hd.pop('signature', '')
-    TC = TABLES['telecommands'](**hd)
-    DB.add(TC)
-    DB.flush()
-    for k, v in inputs.items():
-        DB.add(TABLES['telecommand_data'](telecommand_id=TC.id,
-                                          param_key=k, 
-                                          value=repr(v)))
-    DB.commit()
-    return TC.id
+    with session_scope() as session:
+        TC = TABLES['telecommands'](**hd)
+        session.add(TC)
+        session.flush()
+        tcid = TC.id
+        for k, v in inputs.items():
+            session.add(TABLES['telecommand_data'](telecommand_id=tcid,
+                                                   param_key=k,
+                                                   value=encode_value(v)))
+    return tcid
 
 
 def update_sent_TC_time(pkid, t):
@@ -131,14 +401,15 @@ def update_sent_TC_time(pkid, t):
     if not running:
         raise ctrlexception.NoDBConnection()
     t = str(t)
-    TC = TABLES['telecommands']
-    idx = DB.query(TC.id)\
-            .filter(getattr(TC, param_ccsds.PACKETID.name) == int(pkid))\
-            .order_by(TC.time_sent.desc()).limit(1).first()
-    if idx is None:
-        return
-    q = DB.query(TC).filter(TC.id == idx[0]).update({'time_sent': t})
-    DB.commit()
+    TC = METADATA.tables['telecommands']
+    with ENGINE.begin() as conn:
+        idx = conn.execute(select(TC.c.id)\
+                    .where(TC.c[param_ccsds.PACKETID.name] == int(pkid))\
+                    .order_by(TC.c.time_sent.desc()).limit(1)).first()
+        if idx is None:
+            return
+        conn.execute(TC.update().where(TC.c.id == idx[0])\
+                        .values(time_sent=t))
     return idx[0]
 
 
@@ -152,11 +423,12 @@ def get_TC_dbid_from_pkid(pkid):
     """
     if not running:
         raise ctrlexception.NoDBConnection()
-    TC = TABLES['telecommands']
-    res = DB.query(TC)\
-            .filter(getattr(TC, param_ccsds.PACKETID.name) == int(pkid))\
-            .order_by(TC.time_sent.desc())
-    return [(item.id, item.time_sent) for item in res]
+    TC = METADATA.tables['telecommands']
+    with ENGINE.connect() as conn:
+        res = conn.execute(select(TC.c.id, TC.c.time_sent)\
+                    .where(TC.c[param_ccsds.PACKETID.name] == int(pkid))\
+                    .order_by(TC.c.time_sent.desc()))
+        return [(item[0], item[1]) for item in res]
 
 
 def get_TM_dbid_from_pkid_and_pid(pkid, pid):
@@ -170,11 +442,12 @@ def get_TM_dbid_from_pkid_and_pid(pkid, pid):
     """
     if not running:
         raise ctrlexception.NoDBConnection()
-    TM = TABLES['telemetries']
-    res = DB.query(TM)\
-            .filter(getattr(TM, param_ccsds.PACKETID.name) == int(pkid))\
-            .order_by(TM.time_sent.desc())
-    return [(item.id, item.time_sent) for item in res]
+    TM = METADATA.tables['telemetries']
+    with ENGINE.connect() as conn:
+        res = conn.execute(select(TM.c.id, TM.c.time_sent)\
+                    .where(TM.c[param_ccsds.PACKETID.name] == int(pkid))\
+                    .order_by(TM.c.time_sent.desc()))
+        return [(item[0], item[1]) for item in res]
 
 
 def get_TC(pkid=None, dbid=None):
@@ -197,51 +470,55 @@ def get_TC(pkid=None, dbid=None):
     if not running:
         raise ctrlexception.NoDBConnection()
     TC = TABLES['telecommands']
-    thetc = DB.query(TC)
-    if dbid is None:
-        thetc = thetc.filter(
-                    getattr(TC, param_ccsds.PACKETID.name) == int(pkid))
-    else:
-        thetc = thetc.filter(TC.id == int(dbid))
-    thetc = thetc.order_by(TC.time_sent.desc()).limit(1).first()
-    if thetc is None:
-        return None
-    dictc = {}
-    for key in get_column_keys(TC):
-        dictc[key] = getattr(thetc, key, None)
-    params = {}
-    for item in thetc.telecommand_data_collection:
-        # unicode to str for the key, eval on the value
-        params[str(item.param_key)] = eval(item.value)
-    # get the DB id of the ACK
-    if len(getattr(thetc, 'tmcat_rec_acknowledgements_collection', [])) > 0:
-        rackid = thetc.tmcat_rec_acknowledgements_collection[0]\
-                                                    .telemetry_packet
-    else:
-        # nothing received, set to None
-        rackid = None
-    if len(getattr(thetc, 'tmcat_fmt_acknowledgements_collection', [])) > 0:
-        fackid = thetc.tmcat_fmt_acknowledgements_collection[0]\
-                                                    .telemetry_packet
-    else:
-        # nothing received, set to None
-        fackid = None
-    if len(getattr(thetc, 'tmcat_exe_acknowledgements_collection', [])) > 0:
-        eackid = thetc.tmcat_exe_acknowledgements_collection[0]\
-                                                    .telemetry_packet
-    else:
-        # nothing received, set to None
-        eackid = None
-    # get the DB id of the Answer
-    # basic tcanswer category
-    if len(getattr(thetc, 'tmcat_tc_answers_collection', [])) > 0:
-        ansid = [item.telemetry_packet\
-                    for item in thetc.tmcat_tc_answers_collection]
-    else:
-        pkid = getattr(thetc, param_ccsds.PACKETID.name)
-        cid = getattr(thetc, param_ccsds.TELECOMMANDID.name)
-        ansid = get_TMid_answer_from_TC(cid=cid, pkid=pkid)
-        # nothing received, set to None
+    with session_scope(readonly=True) as session:
+        thetc = session.query(TC)
+        if dbid is None:
+            thetc = thetc.filter(
+                        getattr(TC, param_ccsds.PACKETID.name) == int(pkid))
+        else:
+            thetc = thetc.filter(TC.id == int(dbid))
+        thetc = thetc.order_by(TC.time_sent.desc()).limit(1).first()
+        if thetc is None:
+            return None
+        dictc = {}
+        for key in get_column_keys(TC):
+            dictc[key] = getattr(thetc, key, None)
+        params = {}
+        for item in thetc.telecommand_data_collection:
+            # unicode to str for the key, decode the value
+            params[str(item.param_key)] = decode_value(item.value)
+        # get the DB id of the ACK
+        if len(getattr(thetc, 'tmcat_rec_acknowledgements_collection',
+                       [])) > 0:
+            rackid = thetc.tmcat_rec_acknowledgements_collection[0]\
+                                                        .telemetry_packet
+        else:
+            # nothing received, set to None
+            rackid = None
+        if len(getattr(thetc, 'tmcat_fmt_acknowledgements_collection',
+                       [])) > 0:
+            fackid = thetc.tmcat_fmt_acknowledgements_collection[0]\
+                                                        .telemetry_packet
+        else:
+            # nothing received, set to None
+            fackid = None
+        if len(getattr(thetc, 'tmcat_exe_acknowledgements_collection',
+                       [])) > 0:
+            eackid = thetc.tmcat_exe_acknowledgements_collection[0]\
+                                                        .telemetry_packet
+        else:
+            # nothing received, set to None
+            eackid = None
+        # get the DB id of the Answer
+        # basic tcanswer category
+        if len(getattr(thetc, 'tmcat_tc_answers_collection', [])) > 0:
+            ansid = [item.telemetry_packet\
+                        for item in thetc.tmcat_tc_answers_collection]
+        else:
+            pkid = getattr(thetc, param_ccsds.PACKETID.name)
+            cid = getattr(thetc, param_ccsds.TELECOMMANDID.name)
+            ansid = get_TMid_answer_from_TC(cid=cid, pkid=pkid)
+            # nothing received, set to None
     return (thetc, dictc), params, (rackid, fackid, eackid), ansid
 
 
@@ -257,55 +534,52 @@ def get_TM(dbid=None, pkid=None, pid=None):
     if not running:
         raise ctrlexception.NoDBConnection()
     TM = TABLES['telemetries']
-    thetm = DB.query(TM).filter(TM.id == int(dbid))
-    thetm = thetm.order_by(TM.time_sent.desc()).limit(1).first()
-    DB.commit()
-    if thetm is None:
-        return None
-    dictm = {}
-    for key in get_column_keys(TM):
-        dictm[key] = getattr(thetm, key, None)
-    # grab pld flag and category
-    catnum = int(dictm[param_ccsds.PACKETCATEGORY.name])
-    pldflag = int(dictm[param_ccsds.PAYLOADFLAG.name])
-    # deal with header aux
-    # table name for hdx
-    cat = param_category.CATEGORIES[pldflag][catnum]
-    dichdx = {}
-    if cat.table_aux_name is None:
-        thehdx = None
-    else:
-        TMHDX = TABLES[cat.table_aux_name]
-        thehdx = getattr(thetm, cat.table_aux_name + '_collection', [])
-        if len(thehdx) > 0:
-            # there can be only one
-            thehdx = thehdx[0]
-            for key in get_column_keys(TMHDX):
-                dichdx[key] = getattr(thehdx, key, None)
-        else:
+    with session_scope(readonly=True) as session:
+        thetm = session.query(TM).filter(TM.id == int(dbid))
+        thetm = thetm.order_by(TM.time_sent.desc()).limit(1).first()
+        if thetm is None:
+            return None
+        dictm = {}
+        for key in get_column_keys(TM):
+            dictm[key] = getattr(thetm, key, None)
+        # grab pld flag and category
+        catnum = int(dictm[param_ccsds.PACKETCATEGORY.name])
+        pldflag = int(dictm[param_ccsds.PAYLOADFLAG.name])
+        desc = DESCRIPTORS[(pldflag, catnum)]
+        # deal with header aux
+        dichdx = {}
+        if desc['aux'] is None:
             thehdx = None
-    # deal with data
-    # table name for data
-    dicdata = []
-    tblnm = cat.get_table_data_name(hdx=dichdx)
-    if tblnm is None:
-        thedata = None
-    else:
-        # RAW DATA
-        TMDATA = TABLES[tblnm]
-        thedata = getattr(thetm, tblnm + '_collection', [])
-        if len(thedata) > 0:
-            for dataline in thedata:
-                thedicline = {}
-                if cat.number != param_category.TELECOMMANDANSWERCAT:
-                    for key in get_column_keys(TMDATA):
-                        thedicline[key] = getattr(dataline, key, None)
-                else:
-                    # eval the column
-                    thedicline[str(dataline.param_key)] = eval(dataline.value)
-                dicdata.append(thedicline)
         else:
+            thehdx = getattr(thetm, desc['aux']['collection'], [])
+            if len(thehdx) > 0:
+                # there can be only one
+                thehdx = thehdx[0]
+                for key in desc['aux']['columns']:
+                    dichdx[key] = getattr(thehdx, key, None)
+            else:
+                thehdx = None
+        # deal with data
+        dicdata = []
+        datadesc = get_data_descriptor(desc, dichdx)
+        if datadesc is None:
             thedata = None
+        else:
+            # RAW DATA
+            thedata = getattr(thetm, datadesc['collection'], [])
+            if len(thedata) > 0:
+                for dataline in thedata:
+                    thedicline = {}
+                    if catnum != param_category.TELECOMMANDANSWERCAT:
+                        for key in datadesc['columns']:
+                            thedicline[key] = getattr(dataline, key, None)
+                    else:
+                        # decode the column
+                        thedicline[str(dataline.param_key)] =\
+                                                decode_value(dataline.value)
+                    dicdata.append(thedicline)
+            else:
+                thedata = None
         """# CONV DATA
         add _cv
         tblnmcv = cat.get_table_data_conv_name(hdx=hdx)
@@ -324,6 +598,54 @@ def get_TM(dbid=None, pkid=None, pid=None):
     return (thetm, dictm), (thehdx, dichdx), (thedata, dicdata)
 
 
+def get_TM_values(dbid):
+    """
+    Gives the values of a TM, as get_TM but without building the
+    sqlalchemy objects. Returns ``(dictm, dichdx, dicdata)``, or None
+    if the TM does not exist
+
+    Args:
+      * dbid (int): the DB id of the TM to output
+    """
+    if not running:
+        raise ctrlexception.NoDBConnection()
+    TM = METADATA.tables['telemetries']
+    with ENGINE.connect() as conn:
+        dictm = conn.execute(select(TM).where(TM.c.id == int(dbid)))\
+                    .mappings().first()
+        if dictm is None:
+            return None
+        dictm = dict(dictm)
+        catnum = int(dictm[param_ccsds.PACKETCATEGORY.name])
+        pldflag = int(dictm[param_ccsds.PAYLOADFLAG.name])
+        desc = DESCRIPTORS[(pldflag, catnum)]
+        # deal with header aux
+        dichdx = {}
+        if desc['aux'] is not None:
+            tbl = desc['aux']['table']
+            res = conn.execute(select(tbl).where(tbl.c.telemetry_packet\
+                                                    == dictm['id']))\
+                        .mappings().first()
+            if res is not None:
+                dichdx = dict(res)
+        # deal with data
+        dicdata = []
+        datadesc = get_data_descriptor(desc, dichdx)
+        if datadesc is not None:
+            tbl = datadesc['table']
+            res = conn.execute(select(tbl)\
+                                .where(tbl.c.telemetry_packet == dictm['id'])\
+                                .order_by(tbl.c.id)).mappings()
+            if catnum != param_category.TELECOMMANDANSWERCAT:
+                dicdata = [dict(item) for item in res]
+            else:
+                # decode the column
+                dicdata = [{str(item['param_key']):\
+                                        decode_value(item['value'])}\
+                                    for item in res]
+    return dictm, dichdx, dicdata
+
+
 def save_TM_to_DB(hd, hdx, data):
     """
     Saves the TM headers and data to the database
@@ -333,76 +655,152 @@ def save_TM_to_DB(hd, hdx, data):
       * hdx (dict): the keys-values of the CCSDS auxiliary header
       * data (dict): the keys-values of the input parameters (CCSDS data)
     """
+    return save_TMs_to_DB([(hd, hdx, data)])[0]
+
+
+def save_TMs_to_DB(packets):
+    """
+    Saves many TMs headers and data to the database at once, in a
+    single transaction. The DB ids are reserved beforehand from the
+    tables sequences, so that each table is filled with multi-rows
+    inserts instead of one commit per row
+    Returns the list of the DB ids of the TMs
+
+    Args:
+      * packets (list): the (hd, hdx, data) of the TMs, as given to
+        ``save_TM_to_DB``
+    """
     if not running:
         raise ctrlexception.NoDBConnection()
-    DB.commit()
-    # save prim and sec headers
-    # forced field
-    hd['time_sent'] = core.stamps2time(hd['days_since_ref'],
-                                        hd['ms_since_today'])
-    # force default to now
-    hd['time_saved'] = fcts.now()
-    TM = TABLES['telemetries'](**hd)
-    DB.add(TM)
-    DB.commit()
-    catnum = int(hd[param_ccsds.PACKETCATEGORY.name])
-    pldflag = int(hd[param_ccsds.PAYLOADFLAG.name])
-    # saving the aux header
-    cat = param_category.CATEGORIES[pldflag][catnum]
-    if cat.table_aux_name is not None:
-        hdx = dict(hdx)
-        hdx['telemetry_packet'] = TM.id
-        DB.add(TABLES[cat.table_aux_name](**hdx))
-        DB.commit()
-    # saving the data
-    tblnm = cat.get_table_data_name(hdx=hdx)
-    if tblnm is not None:
-        # if saving the data from TC answer
-        if catnum == param_category.TELECOMMANDANSWERCAT:
-            # if dealing with listof type of trousseau, list of dict-res
+    packets = list(packets)
+    if len(packets) == 0:
+        return []
+    # committed at the end, rolled back on error
+    with ENGINE.begin() as conn:
+        tmids = _next_ids(conn, 'telemetries', len(packets))
+        tms = []
+        # rows to insert, indexed by table name, in insertion order
+        rows = {}
+        order = []
+        # raw data rows having a conversion row, indexed by table name
+        convs = {}
+        for tmid, (hd, hdx, data) in zip(tmids, packets):
+            # save prim and sec headers
+            # forced field
+            hd['time_sent'] = core.stamps2time(hd['days_since_ref'],
+                                                hd['ms_since_today'])
+            # force default to now
+            hd['time_saved'] = fcts.now()
+            tms.append(dict(hd, id=tmid))
+            catnum = int(hd[param_ccsds.PACKETCATEGORY.name])
+            pldflag = int(hd[param_ccsds.PAYLOADFLAG.name])
+            # saving the aux header
+            cat = param_category.CATEGORIES[pldflag][catnum]
+            if cat.table_aux_name is not None:
+                hdx = dict(hdx)
+                hdx['telemetry_packet'] = tmid
+                _add_row(rows, order, cat.table_aux_name, hdx)
+            # saving the data
+            tblnm = cat.get_table_data_name(hdx=hdx)
+            if tblnm is None:
+                continue
+            # if saving the data from TC answer
+            if catnum == param_category.TELECOMMANDANSWERCAT:
+                dictdata = merge_data_listof(data['unpacked'])
+                for k, v in dictdata.items():
+                    _add_row(rows, order, tblnm, {'telemetry_packet': tmid,
+                                                  'param_key': k,
+                                                  'value': encode_value(v)})
+                continue
+            # if dealing with listof type of trousseau, list of res
             if isinstance(data['unpacked'], (list, tuple)):
-                dictdata = {}
-                if len(data['unpacked']) > 0:
-                    for key in data['unpacked'][0].keys():
-                        dictdata[key] = []
-                for item in data['unpacked']:
-                    for k, v in item.items():
-                        dictdata[k].append(v)
+                unpacked = data['unpacked']
+            # standard case
             else:
-                # usual case, just copy the dict-res
-                dictdata = data['unpacked']
-            for k, v in dictdata.items():
-                DB.add(TABLES[tblnm](telemetry_packet=TM.id,
-                                     param_key=k,
-                                     value=repr(v)))
-        # if dealing with listof type of trousseau, list of res
-        elif isinstance(data['unpacked'], (list, tuple)):
+                unpacked = [data['unpacked']]
             trkeys = cat.get_trousseau_keys(hdx=hdx)
-            for item in data['unpacked']:
-                raw, conv = split_data_by_keys_conv(item, trkeys)
-                raw['telemetry_packet'] = TM.id
-                DATA = TABLES[tblnm](**raw)
-                DB.add(DATA)
-                tblnmcv = cat.get_table_data_conv_name(hdx=hdx)
-                if tblnmcv is not None:
-                    DB.commit()
-                    conv['rawdata_id'] = DATA.id
-                    DB.add(TABLES[tblnmcv](**conv))
-        # standard case
-        else:
-            trkeys = cat.get_trousseau_keys(hdx=hdx)
-            raw, conv = split_data_by_keys_conv(data['unpacked'], trkeys)
-            raw['telemetry_packet'] = TM.id
-            DATA = TABLES[tblnm](**raw)
-            DB.add(DATA)
             tblnmcv = cat.get_table_data_conv_name(hdx=hdx)
-            if tblnmcv is not None:
-                DB.commit()
-                conv['rawdata_id'] = DATA.id
-                DB.add(TABLES[tblnmcv](**conv))
-    # save changes
-    DB.commit()
-    return TM.id
+            for item in unpacked:
+                raw, conv = split_data_by_keys_conv(item, trkeys)
+                raw['telemetry_packet'] = tmid
+                if tblnmcv is None:
+                    _add_row(rows, order, tblnm, raw)
+                else:
+                    convs.setdefault(tblnm, []).append((tblnmcv, raw, conv))
+        # conversion rows need the DB id of their raw data row
+        convrows = {}
+        convorder = []
+        for tblnm, items in convs.items():
+            ids = _next_ids(conn, tblnm, len(items))
+            for dataid, (tblnmcv, raw, conv) in zip(ids, items):
+                raw['id'] = dataid
+                conv['rawdata_id'] = dataid
+                _add_row(rows, order, tblnm, raw)
+                _add_row(convrows, convorder, tblnmcv, conv)
+        # parent tables first, for the foreign keys
+        _insert_rows(conn, 'telemetries', tms)
+        for tblnm in order:
+            _insert_rows(conn, tblnm, rows[tblnm])
+        for tblnm in convorder:
+            _insert_rows(conn, tblnm, convrows[tblnm])
+    return tmids
+
+
+def _add_row(rows, order, tblnm, row):
+    """
+    Appends the row to the rows of the table ``tblnm``
+    """
+    if tblnm not in rows:
+        rows[tblnm] = []
+        order.append(tblnm)
+    rows[tblnm].append(row)
+
+
+def _next_ids(conn, tblnm, n):
+    """
+    Reserves ``n`` DB ids from the sequence of the table ``tblnm``
+    in one query, returns them as list
+    """
+    table = METADATA.tables[tblnm]
+    res = conn.execute(text("SELECT nextval('{}_id_seq') "
+                            "FROM generate_series(1, :n)".format(table.name)),
+                       {'n': int(n)})
+    return [int(item[0]) for item in res]
+
+
+def _insert_rows(conn, tblnm, rows):
+    """
+    Inserts the rows (list of dict) into the table ``tblnm``, with
+    one multi-rows insert per set of columns and per chunk of
+    ``param_sys.DBINSERTCHUNK`` rows
+    """
+    table = METADATA.tables[tblnm]
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+    for group in groups.values():
+        for idx in range(0, len(group), param_sys.DBINSERTCHUNK):
+            conn.execute(table.insert().values(
+                            group[idx:idx+param_sys.DBINSERTCHUNK]))
+
+
+def merge_data_listof(unpacked):
+    """
+    Given the unpacked data of a TC answer, returns a dictionary
+    of values. If dealing with listof type of trousseau, the list of
+    dict-res is merged into a dict of lists
+    """
+    if not isinstance(unpacked, (list, tuple)):
+        # usual case, just copy the dict-res
+        return dict(unpacked)
+    dictdata = {}
+    if len(unpacked) > 0:
+        for key in unpacked[0].keys():
+            dictdata[key] = []
+    for item in unpacked:
+        for k, v in item.items():
+            dictdata[k].append(v)
+    return dictdata
 
 
 def split_data_by_keys_conv(data, trkeys):
@@ -427,12 +825,12 @@ def get_RACK_TCid():
     """
     if not running:
         raise ctrlexception.NoDBConnection()
-    TC = TABLES['telecommands']
+    TC = METADATA.tables['telecommands']
     # just grab the latest TC that was actually sent
-    idx = DB.query(TC.id)\
-            .filter(TC.time_sent != None)\
-            .order_by(TC.time_sent.desc()).limit(1).first()
-    DB.commit()
+    with ENGINE.connect() as conn:
+        idx = conn.execute(select(TC.c.id)\
+                        .where(TC.c.time_sent != None)\
+                        .order_by(TC.c.time_sent.desc()).limit(1)).first()
     if idx is None:
         return None
     else:
@@ -451,12 +849,12 @@ def get_ACK_TCid(pkid):
     """
     if not running:
         raise ctrlexception.NoDBConnection()
-    TC = TABLES['telecommands']
+    TC = METADATA.tables['telecommands']
     # grab the TC that was sent and to which we're replying
-    idx = DB.query(TC.id)\
-            .filter(getattr(TC, param_ccsds.PACKETID.name) == int(pkid))\
-            .order_by(TC.time_sent.desc()).limit(1).first()
-    DB.commit()
+    with ENGINE.connect() as conn:
+        idx = conn.execute(select(TC.c.id)\
+                    .where(TC.c[param_ccsds.PACKETID.name] == int(pkid))\
+                    .order_by(TC.c.time_sent.desc()).limit(1)).first()
     # can't find the TC... wasn't saved?
     if idx is None:
         return None
@@ -475,14 +873,15 @@ def get_tcanswer_TCid(pkid=None, dbid=None):
     """
     if not running:
         raise ctrlexception.NoDBConnection()
-    TC = TABLES['telecommands']
-    thetc = DB.query(TC.id)
+    TC = METADATA.tables['telecommands']
+    thetc = select(TC.c.id)
     if dbid is None:
-        thetc = thetc.filter(getattr(TC, param_ccsds.PACKETID.name) == int(pkid))
+        thetc = thetc.where(TC.c[param_ccsds.PACKETID.name] == int(pkid))
     else:
-        thetc = thetc.filter(TC.id == int(dbid))
-    idx = thetc.order_by(TC.time_sent.desc()).limit(1).first()
-    DB.commit()
+        thetc = thetc.where(TC.c.id == int(dbid))
+    with ENGINE.connect() as conn:
+        idx = conn.execute(thetc.order_by(TC.c.time_sent.desc()).limit(1))\
+                    .first()
     # can't find the TC... wasn't saved?
     if idx is None:
         return None
@@ -490,33 +889,13 @@ def get_tcanswer_TCid(pkid=None, dbid=None):
         return idx[0]
 
 
-def get_TMid_answer_from_TC(cid=None, pkid=None, dbid=None):
+def get_answer_tables():
     """
-    Finds all the dbid of a TM-answer packet
-
-    Args:
-      * cid (int): the command id inside the TC
-      * pkid (int): the packet counter id of the TC to scan
-      * dbid (int) [alternative]: the DB id of the TC to scan
+    Returns the aux tables of the categories that can hold the answer
+    to a TC, i.e. having the packet id and TC id mirror columns
     """
-    if not running:
-        raise ctrlexception.NoDBConnection()
-    # need command id and packet id for later, so grab it if not given
-    if cid is None or pkid is None:
-        TC = TABLES['telecommands']
-        thetc = DB.query(TC)
-        if dbid is None:
-            thetc = thetc.filter(
-                        getattr(TC, param_ccsds.PACKETID.name) == int(pkid))
-        else:
-            thetc = thetc.filter(TC.id == int(dbid))
-        thetc = thetc.order_by(TC.time_sent.desc()).limit(1).first()
-        # grab info
-        pkid = getattr(thetc, param_ccsds.PACKETID.name)
-        cid = getattr(thetc, param_ccsds.TELECOMMANDID.name)
-        DB.commit()
+    tables = []
     # iterate through all known packet categories to scan all SQL tables
-    ids = []
     for pldflag in [0, 1]:
         for catnum, cat in param_category.CATEGORIES[pldflag].items():
             # we want answer, not an ack
@@ -526,22 +905,57 @@ def get_TMid_answer_from_TC(cid=None, pkid=None, dbid=None):
             if cat.aux_trousseau is None:
                 continue
             # patch to allow partly designed DB and avoid error
-            if cat.table_aux_name not in TABLES.keys():
+            if cat.table_aux_name not in METADATA.tables.keys():
                 continue
-            TMAUX = TABLES[cat.table_aux_name]
+            TMAUX = METADATA.tables[cat.table_aux_name]
             cols = get_column_keys(TMAUX)
             # can only be answer if there is packet id mirror + tc id mirror
             if pcc.PACKETIDMIRROR.name not in cols or\
                     pcc.TELECOMMANDIDMIRROR.name not in cols:
                 continue
-            res = DB.query(TMAUX.telemetry_packet)\
-                    .filter(getattr(TMAUX,
-                                    pcc.PACKETIDMIRROR.name)\
-                                == int(pkid))\
-                    .filter(getattr(TMAUX,
-                                    pcc.TELECOMMANDIDMIRROR.name)\
-                                == int(cid))\
-                    .order_by(TMAUX.id.desc())
-            ids += [item[0] for item in res.all()]
-            DB.commit()
+            # categories common to both payload flags share their table
+            if TMAUX not in tables:
+                tables.append(TMAUX)
+    return tables
+
+
+def get_TMid_answer_from_TC(cid=None, pkid=None, dbid=None):
+    """
+    Finds all the dbid of a TM-answer packet
+
+    Args:
+      * cid (int): the command id inside the TC
+      * pkid (int): the packet counter id of the TC to scan
+      * dbid (int) [alternative]: the DB id of the TC to scan
+    """
+    if not running:
+        raise ctrlexception.NoDBConnection()
+    # need command id and packet id for later, so grab it if not given
+    if cid is None or pkid is None:
+        TC = METADATA.tables['telecommands']
+        thetc = select(TC.c[param_ccsds.PACKETID.name],
+                       TC.c[param_ccsds.TELECOMMANDID.name])
+        if dbid is None:
+            thetc = thetc.where(TC.c[param_ccsds.PACKETID.name] == int(pkid))
+        else:
+            thetc = thetc.where(TC.c.id == int(dbid))
+        # grab info
+        with ENGINE.connect() as conn:
+            pkid, cid = conn.execute(thetc.order_by(TC.c.time_sent.desc())\
+                                            .limit(1)).first()
+    if len(ANSWERTABLES) == 0:
+        return []
+    # one query over all the aux tables that can hold an answer, keeping
+    # the tables in the categories order
+    subs = []
+    for idx, TMAUX in enumerate(ANSWERTABLES):
+        subs.append(select(TMAUX.c.telemetry_packet.label('tmid'),
+                           literal(idx).label('tblidx'),
+                           TMAUX.c.id.label('auxid'))\
+                .where(TMAUX.c[pcc.PACKETIDMIRROR.name] == int(pkid))\
+                .where(TMAUX.c[pcc.TELECOMMANDIDMIRROR.name] == int(cid)))
+    res = union_all(*subs).subquery('answers')
+    res = select(res.c.tmid).order_by(res.c.tblidx, res.c.auxid.desc())
+    with ENGINE.connect() as conn:
+        ids = [item[0] for item in conn.execute(res)]
     return ids
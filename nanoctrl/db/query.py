@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from sqlalchemy import select
+from sqlalchemy import and_
+from nanoparam.categories import param_category
+from nanoparam import param_ccsds
+from nanoutils import param_sys
+from nanoutils import ctrlexception
+from nanoutils.ccsds import ccsdsexception
+
+
+from . import orm
+
+
+__all__ = ['query_tm', 'iter_tm']
+
+
+# columns not returned by default
+HIDDENCOLUMNS = ['id', 'telemetry_packet', 'rawdata_id']
+
+
+def get_tm_columns(catnum, pldflag, trkey=None):
+    """
+    Returns the list of (name, sqlalchemy column) available for the
+    TM category, in order: telemetries columns, aux header columns,
+    data columns and conversion columns, the latter with
+    ``param_sys.SUFIXCONVERSION`` appended. The ids of the aux and
+    data rows are not included
+
+    Args:
+      * catnum (int): the category number
+      * pldflag (int): the payload flag
+      * trkey (int): the meta-trousseau key, if the category data is
+        a meta-trousseau
+    """
+    desc = orm.DESCRIPTORS[(int(pldflag), int(catnum))]
+    TM = orm.METADATA.tables['telemetries']
+    cols = [(name, TM.c[name]) for name in orm.get_column_keys(TM)]
+    names = set(name for name, col in cols)
+    if desc['aux'] is not None:
+        for name in desc['aux']['columns']:
+            if name not in HIDDENCOLUMNS and name not in names:
+                cols.append((name, desc['aux']['table'].c[name]))
+                names.add(name)
+    datadesc, convdesc = _get_data_descriptors(desc, trkey)
+    if datadesc is not None:
+        for name in datadesc['columns']:
+            if name not in HIDDENCOLUMNS and name not in names:
+                cols.append((name, datadesc['table'].c[name]))
+                names.add(name)
+    if convdesc is not None:
+        for name in convdesc['columns']:
+            if name in HIDDENCOLUMNS:
+                continue
+            cols.append((name + param_sys.SUFIXCONVERSION,
+                         convdesc['table'].c[name]))
+    return cols
+
+
+def _get_data_descriptors(desc, trkey):
+    """
+    Returns the descriptors of the data and conversion tables of the
+    category, None if not any. TC answers are stored as key-values and
+    have no data column
+    """
+    cat = desc['cat']
+    if cat.data_trousseau is None or\
+            cat.number == param_category.TELECOMMANDANSWERCAT:
+        return None, None
+    hdx = {}
+    if cat.is_data_metatr:
+        hdx = {cat.data_trousseau.key: trkey}
+    datadesc = orm.get_data_descriptor(desc, hdx)
+    if datadesc is None:
+        return None, None
+    trkey = trkey if cat.is_data_metatr else None
+    return datadesc, desc['conv'].get(trkey)
+
+
+def iter_tm(catnum, pldflag, time_range=None, fields=None, trkey=None,
+                chunksize=None):
+    """
+    Queries all the TMs of a category with one single join over the
+    telemetries, aux header, data and conversion tables, ordered by
+    ``time_sent``. The rows are streamed from a server-side cursor
+    and yielded as columnar chunks: dictionaries of numpy arrays
+    indexed by field name
+
+    Args:
+      * catnum (int): the category number
+      * pldflag (int): the payload flag
+      * time_range (tuple of datetime): [optional] the (start, end)
+        of ``time_sent``, either can be None
+      * fields (list of str): [optional] the field names to return,
+        default all. Conversion fields end with
+        ``param_sys.SUFIXCONVERSION``
+      * trkey (int): the meta-trousseau key, if the category data is
+        a meta-trousseau
+      * chunksize (int): the number of rows per chunk, default
+        ``param_sys.DBQUERYCHUNK``
+    """
+    if not orm.running:
+        raise ctrlexception.NoDBConnection()
+    if numpy is None:
+        raise ccsdsexception.NumpyMissing('run columnar queries')
+    chunksize = int(param_sys.DBQUERYCHUNK if chunksize is None
+                    else chunksize)
+    desc = orm.DESCRIPTORS[(int(pldflag), int(catnum))]
+    allcols = get_tm_columns(catnum=catnum, pldflag=pldflag, trkey=trkey)
+    if fields is None:
+        cols = allcols
+    else:
+        allcols = dict(allcols)
+        cols = []
+        for name in fields:
+            if name not in allcols:
+                raise ctrlexception.NoSuchTMField(name)
+            cols.append((name, allcols[name]))
+    names = [name for name, col in cols]
+    # build the join
+    TM = orm.METADATA.tables['telemetries']
+    joined = TM
+    if desc['aux'] is not None:
+        aux = desc['aux']['table']
+        joined = joined.outerjoin(aux, aux.c.telemetry_packet == TM.c.id)
+    datadesc, convdesc = _get_data_descriptors(desc, trkey)
+    order = [TM.c.time_sent, TM.c.id]
+    if datadesc is not None:
+        data = datadesc['table']
+        joined = joined.outerjoin(data, data.c.telemetry_packet == TM.c.id)
+        order.append(data.c.id)
+        if convdesc is not None:
+            conv = convdesc['table']
+            joined = joined.outerjoin(conv, conv.c.rawdata_id == data.c.id)
+    where = [TM.c[param_ccsds.PACKETCATEGORY.name] == int(catnum),
+             TM.c[param_ccsds.PAYLOADFLAG.name] == int(pldflag)]
+    if time_range is not None:
+        start, end = time_range
+        if start is not None:
+            where.append(TM.c.time_sent >= start)
+        if end is not None:
+            where.append(TM.c.time_sent <= end)
+    query = select(*[col.label(name) for name, col in cols])\
+                .select_from(joined).where(and_(*where)).order_by(*order)
+    with orm.ENGINE.connect() as conn:
+        res = conn.execution_options(stream_results=True).execute(query)
+        while True:
+            rows = res.fetchmany(chunksize)
+            if len(rows) == 0:
+                break
+            yield _to_columns(names, rows)
+
+
+def query_tm(catnum, pldflag, time_range=None, fields=None, trkey=None):
+    """
+    Queries all the TMs of a category, see ``iter_tm``. Returns a
+    dictionary of numpy arrays indexed by field name, with one item
+    per TM, or per data row for listof trousseaux
+
+    Args:
+      * catnum (int): the category number
+      * pldflag (int): the payload flag
+      * time_range (tuple of datetime): [optional] the (start, end)
+        of ``time_sent``, either can be None
+      * fields (list of str): [optional] the field names to return,
+        default all
+      * trkey (int): the meta-trousseau key, if the category data is
+        a meta-trousseau
+    """
+    chunks = list(iter_tm(catnum=catnum, pldflag=pldflag,
+                          time_range=time_range, fields=fields, trkey=trkey))
+    if fields is None:
+        fields = [name for name, col in get_tm_columns(catnum=catnum,
+                                                       pldflag=pldflag,
+                                                       trkey=trkey)]
+    if len(chunks) == 0:
+        return dict((name, numpy.array([])) for name in fields)
+    if len(chunks) == 1:
+        return chunks[0]
+    return dict((name, numpy.concatenate([item[name] for item in chunks]))
+                    for name in fields)
+
+
+def _to_columns(names, rows):
+    """
+    Transposes the rows into a dictionary of numpy arrays
+    """
+    res = {}
+    for idx, name in enumerate(names):
+        values = [row[idx] for row in rows]
+        col = numpy.array(values)
+        # NULL in numerical columns become nan
+        if col.dtype == object and any(item is None for item in values):
+            try:
+                col = numpy.array([numpy.nan if item is None else item
+                                   for item in values], dtype=float)
+            except (TypeError, ValueError):
+                pass
+        res[name] = col
+    return res
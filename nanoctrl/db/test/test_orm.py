@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Session
+from nanoctrl.db import orm
+
+
+def _metadata():
+    md = MetaData()
+    Table('telemetries', md, Column('id', Integer, primary_key=True))
+    Table('telecommands', md, Column('id', Integer, primary_key=True))
+    Table('tmcat_hk', md, Column('id', Integer, primary_key=True),
+          Column('telemetry_packet', ForeignKey('telemetries.id')),
+          Column('mode', Integer))
+    Table('tmcat_ack', md, Column('id', Integer, primary_key=True),
+          Column('telemetry_packet', ForeignKey('telemetries.id')),
+          Column('telecommand_packet', ForeignKey('telecommands.id')))
+    Table('unrelated', md, Column('id', Integer, primary_key=True))
+    Table('nokey', md, Column('value', Integer))
+    return md
+
+
+def test_lazy_tables():
+    md = _metadata()
+    tables = orm._LazyTables(md)
+    assert sorted(tables.keys()) == ['telecommands', 'telemetries',
+                                     'tmcat_ack', 'tmcat_hk', 'unrelated']
+    assert 'tmcat_hk' in tables and 'nokey' not in tables
+    assert len(tables) == 5
+    assert tables.get('nokey') is None
+    # nothing mapped yet
+    assert dict.__len__(tables) == 0
+    TM = tables['telemetries']
+    assert TM.__table__.name == 'telemetries'
+    # only the table asked for is mapped
+    assert list(dict.keys(tables)) == ['telemetries']
+    assert tables['telemetries'] is TM
+    try:
+        tables['nokey']
+    except KeyError:
+        pass
+    else:
+        assert False
+
+
+def test_lazy_tables_relationships():
+    md = _metadata()
+    engine = create_engine('sqlite://')
+    md.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(md.tables['telemetries'].insert().values(id=1))
+        conn.execute(md.tables['telecommands'].insert().values(id=2))
+        conn.execute(md.tables['tmcat_hk'].insert().values(
+                                            id=3, telemetry_packet=1, mode=7))
+        conn.execute(md.tables['tmcat_ack'].insert().values(
+                            id=4, telemetry_packet=1, telecommand_packet=2))
+    tables = orm._LazyTables(md)
+    session = Session(engine)
+    tm = session.get(tables['telemetries'], 1)
+    assert [item.mode for item in tm.tmcat_hk_collection] == [7]
+    assert [item.id for item in tm.tmcat_ack_collection] == [4]
+    ack = session.get(tables['tmcat_ack'], 4)
+    assert ack.telecommands.id == 2
+    session.close()
+    engine.dispose()
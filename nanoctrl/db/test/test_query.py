@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import datetime
+import numpy
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer
+from sqlalchemy import Float, DateTime, ForeignKey
+from nanoparam import param_ccsds
+from nanoutils import param_sys
+from nanoutils import ctrlexception
+from nanoutils.ccsds import ccsdsexception
+from nanoctrl.db import orm
+from nanoctrl.db import query
+
+
+class Category(object):
+    number = 7
+    table_aux_name = 'tmcat_hk'
+    data_trousseau = object()
+    is_data_metatr = False
+    _thatsTCANS = False
+
+    def get_table_data_name(self, hdx):
+        return 'tmcat_hk_data'
+
+    def get_table_data_conv_name(self, hdx):
+        return 'tmcat_hk_data_cv'
+
+
+T0 = datetime.datetime(2020, 1, 1)
+SAVED = {}
+
+
+def setup_module():
+    for key in ['running', 'ENGINE', 'METADATA', 'COLUMNS', 'DESCRIPTORS']:
+        SAVED[key] = getattr(orm, key)
+    md = MetaData()
+    tm = Table('telemetries', md, Column('id', Integer, primary_key=True),
+               Column(param_ccsds.PACKETCATEGORY.name, Integer),
+               Column(param_ccsds.PAYLOADFLAG.name, Integer),
+               Column('time_sent', DateTime))
+    aux = Table('tmcat_hk', md, Column('id', Integer, primary_key=True),
+                Column('telemetry_packet', ForeignKey('telemetries.id')),
+                Column('mode', Integer))
+    data = Table('tmcat_hk_data', md, Column('id', Integer, primary_key=True),
+                 Column('telemetry_packet', ForeignKey('telemetries.id')),
+                 Column('volt', Integer))
+    conv = Table('tmcat_hk_data_cv', md,
+                 Column('id', Integer, primary_key=True),
+                 Column('rawdata_id', ForeignKey('tmcat_hk_data.id')),
+                 Column('volt', Float))
+    engine = create_engine('sqlite://')
+    md.create_all(engine)
+    with engine.begin() as conn:
+        for i in range(5):
+            # TM 3 is of another category
+            cat = 8 if i == 3 else 7
+            conn.execute(tm.insert().values(**{'id': i + 1,
+                                param_ccsds.PACKETCATEGORY.name: cat,
+                                param_ccsds.PAYLOADFLAG.name: 0,
+                                'time_sent': T0 + datetime.timedelta(
+                                                            minutes=10-i)}))
+            conn.execute(aux.insert().values(telemetry_packet=i + 1,
+                                             mode=i % 2))
+            # TM 5 has no data
+            if i == 4:
+                continue
+            conn.execute(data.insert().values(id=i + 1,
+                                              telemetry_packet=i + 1,
+                                              volt=100 * i))
+            conn.execute(conv.insert().values(rawdata_id=i + 1,
+                                              volt=0.1 * i))
+    orm.ENGINE = engine
+    orm.METADATA = md
+    orm.COLUMNS = {}
+    orm.DESCRIPTORS = {(0, 7): orm.get_category_descriptor(Category())}
+    orm.running = True
+
+
+def teardown_module():
+    orm.ENGINE.dispose()
+    for key, value in SAVED.items():
+        setattr(orm, key, value)
+
+
+def test_query_tm():
+    res = query.query_tm(7, 0)
+    # ordered by time_sent, TMs 5, 3, 2, 1
+    assert list(res['id']) == [5, 3, 2, 1]
+    assert list(res['mode']) == [0, 0, 1, 0]
+    assert numpy.isnan(res['volt'][0])
+    assert list(res['volt'][1:]) == [200, 100, 0]
+    cv = 'volt' + param_sys.SUFIXCONVERSION
+    assert numpy.isnan(res[cv][0])
+    assert numpy.allclose(res[cv][1:], [0.2, 0.1, 0.])
+    assert 'telemetry_packet' not in res and 'rawdata_id' not in res
+
+
+def test_query_tm_fields_range():
+    res = query.query_tm(7, 0, fields=['id', 'volt'],
+                    time_range=(T0 + datetime.timedelta(minutes=8), None))
+    assert sorted(res.keys()) == ['id', 'volt']
+    assert list(res['id']) == [3, 2, 1]
+    res = query.query_tm(7, 0, fields=['id'], time_range=(None, T0))
+    assert len(res['id']) == 0
+    try:
+        query.query_tm(7, 0, fields=['nope'])
+    except ctrlexception.NoSuchTMField:
+        pass
+    else:
+        assert False
+
+
+def test_iter_tm():
+    chunks = list(query.iter_tm(7, 0, fields=['id'], chunksize=3))
+    assert [list(item['id']) for item in chunks] == [[5, 3, 2], [1]]
+
+
+def test_numpy_missing():
+    query.numpy = None
+    try:
+        list(query.iter_tm(7, 0))
+    except ccsdsexception.NumpyMissing:
+        pass
+    else:
+        assert False
+    finally:
+        query.numpy = numpy
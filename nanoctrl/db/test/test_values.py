@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt, DByt
+from nanoutils import ctrlexception
+from nanoctrl.db.values import encode_value, decode_value, is_legacy_value
+
+
+VALUES = [5, -3, 1.5, 'abc', True, None, [1, 2, [3, 4]], Byt('\x00\xffa'),
+          DByt('\x01'), [Byt('a'), 'b'], 2**70, "it's", (1.5,), (1, 2),
+          ((1, (2.5, 3)), [4, (5,)]), {1: 'a', 2: (3,)}, {'a': {1: 2}},
+          {(1, 2): 'b', Byt('k'): 1}, {'__tuple__': [1]}, {'a': (1,)}]
+
+
+def test_roundtrip():
+    for v in VALUES:
+        res = decode_value(encode_value(v))
+        assert res == v
+        assert type(res) == type(v)
+        assert not is_legacy_value(encode_value(v))
+
+
+def test_legacy():
+    for v in VALUES:
+        res = decode_value(repr(v))
+        assert res == v
+        assert type(res) == type(v)
+    assert decode_value('(1, 2)') == (1, 2)
+    assert is_legacy_value(repr(Byt('a')))
+    for txt in ["__import__('os')",
+                "().__class__.__base__.__subclasses__()",
+                "Byt.__class__", "Byt('a').hex()", "Byt(1)",
+                "[x for x in ()]", "(lambda: 1)()", "open('/etc/passwd')",
+                "Byt(s='a')", "1 + 1", "{[1]: 2}"]:
+        try:
+            decode_value(txt)
+        except ctrlexception.InvalidDBValue:
+            pass
+        else:
+            assert False, txt
+
+
+def test_legacy_literals():
+    assert decode_value("-1.5") == -1.5
+    assert decode_value("-inf") == float('-inf')
+    assert decode_value("(1+2j)") == 1+2j
+    assert decode_value("{1: (Byt('a'), None)}") == {1: (Byt('a'), None)}
+    assert type(decode_value("{1: (Byt('a'), None)}")[1][0]) == Byt
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import ast
+import json
+import binascii
+from byt import Byt, DByt
+from nanoutils import ctrlexception
+
+
+__all__ = ['encode_value', 'decode_value', 'is_legacy_value',
+           'parse_legacy_value']
+
+
+# tags of the types that json cannot hold
+BYTTAG = '__byt__'
+DBYTTAG = '__dbyt__'
+TUPLETAG = '__tuple__'
+# dictionaries with non-str keys, as a list of [key, value]
+DICTTAG = '__dict__'
+TAGS = (BYTTAG, DBYTTAG, TUPLETAG, DICTTAG)
+
+
+# the only names and calls allowed in legacy rows
+LEGACYNAMES = {'True': True, 'False': False, 'None': None,
+               'inf': float('inf'), 'nan': float('nan')}
+LEGACYCALLS = {'Byt': Byt, 'DByt': DByt}
+
+
+def _b64(v):
+    """
+    Base64 of a chain of octets, as str
+    """
+    return binascii.b2a_base64(bytes(v)).decode('ascii').rstrip('\n')
+
+
+def _tag(v):
+    """
+    Replaces recursively the types that json cannot hold by tagged
+    dictionaries
+    """
+    if isinstance(v, DByt):
+        return {DBYTTAG: _b64(v)}
+    elif isinstance(v, Byt):
+        return {BYTTAG: _b64(v)}
+    elif isinstance(v, tuple):
+        return {TUPLETAG: [_tag(item) for item in v]}
+    elif isinstance(v, list):
+        return [_tag(item) for item in v]
+    elif isinstance(v, dict):
+        # keys that json would turn into str, or that look like a tag
+        if any(not isinstance(k, str) for k in v.keys())\
+                or (len(v) == 1 and list(v.keys())[0] in TAGS):
+            return {DICTTAG: [[_tag(k), _tag(item)]
+                              for k, item in v.items()]}
+        return dict((k, _tag(item)) for k, item in v.items())
+    elif hasattr(v, 'item') and hasattr(v, 'dtype'):
+        # numpy scalar
+        return v.item()
+    return v
+
+
+def _untag(dic):
+    """
+    Object hook of the json decoding, restores the tagged types
+    """
+    if len(dic) == 1:
+        if BYTTAG in dic:
+            return Byt(binascii.a2b_base64(dic[BYTTAG]))
+        elif DBYTTAG in dic:
+            return DByt(binascii.a2b_base64(dic[DBYTTAG]))
+        elif TUPLETAG in dic:
+            return tuple(dic[TUPLETAG])
+        elif DICTTAG in dic:
+            return dict((k, item) for k, item in dic[DICTTAG])
+    return dic
+
+
+def _literal(node):
+    """
+    Returns the value of a node of the syntax tree of a legacy row,
+    raises ``ValueError`` if it is not a literal
+    """
+    if isinstance(node, ast.Expression):
+        return _literal(node.body)
+    elif hasattr(ast, 'Constant') and isinstance(node, ast.Constant):
+        return node.value
+    elif isinstance(node, getattr(ast, 'Num', ())):
+        return node.n
+    elif isinstance(node, getattr(ast, 'Str', ())):
+        return node.s
+    elif isinstance(node, getattr(ast, 'Bytes', ())):
+        return node.s
+    elif isinstance(node, ast.Name) and node.id in LEGACYNAMES:
+        return LEGACYNAMES[node.id]
+    elif isinstance(node, getattr(ast, 'NameConstant', ())):
+        return node.value
+    elif isinstance(node, ast.Tuple):
+        return tuple(_literal(item) for item in node.elts)
+    elif isinstance(node, ast.List):
+        return [_literal(item) for item in node.elts]
+    elif isinstance(node, ast.Set):
+        return set(_literal(item) for item in node.elts)
+    elif isinstance(node, ast.Dict):
+        return dict((_literal(k), _literal(v))
+                    for k, v in zip(node.keys, node.values))
+    elif isinstance(node, ast.UnaryOp)\
+            and isinstance(node.op, (ast.USub, ast.UAdd)):
+        v = _literal(node.operand)
+        if isinstance(v, (int, float, complex)) and not isinstance(v, bool):
+            return -v if isinstance(node.op, ast.USub) else v
+    elif isinstance(node, ast.BinOp)\
+            and isinstance(node.op, (ast.Add, ast.Sub)):
+        # complex numbers
+        left = _literal(node.left)
+        right = _literal(node.right)
+        if isinstance(left, (int, float)) and isinstance(right, complex)\
+                and not isinstance(left, bool):
+            return left + right if isinstance(node.op, ast.Add)\
+                        else left - right
+    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name)\
+            and node.func.id in LEGACYCALLS and len(node.args) == 1\
+            and len(node.keywords) == 0\
+            and getattr(node, 'starargs', None) is None\
+            and getattr(node, 'kwargs', None) is None:
+        arg = _literal(node.args[0])
+        if isinstance(arg, (str, bytes)):
+            return LEGACYCALLS[node.func.id](arg)
+    raise ValueError("Not a literal")
+
+
+def parse_legacy_value(txt):
+    """
+    Parses a ``value`` column written by the legacy ``repr``. Only
+    literals and ``Byt``/``DByt`` of literals are accepted, nothing is
+    evaluated
+
+    Args:
+      * txt (str): the value to parse
+    """
+    try:
+        return _literal(ast.parse(txt.strip(), mode='eval'))
+    except (SyntaxError, ValueError, TypeError, RuntimeError):
+        raise ctrlexception.InvalidDBValue(txt)
+
+
+def encode_value(v):
+    """
+    Encodes a TC input or TC answer value for the ``value`` column:
+    compact json, with the chains of octets as tagged base64
+    strings.
+    Falls back on the legacy ``repr`` for the values json cannot hold
+
+    Args:
+      * v (any): the value to encode
+    """
+    try:
+        return json.dumps(_tag(v), separators=(',', ':'), allow_nan=True)
+    except (TypeError, ValueError):
+        return repr(v)
+
+
+def decode_value(txt):
+    """
+    Decodes a ``value`` column written by ``encode_value``, or by the
+    legacy ``repr``
+
+    Args:
+      * txt (str): the value to decode
+    """
+    try:
+        return json.loads(txt, object_hook=_untag)
+    except ValueError:
+        # legacy repr-ed value
+        return parse_legacy_value(txt)
+
+
+def is_legacy_value(txt):
+    """
+    Whether the ``value`` column was written by the legacy ``repr``
+
+    Args:
+      * txt (str): the value to check
+    """
+    try:
+        json.loads(txt)
+    except ValueError:
+        return True
+    return False
@@ -26,3 +26,4 @@
 
 from .callsign import Callsign
 from .frame import Framer
+from nanoutils.kisscodec import KISSDeframer, split_kiss
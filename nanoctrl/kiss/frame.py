@@ -36,6 +36,61 @@ from .callsign import Callsign
 __all__ = ['Framer']
 
 
+# encoded AX25 address, control and PID fields per (source,
+# destination, path)
+HEADERS = {}
+MAXHEADERS = 256
+
+# decoded callsigns per encoded address subfield
+CALLSIGNS = {}
+MAXCALLSIGNS = 256
+
+# max number of address subfields in a frame
+MAXADDRESSES = 10
+
+
+def _get_header(source, destination, path):
+    """
+    Returns the raw and the KISS-encoded headers of the frames, which
+    are computed once per (source, destination, path)
+    """
+    key = (source, destination, tuple(path))
+    if key in HEADERS:
+        return HEADERS[key]
+    source = Callsign(source) if source is not None else Callsign('')
+    destination = Callsign(destination) if destination is not None\
+                    else Callsign('')
+    path = list(map(Callsign, path))
+    enc_frame = destination.encode_callsign() +\
+                    source.encode_callsign() +\
+                    Byt().join([path_call.encode_callsign()
+                                for path_call in path])
+    header = enc_frame[:-1] +\
+                Byt(ord(enc_frame[-1]) | 0x01) +\
+                kissutils.SLOT_TIME +\
+                Byt('\xf0')
+    kissheader = kissutils.FEND + kissutils.DATA_FRAME +\
+                    kissutils.escape_special_codes(header)
+    if len(HEADERS) >= MAXHEADERS:
+        HEADERS.clear()
+    HEADERS[key] = (header, kissheader)
+    return header, kissheader
+
+
+def _get_callsign(field):
+    """
+    Returns the Callsign of an encoded address subfield, decoded once
+    """
+    field = bytes(field)
+    res = CALLSIGNS.get(field)
+    if res is None:
+        res = Callsign(field)
+        if len(CALLSIGNS) >= MAXCALLSIGNS:
+            CALLSIGNS.clear()
+        CALLSIGNS[field] = res
+    return res
+
+
 class Frame(object):
     def __init__(self, source=None, destination=None, path=[],
                     kiss=None):
@@ -56,31 +111,29 @@ class Frame(object):
         self.destination = Callsign(destination) if destination is not None\
                         else Callsign('')
         self.path = list(map(Callsign, path)) if path != [] else []
+        self._header, self._kissheader = _get_header(source, destination,
+                                                     path)
 
     def encode_radio(self, text):
         """
         Encodes an Frame as AX25+KISS
         """
         self.text = Byt(text)
-        enc_frame = self.destination.encode_callsign() +\
-                        self.source.encode_callsign() +\
-                        Byt().join([path_call.encode_callsign()
-                                    for path_call in self.path])
-        frame = enc_frame[:-1] +\
-                    Byt(ord(enc_frame[-1]) | 0x01) +\
-                    kissutils.SLOT_TIME +\
-                    Byt('\xf0') +\
-                    self.text
         if not self.ISKISS:
-            return frame
+            return self._header + self.text
         else:
-            frame = kissutils.escape_special_codes(frame)
-            return kissutils.FEND + kissutils.DATA_FRAME + frame\
-                      + kissutils.FEND
+            return self._kissheader +\
+                    kissutils.escape_special_codes(self.text) +\
+                    kissutils.FEND
 
-    def decode_radio(self, frame):
+    def decode_radio(self, frame, view=False):
         """
         Parses and extracts the components of an AX25+KISS-Encoded Frame
+
+        Args:
+          * frame (bytes): the frame
+          * view (bool): if ``True``, the text is returned as a
+            ``memoryview`` on the decoded frame rather than a copy
         """
         # init
         source, destination, text = Byt(), Byt(), Byt()
@@ -89,23 +142,25 @@ class Frame(object):
             frame = kissutils.strip_df_start(frame)
             # recover special codes
             frame = kissutils.recover_special_codes(frame)
-        frameints = frame.ints()
-        frame_len = len(frameints)
-        if frame_len > 16:
-            for idx, char in enumerate(frameints):
-                # Is address field length correct?
-                # Find the first ODD Byte followed by the next boundary:
-                if (char & 0x01 and ((idx + 1) % 7) == 0):
-                    i = (idx + 1) // 7
-                    # Less than 2 callsigns? For frames <= 70 bytes
-                    if 1 < i < 11 and frame_len >= idx + 2:
-                        if (frameints[idx + 1] & 0x03 == 0x03 and
-                                frameints[idx + 2] in [0xf0, 0xcf]):
-                            text = frame[idx + 3:]
-                            destination = Callsign(frame[:7])
-                            source = Callsign(frame[7:])
-                            #self._extract_kiss_path(frame, i)
-                    return source, destination, text
+        frame_len = len(frame)
+        if frame_len <= 16:
+            return source, destination, text
+        # the address field ends with the first ODD byte on a 7-octets
+        # boundary, and is followed by the control and PID fields
+        octets = bytearray(frame[:7*MAXADDRESSES + 2])
+        for idx in range(6, min(frame_len, 7*(MAXADDRESSES + 1)), 7):
+            if not octets[idx] & 0x01:
+                continue
+            i = (idx + 1) // 7
+            # Less than 2 callsigns? For frames <= 70 bytes
+            if 1 < i <= MAXADDRESSES and frame_len >= idx + 3:
+                if (octets[idx + 1] & 0x03 == 0x03 and
+                        octets[idx + 2] in (0xf0, 0xcf)):
+                    text = memoryview(frame)[idx + 3:] if view\
+                                else Byt(frame[idx + 3:])
+                    destination = _get_callsign(frame[:7])
+                    source = _get_callsign(frame[7:14])
+            return source, destination, text
         return source, destination, text
 
 
@@ -26,6 +26,7 @@
 
 
 from byt import Byt
+from nanoutils.kisscodec import kiss_escape, kiss_unescape
 
 
 __all__ = ['escape_special_codes', 'valid_callsign', 'recover_special_codes',
@@ -64,7 +65,7 @@ def escape_special_codes(raw_codes):
     FESC is then sent as FESC, TFESC."
     - http://en.wikipedia.org/wiki/KISS_(TNC)#Description
     """
-    return raw_codes.replace(FESC, FESC_TFESC).replace(FEND, FESC_TFEND)
+    return kiss_escape(raw_codes)
 
 
 def valid_callsign(callsign):
@@ -125,16 +126,4 @@ def recover_special_codes(frame):
     replaced by FESC code and FESC_TFEND is replaced by FEND code."
     - http://en.wikipedia.org/wiki/KISS_(TNC)#Description
     """
-    res = Byt()
-    iteration = iter(range(len(frame)))
-    for idx in iteration:
-        if frame[idx:idx+2] == FESC_TFEND:
-            res += FEND
-            next(iteration)
-        elif frame[idx:idx+2] == FESC_TFESC:
-            res += FESC
-            next(iteration)
-        else:
-            res += frame[idx]
-    return res
-
+    return kiss_unescape(frame)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+from nanoctrl.kiss import frame
+from nanoctrl.kiss.frame import Frame
+
+
+# XYZ <- ABC-1, AX25 address, control and PID fields
+HEADER = b'\xb0\xb2\xb4\x40\x40\x40\x60' + b'\x82\x84\x86\x40\x40\x40\x63'\
+         + b'\x03\xf0'
+# XYZ <- ABC-1 via RELAY
+HEADERPATH = b'\xb0\xb2\xb4\x40\x40\x40\x60' + b'\x82\x84\x86\x40\x40\x40\x62'\
+             + b'\xa4\x8a\x98\x82\xb2\x40\x61' + b'\x03\xf0'
+TEXT = b'hi\xc0\xdb'
+
+
+def test_encode_known():
+    f = Frame(source='ABC-1', destination='XYZ', kiss=False)
+    assert bytes(f.encode_radio(TEXT)) == HEADER + TEXT
+    f = Frame(source='ABC-1', destination='XYZ', kiss=True)
+    assert bytes(f.encode_radio(TEXT)) == b'\xc0\x00' + HEADER\
+                                + b'hi\xdb\xdc\xdb\xdd' + b'\xc0'
+    f = Frame(source='ABC-1', destination='XYZ', path=['RELAY'], kiss=False)
+    assert bytes(f.encode_radio(TEXT)) == HEADERPATH + TEXT
+
+
+def test_decode_known():
+    for kiss in [False, True]:
+        f = Frame(source='ABC-1', destination='XYZ', kiss=kiss)
+        source, destination, text = f.decode_radio(f.encode_radio(TEXT))
+        assert str(source) == 'ABC' and source.ssid == Byt('1')
+        assert str(destination) == 'XYZ'
+        assert bytes(text) == TEXT
+    f = Frame(source='ABC-1', destination='XYZ', kiss=False)
+    source, destination, text = f.decode_radio(Byt(HEADERPATH + TEXT))
+    assert str(source) == 'ABC' and str(destination) == 'XYZ'
+    assert bytes(text) == TEXT
+
+
+def test_decode_view():
+    f = Frame(source='ABC-1', destination='XYZ', kiss=False)
+    source, destination, text = f.decode_radio(Byt(HEADER + TEXT), view=True)
+    assert isinstance(text, memoryview)
+    assert bytes(text) == TEXT
+    assert str(source) == 'ABC'
+
+
+def test_decode_boundary():
+    f = Frame(source='ABC-1', destination='XYZ', kiss=False)
+    # the first address ends the address field, too short
+    junk = HEADER[:6] + b'\x61' + HEADER[7:] + TEXT
+    assert f.decode_radio(Byt(junk)) == (Byt(), Byt(), Byt())
+    # no end of address field
+    junk = HEADER[:13] + b'\x62' + b'\x40' * 20
+    assert f.decode_radio(Byt(junk)) == (Byt(), Byt(), Byt())
+    # no UI control octet
+    junk = HEADER[:14] + b'\x00\xf0' + TEXT
+    assert f.decode_radio(Byt(junk)) == (Byt(), Byt(), Byt())
+    # frames up to 16 octets are dropped
+    assert f.decode_radio(Byt(HEADER)) == (Byt(), Byt(), Byt())
+
+
+def test_decode_ends_on_control():
+    f = Frame(source='ABC-1', destination='XYZ', kiss=False)
+    # nothing after the control octet
+    source, destination, text = f.decode_radio(Byt(HEADERPATH[:-1]))
+    assert text == Byt()
+    # nothing after the PID
+    source, destination, text = f.decode_radio(Byt(HEADERPATH))
+    assert str(source) == 'ABC' and bytes(text) == b''
+
+
+def test_caches_capped():
+    for i in range(frame.MAXHEADERS + 10):
+        Frame(source='ABC-{}'.format(i % 16), destination='X{}'.format(i),
+              kiss=False)
+        assert len(frame.HEADERS) <= frame.MAXHEADERS
+    f = Frame(source='ABC-1', destination='XYZ', kiss=False)
+    for i in range(frame.MAXCALLSIGNS + 10):
+        data = Frame(source='ABC', destination='X{}'.format(i),
+                     kiss=False).encode_radio(TEXT)
+        assert str(f.decode_radio(data)[1]) == 'X{}'.format(i)
+        assert len(frame.CALLSIGNS) <= frame.MAXCALLSIGNS
@@ -49,28 +49,102 @@ class Telemetry(object):
         Gets a telemetry from the database
         """
         # returns None if id not existing
-        ret = db.get_TM(dbid=dbid)
+        ret = db.get_TM_values(dbid=dbid)
         if ret is None:
             raise exc.NoSuchTM(dbid=dbid)
         else:
-            (self._telemetry, self.hd), (self._telemetry_hdx, self.hdx),\
-                (self._telemetry_data, self.data) = ret
-            # copy fields to object root, first with hdx in case of overiding
-            for k in self.hdx.keys():
-                setattr(self, k, getattr(self._telemetry_hdx, k))
-            for k in self.hd.keys():
-                setattr(self, k, getattr(self._telemetry, k))
+            self.hd, self.hdx, self.data = ret
+            # sqlalchemy objects are loaded when accessed
+            self._orm = None
+            self._set_fields()
+
+    @classmethod
+    def _fromSaved(cls, dbid, hd, hdx, data):
+        """
+        Builds the telemetry from the values it was just saved with,
+        without reading it back from the database. The sqlalchemy
+        objects are only loaded when accessed. The DB ids of the aux
+        and data rows are not included
+
+        Args:
+          * dbid (int): the DB id of the saved telemetry
+          * hd, hdx, data: the values given to ``db.save_TM_to_DB``
+        """
+        self = cls.__new__(cls)
+        self._orm = None
+        self.hd = dict(hd)
+        self.hd['id'] = int(dbid)
+        catnum = int(hd[param_ccsds.PACKETCATEGORY.name])
+        pldflag = int(hd[param_ccsds.PAYLOADFLAG.name])
+        cat = param_category.CATEGORIES[pldflag][catnum]
+        if cat.table_aux_name is None:
+            self.hdx = {}
+        else:
+            self.hdx = dict(hdx)
+            self.hdx['telemetry_packet'] = self.hd['id']
+        self.data = []
+        if cat.get_table_data_name(hdx=hdx) is None:
+            pass
+        elif catnum == param_category.TELECOMMANDANSWERCAT:
+            for k, v in db.orm.merge_data_listof(data['unpacked']).items():
+                self.data.append({k: v})
+        else:
+            unpacked = data['unpacked']
+            if not isinstance(unpacked, (list, tuple)):
+                unpacked = [unpacked]
+            trkeys = cat.get_trousseau_keys(hdx=hdx)
+            for item in unpacked:
+                raw, conv = db.orm.split_data_by_keys_conv(item, trkeys)
+                raw['telemetry_packet'] = self.hd['id']
+                self.data.append(raw)
+        self._set_fields()
+        return self
+
+    def _set_fields(self):
+        """
+        Copies fields to object root, first with hdx in case of
+        overiding
+        """
+        for k, v in self.hdx.items():
+            setattr(self, k, v)
+        for k, v in self.hd.items():
+            setattr(self, k, v)
+
+    def _load_orm(self):
+        """
+        Loads the sqlalchemy objects of the telemetry, if not already
+        done, returns them
+        """
+        if self._orm is None:
+            ret = db.get_TM(dbid=self.hd['id'])
+            if ret is None:
+                raise exc.NoSuchTM(dbid=self.hd['id'])
+            self._orm = (ret[0][0], ret[1][0], ret[2][0])
+        return self._orm
+
+    @property
+    def _telemetry(self):
+        return self._load_orm()[0]
+
+    @property
+    def _telemetry_hdx(self):
+        return self._load_orm()[1]
+
+    @property
+    def _telemetry_data(self):
+        return self._load_orm()[2]
 
     def __bool__(self):
         return int(getattr(self, 'hdx', {}).get(pcc.ERRORCODE.name, 0)) == 0
 
     __nonzero__ = __bool__
 
-    @classmethod
-    def _fromPacket(cls, packet, time_received=None, user_id=None, isKiss=False, **kwargs):
+    @staticmethod
+    def _decode(packet, time_received=None, user_id=None, isKiss=False,
+                **kwargs):
         """
-        Unpacks and stores the telemetry. Feeds ``hd``, ``hdx`` and
-        ``data`` attributes
+        Unpacks the telemetry and completes its headers, without
+        any access to the database. Returns ``hd``, ``hdx``, ``data``
 
         Args:
           * packet (str): the raw packet to unpack
@@ -79,30 +153,59 @@ class Telemetry(object):
         """
         if isKiss:
             s1, s2, packet = Framer.decode_radio(packet) # unpack kiss
-        cls.hd, cls.hdx, cls.data = TMUnPacker.unpack(packet)
-        cls.hd['raw_file'] = param_all.RAWPACKETFOLDER
-        cls.hd['user_id'] = param_all.RECEIVERID if user_id is None\
+        hd, hdx, data = TMUnPacker.unpack(packet)
+        hd['raw_file'] = param_all.RAWPACKETFOLDER
+        hd['user_id'] = param_all.RECEIVERID if user_id is None\
                                     else int(user_id)
-        cls.hd['time_received'] = time_received\
+        hd['time_received'] = time_received\
                 if isinstance(time_received, datetime)\
                 else fcts.now()
-        catnum = int(cls.hd[param_ccsds.PACKETCATEGORY.name])
+        return hd, hdx, data
+
+    @staticmethod
+    def _link_TC(hd, hdx):
+        """
+        Finds the DB id of the TC the telemetry is replying to, if any,
+        and stores it in the ``hdx`` under ``telecommand_packet``.
+        Returns the TC DB id or None
+
+        Args:
+          * hd, hdx (dict): the headers of the telemetry
+        """
+        catnum = int(hd[param_ccsds.PACKETCATEGORY.name])
         # if it is a RACK, update the TM after checking the TC
         if catnum == int(param_category.RACKCAT):
             tcid = db.get_RACK_TCid()
-            cls.hdx['telecommand_packet'] = tcid
+            hdx['telecommand_packet'] = tcid
         # elif it is a FACK or EACK
-        elif (int(cls.hd[param_ccsds.PAYLOADFLAG.name]), catnum)\
+        elif (int(hd[param_ccsds.PAYLOADFLAG.name]), catnum)\
                                         in param_category.ACKCATEGORIES:
-            tcid = db.get_ACK_TCid(pkid=cls.hdx[pcc.PACKETIDMIRROR.name])
-            cls.hdx['telecommand_packet'] = tcid
+            tcid = db.get_ACK_TCid(pkid=hdx[pcc.PACKETIDMIRROR.name])
+            hdx['telecommand_packet'] = tcid
         elif catnum == param_category.TELECOMMANDANSWERCAT:
-            tcid = db.get_tcanswer_TCid(pkid=cls.hdx[pcc.PACKETIDMIRROR.name])
-            cls.hdx['telecommand_packet'] = tcid
+            tcid = db.get_tcanswer_TCid(pkid=hdx[pcc.PACKETIDMIRROR.name])
+            hdx['telecommand_packet'] = tcid
         # some TM are replying but are not registered as ACK or TCANSWER
         # categories. This is a design flaw which is not covered
         else:
             tcid = None
-        cls.tcid = tcid
-        dbid = db.save_TM_to_DB(cls.hd, cls.hdx, cls.data)
-        return cls(dbid=dbid)
+        return tcid
+
+    @classmethod
+    def _fromPacket(cls, packet, time_received=None, user_id=None, isKiss=False, **kwargs):
+        """
+        Unpacks and stores the telemetry. Feeds ``hd``, ``hdx`` and
+        ``data`` attributes
+
+        Args:
+          * packet (str): the raw packet to unpack
+          * time_received (datetime+tz): the reception time of the packet
+          * user_id (int): the user id
+        """
+        hd, hdx, data = cls._decode(packet, time_received=time_received,
+                                    user_id=user_id, isKiss=isKiss)
+        tcid = cls._link_TC(hd, hdx)
+        dbid = db.save_TM_to_DB(hd, hdx, data)
+        self = cls._fromSaved(dbid, hd, hdx, data)
+        self.tcid = tcid
+        return self
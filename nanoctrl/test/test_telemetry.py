@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from sqlalchemy import create_engine, event, MetaData, Table, Column
+from sqlalchemy import Integer, String, DateTime, ForeignKey
+from nanoparam import param_ccsds
+from nanoparam.categories import param_category
+from nanoctrl.db import orm
+from nanoctrl.telemetry import Telemetry
+
+
+class Key(object):
+    def __init__(self, name):
+        self.name = name
+        self.unram = None
+
+
+class Category(object):
+    number = 7
+    table_aux_name = 'tmcat_hk'
+    data_trousseau = object()
+    is_data_metatr = False
+    _thatsTCANS = False
+
+    def get_table_data_name(self, hdx):
+        return 'tmcat_hk_data'
+
+    def get_table_data_conv_name(self, hdx):
+        return None
+
+    def get_trousseau_keys(self, hdx):
+        return [Key('volt'), Key('temp')]
+
+
+SAVED = {}
+STATEMENTS = []
+
+
+def _decode(packet, **kwargs):
+    hd = {param_ccsds.PACKETCATEGORY.name: 7,
+          param_ccsds.PAYLOADFLAG.name: 0,
+          'days_since_ref': 10, 'ms_since_today': 1000}
+    hdx = {'mode': 1}
+    data = {'unpacked': [{'volt': 3, 'temp': 'hot'},
+                         {'volt': 4, 'temp': 'cold'}]}
+    return hd, hdx, data
+
+
+def _naive(dic):
+    # sqlite drops the time zones
+    return dict((k, v.replace(tzinfo=None) if hasattr(v, 'tzinfo') else v)
+                for k, v in dic.items())
+
+
+def setup_module():
+    for key in ['running', 'ENGINE', 'METADATA', 'COLUMNS', 'DESCRIPTORS',
+                '_next_ids']:
+        SAVED[key] = getattr(orm, key)
+    SAVED['_decode'] = Telemetry.__dict__['_decode']
+    SAVED['_link_TC'] = Telemetry.__dict__['_link_TC']
+    SAVED['category'] = param_category.CATEGORIES[0].get(7)
+    md = MetaData()
+    Table('telemetries', md, Column('id', Integer, primary_key=True),
+          Column(param_ccsds.PACKETCATEGORY.name, Integer),
+          Column(param_ccsds.PAYLOADFLAG.name, Integer),
+          Column('days_since_ref', Integer),
+          Column('ms_since_today', Integer),
+          Column('time_sent', DateTime),
+          Column('time_saved', DateTime))
+    Table('tmcat_hk', md, Column('id', Integer, primary_key=True),
+          Column('telemetry_packet', ForeignKey('telemetries.id')),
+          Column('mode', Integer))
+    Table('tmcat_hk_data', md, Column('id', Integer, primary_key=True),
+          Column('telemetry_packet', ForeignKey('telemetries.id')),
+          Column('volt', Integer), Column('temp', String))
+    engine = create_engine('sqlite://')
+    md.create_all(engine)
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args:\
+                        STATEMENTS.append(statement.split()[0].upper()))
+    cat = Category()
+    param_category.CATEGORIES[0][7] = cat
+    orm.ENGINE = engine
+    orm.METADATA = md
+    orm.COLUMNS = {}
+    orm.DESCRIPTORS = {(0, 7): orm.get_category_descriptor(cat)}
+    # no sequences in sqlite
+    orm._next_ids = lambda conn, tblnm, n: list(range(42, 42 + n))
+    orm.running = True
+    Telemetry._decode = staticmethod(_decode)
+    Telemetry._link_TC = staticmethod(lambda hd, hdx: None)
+
+
+def teardown_module():
+    orm.ENGINE.dispose()
+    Telemetry._decode = SAVED.pop('_decode')
+    Telemetry._link_TC = SAVED.pop('_link_TC')
+    cat = SAVED.pop('category')
+    if cat is None:
+        del param_category.CATEGORIES[0][7]
+    else:
+        param_category.CATEGORIES[0][7] = cat
+    for key, value in SAVED.items():
+        setattr(orm, key, value)
+
+
+def test_telemetry_from_packet():
+    del STATEMENTS[:]
+    tm = Telemetry._fromPacket('packet')
+    # saved without reading it back
+    assert len(STATEMENTS) > 0
+    assert 'SELECT' not in STATEMENTS
+    assert tm.hd['id'] == 42 and tm.id == 42
+    assert tm.mode == 1
+    assert tm.tcid is None
+    assert [item['temp'] for item in tm.data] == ['hot', 'cold']
+    # same values as loaded from the DB, but the ids of aux and data rows
+    ref = Telemetry(dbid=42)
+    assert _naive(tm.hd) == ref.hd
+    ref.hdx.pop('id')
+    assert tm.hdx == ref.hdx
+    for item in ref.data:
+        item.pop('id')
+    assert tm.data == ref.data
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from nanoctrl import tmwriter
+from nanoctrl.tmwriter import TMWriter
+from nanoctrl.telemetry import Telemetry
+
+
+SAVED = {}
+DBIDS = [0]
+
+
+def _decode(packet, **kwargs):
+    return {'packet': packet}, {}, {}
+
+
+def _save_TMs_to_DB(packets):
+    # packet 'bad' cannot be saved, which fails the whole batch
+    if any(hd['packet'] == 'bad' for hd, hdx, data in packets):
+        raise ValueError('bad')
+    res = list(range(DBIDS[0] + 1, DBIDS[0] + 1 + len(packets)))
+    DBIDS[0] += len(packets)
+    return res
+
+
+def _save_TM_to_DB(hd, hdx, data):
+    return _save_TMs_to_DB([(hd, hdx, data)])[0]
+
+
+def setup_module():
+    SAVED['_decode'] = Telemetry.__dict__['_decode']
+    SAVED['_link_TC'] = Telemetry.__dict__['_link_TC']
+    SAVED['save_TMs_to_DB'] = tmwriter.db.save_TMs_to_DB
+    SAVED['save_TM_to_DB'] = tmwriter.db.save_TM_to_DB
+    Telemetry._decode = staticmethod(_decode)
+    Telemetry._link_TC = staticmethod(lambda hd, hdx: None)
+    tmwriter.db.save_TMs_to_DB = _save_TMs_to_DB
+    tmwriter.db.save_TM_to_DB = _save_TM_to_DB
+
+
+def teardown_module():
+    Telemetry._decode = SAVED.pop('_decode')
+    Telemetry._link_TC = SAVED.pop('_link_TC')
+    tmwriter.db.save_TMs_to_DB = SAVED.pop('save_TMs_to_DB')
+    tmwriter.db.save_TM_to_DB = SAVED.pop('save_TM_to_DB')
+
+
+def test_writer_batches():
+    saved = []
+    flushed = []
+    writer = TMWriter(batchsize=3, flushtime=0.05,
+                      whenSaved=lambda dbid, name: saved.append(name),
+                      whenFlushed=flushed.append)
+    for i in range(7):
+        writer.put('p{}'.format(i), name=i)
+    writer.close()
+    assert saved == list(range(7))
+    assert len(flushed) == 3
+    stats = writer.stats()
+    assert stats['saved'] == 7 and stats['batches'] == 3
+
+
+def test_writer_callback_errors():
+    saved = []
+    failed = []
+
+    def when_saved(dbid, name):
+        if name == 2:
+            raise KeyError(name)
+        saved.append(name)
+
+    def when_failed(error, name):
+        failed.append((type(error), name))
+        raise RuntimeError("reporting is down")
+
+    def when_flushed(stats):
+        raise RuntimeError("reporting is down")
+
+    writer = TMWriter(batchsize=2, flushtime=0.05, whenSaved=when_saved,
+                      whenFailed=when_failed, whenFlushed=when_flushed)
+    for i, packet in enumerate(['p0', 'bad', 'p2', 'p3', 'p4', 'p5']):
+        writer.put(packet, name=i)
+    writer.close()
+    # the callbacks raising do not stop the next batches
+    assert saved == [0, 3, 4, 5]
+    assert failed == [(ValueError, 1), (KeyError, 2)]
+    stats = writer.stats()
+    assert stats['saved'] == 4 and stats['failed'] == 2
+    assert stats['batches'] == 3
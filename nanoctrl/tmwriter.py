@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import sys
+import time
+import traceback
+from threading import Thread, Lock
+try:
+    import Queue as queue
+except:
+    import queue
+from nanoutils import param_sys
+
+
+from . import db
+from .telemetry import Telemetry
+
+
+__all__ = ['TMWriter']
+
+
+# tells the writer thread to flush and stop
+_STOP = object()
+
+
+class TMWriter(object):
+    def __init__(self, maxsize=None, batchsize=None, flushtime=None,
+                    whenSaved=None, whenFailed=None, whenFlushed=None):
+        """
+        A write-behind queue saving telemetries to the database from
+        a dedicated thread. The packets are committed in batches of
+        up to ``batchsize``, at the latest ``flushtime`` seconds after
+        the oldest pending packet was queued
+
+        Args:
+          * maxsize (int): the max number of pending packets, ``put``
+            blocks when reached, default ``param_sys.SAVEQUEUEMAXSIZE``
+          * batchsize (int): the max number of packets per commit,
+            default ``param_sys.SAVEQUEUEBATCH``
+          * flushtime (float): the max time in seconds a packet waits
+            in the queue, default ``param_sys.SAVEQUEUEFLUSH``
+          * whenSaved (callable): called as ``whenSaved(dbid, **kwargs)``
+            for each saved packet, with the kwargs given to ``put``
+          * whenFailed (callable): called as
+            ``whenFailed(error, **kwargs)`` for each packet that could
+            not be saved
+          * whenFlushed (callable): called with the ``stats`` after
+            each batch
+
+        An error raised by ``whenSaved`` is handed over to
+        ``whenFailed``, those raised by ``whenFailed`` and
+        ``whenFlushed`` are printed on stderr and do not stop the writer
+        """
+        self.maxsize = int(param_sys.SAVEQUEUEMAXSIZE if maxsize is None
+                            else maxsize)
+        self.batchsize = max(1, int(param_sys.SAVEQUEUEBATCH
+                                    if batchsize is None else batchsize))
+        self.flushtime = float(param_sys.SAVEQUEUEFLUSH if flushtime is None
+                                else flushtime)
+        self.whenSaved = whenSaved if callable(whenSaved) else None
+        self.whenFailed = whenFailed if callable(whenFailed) else None
+        self.whenFlushed = whenFlushed if callable(whenFlushed) else None
+        self._queue = queue.Queue(maxsize=self.maxsize)
+        self._lock = Lock()
+        self._stats = {'saved': 0, 'failed': 0, 'batches': 0,
+                        'latency': 0., 'maxlatency': 0., 'maxdepth': 0}
+        self.running = True
+        self._thread = Thread(target=self._loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, packet, time_received=None, user_id=None, isKiss=False,
+                **kwargs):
+        """
+        Unpacks the telemetry and queues it for saving. Blocks if the
+        queue is full
+
+        Args:
+          * packet (str): the raw packet to unpack
+          * time_received (datetime+tz): the reception time of the packet
+          * user_id (int): the user id
+
+        Kwargs:
+          * passed on to ``whenSaved`` or ``whenFailed``
+        """
+        hd, hdx, data = Telemetry._decode(packet,
+                                          time_received=time_received,
+                                          user_id=user_id, isKiss=isKiss)
+        self._queue.put((hd, hdx, data, kwargs, time.time()))
+        depth = self._queue.qsize()
+        with self._lock:
+            self._stats['maxdepth'] = max(self._stats['maxdepth'], depth)
+
+    @property
+    def depth(self):
+        """
+        The number of packets waiting in the queue
+        """
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Returns a dictionary with the queue ``depth`` and ``maxdepth``,
+        the number of packets ``saved`` and ``failed``, the number of
+        ``batches`` and the mean and max ``latency`` in ms between
+        queueing and commit of the last batch
+        """
+        with self._lock:
+            res = dict(self._stats)
+        res['depth'] = self.depth
+        return res
+
+    def close(self):
+        """
+        Saves the pending packets and stops the writer thread
+        """
+        if not self.running:
+            return
+        self.running = False
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _loop(self):
+        """
+        The writer thread: gathers the packets into batches and saves
+        them
+        """
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            doneat = item[-1] + self.flushtime
+            while len(batch) < self.batchsize:
+                try:
+                    item = self._queue.get(
+                                    timeout=max(0, doneat - time.time()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        """
+        Saves a batch of packets in a single transaction, falls back
+        to one transaction per packet if it fails
+        """
+        try:
+            for hd, hdx, data, kwargs, t in batch:
+                Telemetry._link_TC(hd, hdx)
+            dbids = db.save_TMs_to_DB([item[:3] for item in batch])
+        except Exception:
+            dbids = []
+            for hd, hdx, data, kwargs, t in batch:
+                try:
+                    Telemetry._link_TC(hd, hdx)
+                    dbids.append(db.save_TM_to_DB(hd, hdx, data))
+                except Exception as e:
+                    dbids.append(e)
+        now = time.time()
+        latencies = [(now - item[-1]) * 1000 for item in batch]
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['latency'] = round(sum(latencies)/len(latencies), 1)
+            self._stats['maxlatency'] = round(max(latencies), 1)
+        for dbid, (hd, hdx, data, kwargs, t) in zip(dbids, batch):
+            if not isinstance(dbid, Exception):
+                try:
+                    if self.whenSaved is not None:
+                        self.whenSaved(dbid, **kwargs)
+                    self._count('saved')
+                    continue
+                except Exception as e:
+                    dbid = e
+            self._count('failed')
+            self._failed(dbid, kwargs)
+        self._flushed()
+
+    def _failed(self, error, kwargs):
+        """
+        Hands over a packet not saved to ``whenFailed``, an error raised
+        there cannot be handed over and is printed on stderr
+        """
+        if self.whenFailed is None:
+            return
+        try:
+            self.whenFailed(error, **kwargs)
+        except Exception:
+            sys.stderr.write("Exception in TMWriter.whenFailed:\n")
+            traceback.print_exc()
+
+    def _flushed(self):
+        """
+        Hands over the stats to ``whenFlushed``, an error raised there
+        is printed on stderr
+        """
+        if self.whenFlushed is None:
+            return
+        try:
+            self.whenFlushed(self.stats())
+        except Exception:
+            sys.stderr.write("Exception in TMWriter.whenFlushed:\n")
+            traceback.print_exc()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
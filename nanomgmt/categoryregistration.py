@@ -26,6 +26,7 @@
 
 
 from nanoparam.categories import param_category
+from nanoparam.categories import param_category_common as pcc
 from nanoutils.ccsds.ccsdstrousseau import CCSDSTrousseau
 
 
@@ -63,6 +64,10 @@ ALTER TABLE {table_name} ADD FOREIGN KEY (rawdata_id) REFERENCES {table_daddy_na
 GRANT ALL ON SEQUENCE {table_name}_id_seq TO picsat_edit;
 """
 
+QUERYINDEX = """
+CREATE INDEX IF NOT EXISTS {table_name}_{column_name}_idx ON {table_name} ({columns});
+"""
+
 # syntax: 'type tag in function': 'sql type'
 # or 'type tag in function': [len limit (int),
 #                             'sql type if len <= than len limit',
@@ -152,6 +157,13 @@ def base_create_table(cat):
         ret.append(QUERY.format(table_name=cat.table_aux_name,
                                 unique=" UNIQUE",
                                 fields=fields))
+        # to look up the answers of a TC
+        auxkeys = [item.name for item in cat.aux_trousseau.keys]
+        if pcc.PACKETIDMIRROR.name in auxkeys and\
+                pcc.TELECOMMANDIDMIRROR.name in auxkeys:
+            ret.append(index_query(cat.table_aux_name,
+                                   [pcc.PACKETIDMIRROR.name,
+                                    pcc.TELECOMMANDIDMIRROR.name]))
     # DATA FIELD
     if cat.data_trousseau is None:
         return "\n\n".join(ret)
@@ -164,6 +176,8 @@ def base_create_table(cat):
         ret.append(QUERY.format(table_name=cat.get_table_data_name({}),
                                 unique="",
                                 fields=fields))
+        ret.append(index_query(cat.get_table_data_name({}),
+                               ['telemetry_packet']))
         # a conversion table
         if cat.data_trousseau.unram_any:
             fields = ""
@@ -175,6 +189,8 @@ def base_create_table(cat):
                         table_name=cat.get_table_data_conv_name({}),
                         table_daddy_name=cat.get_table_data_name({}),
                         fields=fields))
+            ret.append(index_query(cat.get_table_data_conv_name({}),
+                                   ['rawdata_id']))
     else:
         metakey = cat.data_trousseau.key
         for trkey, tr in cat.data_trousseau.TROUSSEAUDIC.items():
@@ -187,6 +203,9 @@ def base_create_table(cat):
                         table_name=cat.get_table_data_name({metakey: trkey}),
                         unique="",
                         fields=fields))
+            ret.append(index_query(
+                        cat.get_table_data_name({metakey: trkey}),
+                        ['telemetry_packet']))
             # a conversion table
             if tr.unram_any:
                 fields = ""
@@ -200,10 +219,23 @@ def base_create_table(cat):
                             table_daddy_name=cat.get_table_data_name(\
                                                             {metakey: trkey}),
                             fields=fields))
+                ret.append(index_query(
+                            cat.get_table_data_conv_name({metakey: trkey}),
+                            ['rawdata_id']))
     return "\n\n".join(ret)
 
 
 
+def index_query(table_name, columns):
+    """
+    Provides postgresql code to create the index of the columns
+    of the table
+    """
+    return QUERYINDEX.format(table_name=table_name,
+                             column_name="_".join(columns),
+                             columns=", ".join(columns))
+
+
 def get_type_right(item):
     for k, v in TYPESCONV.items():
         if item._fctunpack.__name__.endswith(k):
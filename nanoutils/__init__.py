@@ -32,11 +32,19 @@ PYTHON3 = sys.version_info > (3,)
 
 from . import ctrlexception
 from . import bincore
+from .archiver import Archiver
 from .bindiff import Bindiff
+from .bitfield import BitField
+from .crc import CRC32, PayloadCRC32
+from .kisscodec import KISSDeframer
 from .ms import Ms
+from .orderedpool import OrderedPool
+from .packetid import PacketIDAllocator
 from . import param_sys
 from .pidwatchdog import PIDWatchDog
 from .posixutc import PosixUTC
+from .rawstore import RawStore
+from .reassembler import FlowReassembler
 from .report import REPORTS, REPORTSDATA, EXTRADISPKEY
 from .unit import O, b
 
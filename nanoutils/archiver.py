@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import os
+import time
+import tarfile
+import tempfile
+import posixpath
+from collections import OrderedDict
+from threading import Thread, Lock
+try:
+    import Queue as queue
+except:
+    import queue
+
+
+from . import param_sys
+
+
+__all__ = ['Archiver']
+
+
+# tells the archiver thread to flush and stop
+_STOP = object()
+
+
+class Archiver(object):
+    def __init__(self, connect, remotepath, batchsize=None, flushtime=None,
+                    bundle=False, nchannels=None, retrywait=None,
+                    maxretry=None, whenArchived=None, whenFailed=None):
+        """
+        Uploads files to a SFTP server from a dedicated thread, in
+        batches grouped by remote folder. The files of a folder are
+        uploaded in parallel over several SFTP channels of the same
+        connection. The remote folders known to exist are cached, and
+        the connection is re-opened on failure
+
+        Args:
+          * connect (callable): called without argument, returns the
+            ``(ssh, sftp)`` pair of a new connection, ``ssh`` may be
+            ``None``
+          * remotepath (callable): called as ``remotepath(t)``, returns
+            the absolute remote folder of the files queued with time
+            ``t``
+          * batchsize (int): the max number of items per batch, default
+            ``param_sys.ARCHIVEBATCH``
+          * flushtime (float): the max time in seconds an item waits
+            in the queue, default ``param_sys.ARCHIVEFLUSH``
+          * bundle (bool): if ``True``, the files of a batch going to the
+            same folder are uploaded as a single tar
+          * nchannels (int): the max number of SFTP channels the files
+            are uploaded over in parallel, default
+            ``param_sys.ARCHIVECHANNELS``
+          * retrywait (float): the time in seconds before reconnecting
+            after a failure, doubled at each retry, default
+            ``param_sys.ARCHIVERETRYWAIT``
+          * maxretry (int): the number of retries of a batch before
+            giving up, default ``param_sys.ARCHIVEMAXRETRY``
+          * whenArchived (callable): called as ``whenArchived(**kwargs)``
+            for each item uploaded, with the kwargs given to ``put``
+          * whenFailed (callable): called as
+            ``whenFailed(error, **kwargs)`` for each item given up
+        """
+        self.connect = connect
+        self.remotepath = remotepath
+        self.batchsize = max(1, int(param_sys.ARCHIVEBATCH
+                                    if batchsize is None else batchsize))
+        self.flushtime = float(param_sys.ARCHIVEFLUSH if flushtime is None
+                               else flushtime)
+        self.bundle = bool(bundle)
+        self.nchannels = max(1, int(param_sys.ARCHIVECHANNELS
+                                    if nchannels is None else nchannels))
+        self.retrywait = float(param_sys.ARCHIVERETRYWAIT
+                               if retrywait is None else retrywait)
+        self.maxretry = int(param_sys.ARCHIVEMAXRETRY if maxretry is None
+                            else maxretry)
+        self.whenArchived = whenArchived if callable(whenArchived) else None
+        self.whenFailed = whenFailed if callable(whenFailed) else None
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self._server = None
+        self._channels = []
+        self._folders = set()
+        self._stats = {'archived': 0, 'failed': 0, 'batches': 0,
+                       'reconnections': 0}
+        self.running = True
+        self._thread = Thread(target=self._loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, paths, t, **kwargs):
+        """
+        Queues local files for upload
+
+        Args:
+          * paths (list of str): the local files to upload together
+          * t (datetime): the time giving the remote folder
+
+        Kwargs:
+          * passed on to ``whenArchived`` or ``whenFailed``
+        """
+        self._queue.put((list(paths), t, kwargs, time.time()))
+
+    @property
+    def depth(self):
+        """
+        The number of items waiting in the queue
+        """
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Returns a dictionary with the queue ``depth``, the number of
+        items ``archived`` and ``failed``, the number of ``batches`` and
+        of ``reconnections``
+        """
+        with self._lock:
+            res = dict(self._stats)
+        res['depth'] = self.depth
+        return res
+
+    def close(self):
+        """
+        Uploads the pending items, stops the archiver thread and closes
+        the connection
+        """
+        if not self.running:
+            return
+        self.running = False
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._disconnect()
+
+    def _loop(self):
+        """
+        The archiver thread: gathers the items into batches and uploads
+        them
+        """
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            doneat = item[-1] + self.flushtime
+            while len(batch) < self.batchsize:
+                try:
+                    item = self._queue.get(
+                                    timeout=max(0, doneat - time.time()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        """
+        Uploads a batch, folder by folder, reconnecting and retrying
+        on failure
+        """
+        groups = OrderedDict()
+        for item in batch:
+            try:
+                folder = self.remotepath(item[1])
+            except Exception as e:
+                self._handover([item], e)
+                continue
+            groups.setdefault(folder, []).append(item)
+        for folder, items in groups.items():
+            error = None
+            for retry in range(self.maxretry + 1):
+                if retry > 0:
+                    time.sleep(self.retrywait * 2**(retry - 1))
+                try:
+                    self._upload(folder, items)
+                    error = None
+                    break
+                except Exception as e:
+                    error = e
+                    self._disconnect()
+            self._handover(items, error)
+        self._count('batches')
+
+    def _handover(self, items, error):
+        """
+        Hands the ``items`` over to ``whenArchived``, or to
+        ``whenFailed`` if ``error`` is not None
+        """
+        for paths, t, kwargs, qt in items:
+            if error is None:
+                self._count('archived')
+                if self.whenArchived is not None:
+                    self.whenArchived(**kwargs)
+            else:
+                self._count('failed')
+                if self.whenFailed is not None:
+                    self.whenFailed(error, **kwargs)
+
+    def _upload(self, folder, items):
+        """
+        Uploads the files of ``items`` to the remote ``folder``
+        """
+        sftp = self._connection()
+        self._makedirs(sftp, folder)
+        paths = [path for item in items for path in item[0]]
+        if not self.bundle:
+            self._putall(sftp, [(path, posixpath.join(folder,
+                                                      os.path.basename(path)))
+                                for path in paths])
+            return
+        name = os.path.basename(paths[0])
+        name = os.path.splitext(name)[0] + '+{}.tar'.format(len(paths))
+        f = tempfile.TemporaryFile()
+        try:
+            tar = tarfile.open(fileobj=f, mode='w')
+            for path in paths:
+                tar.add(path, arcname=os.path.basename(path))
+            tar.close()
+            f.seek(0)
+            sftp.putfo(f, posixpath.join(folder, name))
+        finally:
+            f.close()
+
+    def _putall(self, sftp, files):
+        """
+        Uploads the ``(localpath, remotepath)`` files, spread over up to
+        ``nchannels`` SFTP channels uploading in parallel
+        """
+        clients = [sftp] + self._extra_channels(sftp,
+                                        min(self.nchannels, len(files)) - 1)
+        if len(clients) == 1:
+            for localpath, remotepath in files:
+                sftp.put(localpath, remotepath)
+            return
+        errors = []
+        def put(client, share):
+            try:
+                for localpath, remotepath in share:
+                    client.put(localpath, remotepath)
+            except Exception as e:
+                errors.append(e)
+        threads = [Thread(target=put, args=(client, files[i::len(clients)]))
+                   for i, client in enumerate(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if len(errors) > 0:
+            raise errors[0]
+
+    def _extra_channels(self, sftp, n):
+        """
+        Returns ``n`` more SFTP clients on the connection of ``sftp``,
+        opens them if needed. Returns less if the server refuses more
+        channels
+        """
+        while len(self._channels) < n:
+            try:
+                transport = sftp.get_channel().get_transport()
+                self._channels.append(transport.open_sftp_client())
+            except Exception:
+                break
+        return self._channels[:n]
+
+    def _connection(self):
+        """
+        Returns the sftp client, connects if needed
+        """
+        if self._server is None:
+            self._server = self.connect()
+            self._folders = set()
+            self._count('reconnections')
+        return self._server[1]
+
+    def _disconnect(self):
+        """
+        Closes the connection, ignoring errors of a broken one
+        """
+        if self._server is None:
+            return
+        for item in self._channels + list(self._server[::-1]):
+            if item is None:
+                continue
+            try:
+                item.close()
+            except Exception:
+                pass
+        self._server = None
+        self._channels = []
+        self._folders = set()
+
+    def _makedirs(self, sftp, folder):
+        """
+        Creates the remote ``folder`` and its parents if missing, only
+        checks the folders not already known to exist
+        """
+        if folder in self._folders:
+            return
+        parent = posixpath.dirname(folder.rstrip('/'))
+        if parent not in ('', '/') and parent != folder:
+            self._makedirs(sftp, parent)
+        try:
+            sftp.stat(folder)
+        except IOError:
+            sftp.mkdir(folder)
+        self._folders.add(folder)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
@@ -295,6 +295,19 @@ def hex2int(h, **kwargs):
         h = h[::-1]
     return int(binascii.hexlify(Byt(h)), 16)
 
+def buffer2int(buf, **kwargs):
+    """
+    Give a buffer ``buf`` (memoryview, bytes), returns int as
+    ``hex2int`` does, without copying the buffer
+    """
+    litFucInd = kwargs.get('litFucInd', TWINKLETWINKLELITTLEINDIA)
+    if hasattr(int, 'from_bytes'):
+        return int.from_bytes(buf, 'little' if litFucInd else 'big')
+    h = binascii.hexlify(buf)
+    if litFucInd:
+        h = ''.join(h[i-2:i] for i in range(len(h), 0, -2))
+    return int(h, 16) if len(h) > 0 else 0
+
 def hex2intSign(h, **kwargs):
     """
     Give hex ``h`` as chars '\xf0', returns signed int
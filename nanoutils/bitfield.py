@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from . import bincore
+
+
+__all__ = ['BitField']
+
+
+class BitField(object):
+    def __init__(self, start, l, size):
+        """
+        A field of bits inside a chain of octets, extracted from and
+        inserted into the integer value of the chain with precomputed
+        shifts and masks, instead of strings of '0' and '1'.
+        Follows the ``TWINKLETWINKLELITTLEINDIA`` endianness the same
+        way ``hex2bin``/``bin2int`` do
+
+        Args:
+        * start (int): the start-position of the field in bits
+        * l (int): the length of the field in bits
+        * size (int): the length of the chain of octets
+        """
+        self.start = int(start)
+        self.len = int(l)
+        self.size = int(size)
+        self.mask = (1 << self.len) - 1
+        self._half = 1 << (self.len - 1)
+        # big endian: first bit of the chain is the most significant one
+        self._shift_big = self.size*8 - self.start - self.len
+        # little endian: first bit of the chain is the least significant one
+        self._shift_lit = self.start
+
+    def __repr__(self):
+        return "<{}-->{}>[{}]".format(self.start, self.start + self.len,
+                                      self.size)
+
+    __str__ = __repr__
+
+    @property
+    def shift(self):
+        """
+        The shift of the field in the integer value of the chain
+        """
+        if bincore.TWINKLETWINKLELITTLEINDIA:
+            return self._shift_lit
+        else:
+            return self._shift_big
+
+    def extract(self, word):
+        """
+        Returns the unsigned value of the field, given the integer
+        value ``word`` of the chain of octets
+        """
+        return (word >> self.shift) & self.mask
+
+    def insert(self, word, value):
+        """
+        Returns the integer value ``word`` of the chain of octets in
+        which the field is replaced by ``value``
+        """
+        shift = self.shift
+        return (word & ~(self.mask << shift)) | ((value & self.mask) << shift)
+
+    def unpack(self, chunk):
+        """
+        Returns the unsigned value of the field in the chain of octets
+        ``chunk``, equivalent to ``bin2int`` of its bits
+        """
+        return self.extract(bincore.hex2int(chunk))
+
+    def unpack_signed(self, chunk):
+        """
+        Returns the signed value of the field in the chain of octets
+        ``chunk``, equivalent to ``bin2intSign`` of its bits
+        """
+        return self.signed(self.unpack(chunk))
+
+    def signed(self, value):
+        """
+        Returns the signed value of the unsigned ``value`` of the field
+        """
+        # bin2intSign reads a single bit as unsigned
+        if self.len == 1 or value < self._half:
+            return value
+        return value - (self._half << 1)
+
+    def pack(self, chunk, value):
+        """
+        Returns the chain of octets ``chunk`` in which the field is
+        replaced by ``value``
+        """
+        word = self.insert(bincore.hex2int(chunk), value)
+        return bincore.int2hex(word, pad=self.size)
+
+    def tobin(self, value):
+        """
+        Returns the bits of the unsigned ``value`` of the field, most
+        significant first, for the converters defined on bits
+        """
+        return "{:0>{pad}}".format(bin(value)[2:], pad=self.len)
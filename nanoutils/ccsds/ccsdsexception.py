@@ -243,3 +243,12 @@ class WrongAt(CCSDSException):
     def __init__(self, at, *args, **kwargs):
         self._init(at, *args, **kwargs)
         self.message = "Delay paramter at '{}' is not valid".format(at)
+
+
+class NumpyMissing(CCSDSException):
+    """
+    If numpy is required but not installed
+    """
+    def __init__(self, what='unpack columns', *args, **kwargs):
+        self._init(what, *args, **kwargs)
+        self.message = "Numpy is required to {}".format(what)
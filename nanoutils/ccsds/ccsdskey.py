@@ -27,12 +27,14 @@
 
 import math
 import re
+from byt import Byt
 
 
 from nanoutils import bincore
 from nanoutils import fcts
 from nanoutils import b
 from nanoutils import O
+from nanoutils import BitField
 
 
 from . import ccsdsexception as exc
@@ -55,6 +57,19 @@ TYP = { 'sint': 'intSign',  # signed integer
       }
 
 
+# struct codes of the octet-aligned keys that struct decodes natively,
+# indexed by (unpack type, length in octets)
+STRUCTTYP = { ('int', 1): 'B',
+              ('int', 2): 'H',
+              ('int', 4): 'I',
+              ('int', 8): 'Q',
+              ('intSign', 1): 'b',
+              ('intSign', 2): 'h',
+              ('intSign', 4): 'i',
+              ('intSign', 8): 'q'
+            }
+
+
 class CCSDSKey(object):
     def __init__(self, name, start, l, dic=None, typ=None, fctfix=None,
                  disp=None, verbose="", fctunram=None, fctram=None,
@@ -148,6 +163,16 @@ class CCSDSKey(object):
             self._fctpack = getattr(bincore,
                                       '{}2{}'.format(TYP[self.typ], conv))
         self.dic_force = dic_force
+        # bit-field engine on the chunk of octets holding the key
+        self._bitfield = BitField(start=self.start%8, l=self.len,
+                                  size=self._hex_slice.stop\
+                                        - self._hex_slice.start)
+        # whether the key can be unpacked from the integer value of
+        # its bits, else it needs the octets
+        self._bitdec = (not self.octets) or (not self.isdic and\
+                                    TYP[self.typ] in ['int', 'intSign'])
+        # cache of the dic reverse-search, indexed by integer value
+        self._dic_rev_int = {}
 
     def __repr__(self):
         return "{}: <{}-->{}>[{}]".format(
@@ -184,17 +209,22 @@ class CCSDSKey(object):
           * Passed on to ``fctunpack``
         """
         chunk = packet[self._hex_slice]
-        if self.octets:
-            if len(chunk) != self.len//8 and self.hard_l:
-                raise exc.GrabFail(name=self.name, l=self.len)
+        if not self.octets and len(chunk) == self._bitfield.size\
+                and 'litFucInd' not in kwargs:
+            # bit-field engine, reads the chunk as a single integer
+            res = self._bit_unpack(self._bitfield.unpack(chunk), **kwargs)
         else:
-            chunk = bincore.hex2bin(chunk, pad=True)[self._bin_sub_slice]
-            if len(chunk) != self.len and self.hard_l:
-                raise exc.GrabFail(name=self.name, l=self.len)
-        if self._fctunpack is None:
-            res = self._dic_rev(bincore.reverse_if_little_endian(chunk))
-        else:
-            res = self._fctunpack(chunk, **kwargs)
+            if self.octets:
+                if len(chunk) != self.len//8 and self.hard_l:
+                    raise exc.GrabFail(name=self.name, l=self.len)
+            else:
+                chunk = bincore.hex2bin(chunk, pad=True)[self._bin_sub_slice]
+                if len(chunk) != self.len and self.hard_l:
+                    raise exc.GrabFail(name=self.name, l=self.len)
+            if self._fctunpack is None:
+                res = self._dic_rev(bincore.reverse_if_little_endian(chunk))
+            else:
+                res = self._fctunpack(chunk, **kwargs)
         if self.fctfix is not None:
             res = self.fctfix(res, **kwargs)
         if unram and self.unram is not None:
@@ -217,6 +247,13 @@ class CCSDSKey(object):
         """
         if self.isdic and self.dic_force is not None:
             value = self.dic_force
+        if not self.octets and not self.isdic and self.hard_l\
+                and len(kwargs) == 0:
+            # bit-field engine, packs the integer value of the bits
+            v = self._bit_pack(value)
+            if v is not None:
+                return bincore.reverse_if_little_endian(
+                                                self._bitfield.tobin(v))
         if self._fctpack is None:
             res = bincore.reverse_if_little_endian(self[value])
         else:
@@ -230,6 +267,91 @@ class CCSDSKey(object):
             return bincore.hex2bin(res, pad=True)
         return res
 
+    def _bit_unpack(self, value, **kwargs):
+        """
+        Converts the unsigned integer value of the bits of the key, as
+        extracted by the bit-field engine, into the unpacked value
+
+        Args:
+          * value (int): the unsigned integer value of the bits
+
+        Kwargs:
+          * Passed on to ``fctunpack`` if applicable
+        """
+        if self.isdic:
+            if value not in self._dic_rev_int:
+                self._dic_rev_int[value] =\
+                                self._dic_rev(self._bitfield.tobin(value))
+            return self._dic_rev_int[value]
+        typ = TYP[self.typ]
+        if typ == 'int':
+            return value
+        elif typ == 'intSign':
+            return self._bitfield.signed(value)
+        elif typ == 'bool':
+            return bool(value)
+        # the other converters are only defined on bits
+        return self._fctunpack(bincore.reverse_if_little_endian(
+                                    self._bitfield.tobin(value)), **kwargs)
+
+    def _bit_pack(self, value):
+        """
+        Returns the unsigned integer value of the bits encoding
+        ``value``, for the bit-field engine, or ``None`` if the key can
+        only be packed by ``fctpack``
+
+        Args:
+          * value: the value to pack
+        """
+        if self.isdic:
+            bits = self[self.dic_force if self.dic_force is not None\
+                                        else value]
+            if not isinstance(bits, str) or len(bits) != self.len\
+                    or bits.strip('01') != '':
+                return None
+            return int(bits, 2)
+        typ = TYP[self.typ]
+        if typ == 'int':
+            value = int(value)
+            if 0 <= value <= self._bitfield.mask:
+                return value
+        elif typ == 'intSign':
+            value = int(value)
+            half = (self._bitfield.mask + 1) // 2
+            if -half <= value < half:
+                return value & self._bitfield.mask
+        elif typ == 'bool' and self.len == 1:
+            value = int(value)
+            if value in [0, 1]:
+                return value
+        return None
+
+    def _struct_code(self):
+        """
+        Returns the ``struct`` code of an octet-aligned key and the
+        post-decoder to apply on the struct output, or ``None`` if
+        the struct output is already the unpacked value
+        """
+        n = int(self.len//8)
+        if self.isdic:
+            return '{}s'.format(n), self._struct_dic
+        typ = TYP[self.typ]
+        if (typ, n) in STRUCTTYP:
+            return STRUCTTYP[(typ, n)], None
+        return '{}s'.format(n), self._struct_raw
+
+    def _struct_dic(self, value, **kwargs):
+        """
+        Post-decoder of a struct-unpacked dic key
+        """
+        return self._dic_rev(bincore.reverse_if_little_endian(Byt(value)))
+
+    def _struct_raw(self, value, **kwargs):
+        """
+        Post-decoder of a struct-unpacked chain of octets
+        """
+        return self._fctunpack(Byt(value), **kwargs)
+
     def _dic_rev(self, value):
         """
         Performs the reverse search in the dictionary: given a
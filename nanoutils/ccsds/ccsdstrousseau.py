@@ -25,21 +25,55 @@
 ###############################################################################
 
 
+import struct
 from byt import Byt
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 from nanoutils import fcts
 from nanoutils import bincore
 from nanoutils import param_sys
+from nanoutils import BitField
 
 
 from . import ccsdsexception as exc
-from .ccsdskey import CCSDSKey
+from .ccsdskey import CCSDSKey, TYP
 
 
 __all__ = ['CCSDSTrousseau']
 
 
+def _object_column(values):
+    """
+    Returns a numpy column of objects holding the ``values``
+    """
+    col = numpy.empty(len(values), dtype=object)
+    for idx, v in enumerate(values):
+        col[idx] = v
+    return col
+
+
+def _apply_column(fct, col, **kwargs):
+    """
+    Applies ``fct`` on the whole column ``col`` if its formula allows
+    it, else value by value
+    """
+    try:
+        res = fct(col, **kwargs)
+    except Exception:
+        res = None
+    if isinstance(res, numpy.ndarray) and res.shape == col.shape:
+        return res
+    vals = [fct(v, **kwargs) for v in col.tolist()]
+    res = numpy.array(vals)
+    if res.ndim == 1 and res.dtype.kind in 'biuf':
+        return res
+    return _object_column(vals)
+
+
 class CCSDSTrousseau(object):
     def __init__(self, keylist, listof=False):
         """
@@ -69,6 +103,7 @@ class CCSDSTrousseau(object):
             self.keys.append(item)
         self.size = int(self.size/8)
         self._make_fmt()
+        self._compile()
 
     def _make_fmt(self, splt=", "):
         """
@@ -87,6 +122,48 @@ class CCSDSTrousseau(object):
             l.append(txt)
         self.fmt = splt.join(l)
 
+    def _compile(self):
+        """
+        Compiles the trousseau for fast unpacking. Octet-aligned
+        trousseaux are compiled into a single ``struct`` format and the
+        list of post-decoders to apply key by key, so that a whole
+        trousseau decodes in one ``unpack_from`` call. Other trousseaux
+        get the bit-fields of their keys over the whole trousseau, so
+        that it (un)packs as a single integer.
+        Leaves ``_struct`` and ``_bitfields`` to ``None`` if the
+        trousseau cannot be compiled (overlapping or unordered keys,
+        last octet incomplete)
+        """
+        self._struct = None
+        self._postdec = []
+        self._bitfields = None
+        self._struct_lit = bincore.TWINKLETWINKLELITTLEINDIA
+        pos = 0
+        for item in self.keys:
+            if item.start < pos:
+                return
+            pos = item.end
+        if len(self.keys) == 0 or pos > self.size*8:
+            return
+        if not self.octets:
+            self._bitfields = [(item, BitField(start=item.start, l=item.len,
+                                               size=self.size))\
+                                    for item in self.keys]
+            return
+        fmt = ['<' if self._struct_lit else '>']
+        postdec = []
+        pos = 0
+        for item in self.keys:
+            start = int(item.start//8)
+            if start > pos:
+                fmt.append('{}x'.format(start - pos))
+            code, dec = item._struct_code()
+            fmt.append(code)
+            postdec.append((item, dec))
+            pos = int(item.end//8)
+        self._struct = struct.Struct(''.join(fmt))
+        self._postdec = postdec
+
     def pack(self, allvalues, **kwargs):
         """
         Does the packing loop for the list of CCSDS keys
@@ -100,6 +177,12 @@ class CCSDSTrousseau(object):
         """
         values = dict(allvalues)
         retvals = {}
+        if self._bitfields is not None and len(kwargs) == 0:
+            # bit-field engine, packs the trousseau as a single integer
+            word = self._bit_pack(values, retvals)
+            if word is not None:
+                return bincore.int2hex(word, pad=self.size), retvals
+            retvals = {}
         if not self.octets:
             chunk = '0' * (self.size * 8)
             conv = 1
@@ -121,6 +204,25 @@ class CCSDSTrousseau(object):
         else:
             return chunk, retvals
 
+    def _bit_pack(self, values, retvals):
+        """
+        Packs the values into the integer value of the trousseau,
+        filling ``retvals`` with the values encoded. Returns ``None``
+        if a key cannot be packed by the bit-field engine
+        """
+        word = 0
+        for item, bitfield in self._bitfields:
+            if item.name not in values.keys() and item.dic_force is None:
+                # got no values for this key, wtf
+                raise exc.PacketValueMissing(item.name)
+            retvals[item.name] = values[item.name] if item.dic_force is None\
+                                                            else item.dic_force
+            v = item._bit_pack(retvals[item.name])
+            if v is None:
+                return None
+            word |= v << bitfield.shift
+        return word
+
     def unpack(self, data, **kwargs):
         """
         Unpacks the data according to the list of keys
@@ -135,6 +237,9 @@ class CCSDSTrousseau(object):
             return self._unpack(data)
         else:
             nlines = len(data) // self.size
+            if self._can_fast_unpack(kwargs):
+                return [self._fast_unpack(data, idx*self.size, **kwargs)\
+                            for idx in range(nlines)]
             res = []
             for idx in range(nlines):
                 chunk = data[idx*self.size:(idx+1)*self.size]
@@ -142,10 +247,149 @@ class CCSDSTrousseau(object):
             # returns a list of the pk_id
             return res
 
+    def unpack_columns(self, data, **kwargs):
+        """
+        Unpacks the records of the data according to the list of keys,
+        as columns: returns a dictionary of numpy arrays indexed by key
+        names, plus the conversion columns of the keys having a
+        ``fctunram``, with one item per record.
+        Integer and boolean keys of up to 8 octets and float keys are
+        decoded vectorized, the other keys are decoded once per
+        distinct value. ``fctfix`` and ``fctunram`` are applied on the
+        whole column where their formula allows it, else value by value
+
+        Args:
+          * data (byts): the data to unpack, given as chain of bytes
+
+        Kwargs are passed to the ``fctfix`` and ``fctunram`` functions
+        """
+        if numpy is None:
+            raise exc.NumpyMissing()
+        if self.size == 0:
+            return {}
+        nlines = len(data) // self.size
+        raw = numpy.frombuffer(bytes(data[:nlines*self.size]),
+                               dtype=numpy.uint8).reshape(nlines, self.size)
+        res = {}
+        for item in self.keys:
+            col = self._unpack_column(item, raw[:, item._hex_slice],
+                                      **kwargs)
+            if item.fctfix is not None:
+                col = _apply_column(item.fctfix, col, **kwargs)
+            res[item.name] = col
+            # check if conversion available
+            if item.unram is not None:
+                # add to result dict
+                res[item.name+param_sys.SUFIXCONVERSION] =\
+                                    _apply_column(item.unram, col, **kwargs)
+        return res
+
+    def _unpack_column(self, item, chunk, **kwargs):
+        """
+        Decodes the column of octets ``chunk`` holding the key ``item``
+        """
+        lit = bincore.TWINKLETWINKLELITTLEINDIA
+        typ = None if item.isdic else TYP[item.typ]
+        n = chunk.shape[1]
+        if typ in ['int', 'intSign', 'bool'] and n <= 8:
+            # integer value of the chunk, least significant octet first
+            word = numpy.zeros(chunk.shape[0], dtype=numpy.uint64)
+            for idx, octet in enumerate(chunk.T if lit else chunk.T[::-1]):
+                word |= octet.astype(numpy.uint64) << numpy.uint64(8*idx)
+            bitfield = item._bitfield
+            word = (word >> numpy.uint64(bitfield.shift))\
+                        & numpy.uint64(bitfield.mask)
+            if typ == 'bool':
+                return word.astype(bool)
+            elif typ == 'int':
+                return word if item.len == 64 else word.astype(numpy.int64)
+            elif item.len == 1:
+                # bin2intSign reads a single bit as unsigned
+                return word.astype(numpy.int64)
+            # sign extension
+            pad = numpy.uint64(64 - item.len)
+            return (word << pad).view(numpy.int64) >> numpy.int64(pad)
+        elif typ in ['float', 'double'] and item.octets:
+            dtype = numpy.dtype('f{}'.format(n)).newbyteorder(
+                                                    '<' if lit else '>')
+            # signaling NaNs are carried over as is, like struct does
+            with numpy.errstate(invalid='ignore'):
+                return numpy.ascontiguousarray(chunk).view(dtype)[:, 0]\
+                                .astype(numpy.float64)
+        # decode once per distinct value
+        if chunk.shape[0] == 0:
+            return _object_column([])
+        uniq, inv = numpy.unique(chunk, axis=0, return_inverse=True)
+        if item.octets:
+            dec = item._struct_code()[1]
+            vals = [dec(Byt(u.tobytes()), **kwargs) for u in uniq]
+        else:
+            vals = [item._bit_unpack(item._bitfield.unpack(Byt(u.tobytes())),
+                                     **kwargs) for u in uniq]
+        return _object_column(vals)[inv.reshape(-1)]
+
+    def _can_fast_unpack(self, kwargs):
+        """
+        Whether the compiled struct can be used, recompiles it if
+        the endianness changed since the last compilation
+        """
+        if self._struct is None or 'litFucInd' in kwargs:
+            return False
+        if self._struct_lit != bincore.TWINKLETWINKLELITTLEINDIA:
+            self._compile()
+        return self._struct is not None
+
+    def _fast_unpack(self, data, offset=0, **kwargs):
+        """
+        Compiled unpack routine, decodes the trousseau starting at
+        ``offset`` in ``data`` with a single ``unpack_from``
+        """
+        res = {}
+        values = self._struct.unpack_from(data, offset)
+        for (item, dec), v in zip(self._postdec, values):
+            if dec is not None:
+                v = dec(v, **kwargs)
+            if item.fctfix is not None:
+                v = item.fctfix(v, **kwargs)
+            res[item.name] = v
+            # check if conversion available
+            if item.unram is not None:
+                # add to result dict
+                res[item.name+param_sys.SUFIXCONVERSION] =\
+                                    item.unram(v, **kwargs)
+        return res
+
+    def _bit_unpack(self, data, **kwargs):
+        """
+        Bit-field unpack routine, reads the trousseau as a single
+        integer and extracts the keys from it
+        """
+        res = {}
+        word = bincore.hex2int(data[:self.size])
+        for item, bitfield in self._bitfields:
+            if item._bitdec:
+                v = item._bit_unpack(bitfield.extract(word), **kwargs)
+                if item.fctfix is not None:
+                    v = item.fctfix(v, **kwargs)
+            else:
+                v = item.unpack(data, **kwargs)
+            res[item.name] = v
+            # check if conversion available
+            if item.unram is not None:
+                # add to result dict
+                res[item.name+param_sys.SUFIXCONVERSION] =\
+                                    item.unram(v, **kwargs)
+        return res
+
     def _unpack(self, data, **kwargs):
         """
         Basic unpack routine
         """
+        if len(data) >= self.size and self._can_fast_unpack(kwargs):
+            return self._fast_unpack(data, **kwargs)
+        elif len(data) >= self.size and self._bitfields is not None\
+                and 'litFucInd' not in kwargs:
+            return self._bit_unpack(data, **kwargs)
         res = {}
         for item in self.keys:
             res[item.name] = item.unpack(data, **kwargs)
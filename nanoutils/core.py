@@ -35,34 +35,55 @@ from .fcts import *
 from . import fcts as _fcts
 from . import ctrlexception as exc
 from .posixutc import PosixUTC
+from .kisscodec import split_kiss, KISSDeframer
+from .reassembler import FlowReassembler
+from .packetid import PacketIDAllocator
+
+
+PACKETIDS = None
+
+
+def get_packet_id_allocator():
+    """
+    Returns the TC packet id allocator of the process
+    """
+    global PACKETIDS
+    if PACKETIDS is None:
+        PACKETIDS = PacketIDAllocator(param_all.PACKETIDFULLFILE.path,
+                                      maxid=param_all.MAXPACKETID)
+    return PACKETIDS
 
 
 def get_tc_packet_id():
     """
     Just reads the packet id from the file
     """
-    f = open(param_all.PACKETIDFULLFILE.path, mode='r')
-    res = int(f.readline().strip())
-    f.close()
-    return res
+    return get_packet_id_allocator().current()
 
 
 def get_next_tc_packet_id():
     """
     Reads the packet id from the file and adds one
     """
-    return (get_tc_packet_id()+1) % param_all.MAXPACKETID
+    return get_packet_id_allocator().peek()
 
 
 def get_set_next_tc_packet_id():
     """
     Reads the packet id from the file, adds one and saves new value
     """
-    v = get_next_tc_packet_id()
-    f = open(param_all.PACKETIDFULLFILE.path, mode='w')
-    f.write(str(v))
-    f.close()
-    return v
+    return get_packet_id_allocator().next()
+
+
+def reserve_tc_packet_ids(n):
+    """
+    Reserves ``n`` packet ids at once for the process, which are used
+    by the next calls to ``get_set_next_tc_packet_id``. Returns the ids
+
+    Args:
+      * n (int): the number of ids to reserve
+    """
+    return get_packet_id_allocator().reserve(n)
 
 
 def append_logfile(message):
@@ -114,16 +135,34 @@ def split_flow(data, n=-1):
     if not param_all.FRAMESFLOW:
         raise exc.NotInFramesFlow()
     # split CCSDS using the special split chars
-    if not AX25ENCAPS:
+    if not param_all.AX25ENCAPS:
         res = split_ccsds(Byt(data), int(n))
         # no split found
         if len(res) < 2:
             return res
         # apply recovery of escaped chars to all splits found except last one
         return list(map(recover_ccsds, res[:-1])) + res[-1:]
-    # split KISS using the special split chars
+    # split KISS on FEND, frames are kept escaped and delimited for the
+    # AX25+KISS decoding
+    elif param_all.KISSENCAPS:
+        return split_kiss(data, int(n))
+    else:
+        raise exc.NotImplemented("Unknown mode")
+
+
+def get_flow_reassembler():
+    """
+    Returns a reassembler of the packets of the flow, to be fed with the
+    chunks of the flow as they are received. Its packets are the same as
+    the ones ``split_flow`` gives
+    """
+    if not param_all.FRAMESFLOW:
+        raise exc.NotInFramesFlow()
+    if not param_all.AX25ENCAPS:
+        return FlowReassembler(param_all.CCSDSSPLITCHAR*2,
+                               recover=recover_ccsds)
     elif param_all.KISSENCAPS:
-        raise exc.NotImplemented("Frames-FLow with KISS")
+        return KISSDeframer(unescape=False)
     else:
         raise exc.NotImplemented("Unknown mode")
 
@@ -148,9 +187,9 @@ def merge_flow(datalist, trailingSplit=True):
         if trailingSplit:
             res += param_all.CCSDSSPLITCHAR*2
         return res
-    # merge KISS using the special split chars
+    # KISS frames are already delimited by FEND
     elif param_all.KISSENCAPS:
-        raise exc.NotImplemented("Frames-FLow with KISS")
+        return Byt().join([Byt(item) for item in datalist if len(item) > 0])
     else:
         raise exc.NotImplemented("Unknown mode")
 
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import zlib
+from byt import Byt
+
+
+__all__ = ['CRC32', 'PayloadCRC32']
+
+
+# bit-reversed value of each octet
+REVERSEDOCTETS = bytes(bytearray(int("{:08b}".format(i)[::-1], 2)\
+                                    for i in range(256)))
+
+# octets of message processed at once by the payload crc
+PAYLOADCHUNK = 2**16
+
+
+def _buffer(data):
+    """
+    Returns the data as a buffer, converts anything else than a buffer
+    to Byt
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    return Byt(data)
+
+
+class CRC32(object):
+    def __init__(self, crc=None):
+        """
+        Streaming CRC32 with the standard polynomial 0xEDB88320,
+        computed by zlib. ``value`` equals ``fcts.crc32`` of all the
+        data given to ``update``, in as many chunks as you like
+
+        Args:
+          * crc (int): the crc start-value, as in ``fcts.crc32``
+        """
+        crc = 0xffffffff if crc is None else int(crc)
+        # zlib running value
+        self._crc = (crc ^ 0xffffffff) & 0xffffffff
+
+    def update(self, data):
+        """
+        Adds the octets ``data`` to the checksum, returns the CRC32
+        object
+        """
+        self._crc = zlib.crc32(_buffer(data), self._crc) & 0xffffffff
+        return self
+
+    @property
+    def value(self):
+        """
+        The CRC of the data given so far
+        """
+        return self._crc
+
+
+class PayloadCRC32(object):
+    def __init__(self):
+        """
+        Streaming CRC of the payload (stm32 crc unit): polynomial
+        0x04C11DB7 fed with 32-bit words, each octet of the message
+        being one word. ``value`` equals ``fcts.payload_crc32`` of all
+        the data given to ``update``, in as many chunks as you like.
+
+        That non-reflected crc is the bit-reversed reflected crc of
+        the bit-reversed octets, which zlib computes
+        """
+        # zlib running value over the bit-reversed words
+        self._crc = 0
+
+    def update(self, data):
+        """
+        Adds the octets ``data`` to the checksum, returns the
+        PayloadCRC32 object
+        """
+        data = _buffer(data)
+        for idx in range(0, len(data), PAYLOADCHUNK):
+            chunk = bytes(data[idx:idx+PAYLOADCHUNK])
+            # each octet is the last octet of a 32-bit word
+            words = bytearray(4*len(chunk))
+            words[3::4] = chunk.translate(REVERSEDOCTETS)
+            self._crc = zlib.crc32(bytes(words), self._crc) & 0xffffffff
+        return self
+
+    @property
+    def value(self):
+        """
+        The CRC of the data given so far
+        """
+        return int("{:032b}".format(self._crc ^ 0xffffffff)[::-1], 2)
@@ -257,3 +257,40 @@ class NoSuchKey(CTRLException):
         self._init(param, key, *args, **kwargs)
         self.message = "No key '{}' in param '{}'".format(key, param)
 
+
+class InvalidDBValue(CTRLException):
+    """
+    If a value column of the database is not a valid encoded value
+    """
+    def __init__(self, value, *args, **kwargs):
+        self._init(value, *args, **kwargs)
+        self.message = "Invalid DB value '{}'".format(value)
+
+
+class NoSuchTMField(CTRLException):
+    """
+    If the field requested is not in the tables of the TM category
+    """
+    def __init__(self, field, *args, **kwargs):
+        self._init(field, *args, **kwargs)
+        self.message = "No field '{}' in the TM category tables"\
+                       .format(field)
+
+
+class RawRecordCorrupted(CTRLException):
+    """
+    If a record of the raw telemetry store is damaged
+    """
+    def __init__(self, segment, offset, *args, **kwargs):
+        self._init(segment, offset, *args, **kwargs)
+        self.message = "Corrupted record at offset {} of raw segment '{}'"\
+                       .format(offset, segment)
+
+
+class RawSegmentInUse(CTRLException):
+    """
+    If the raw segment to remove is being appended to
+    """
+    def __init__(self, segment, *args, **kwargs):
+        self._init(segment, *args, **kwargs)
+        self.message = "Raw segment '{}' is in use".format(segment)
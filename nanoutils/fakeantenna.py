@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import os
+import tty
+import fcntl
+import struct
+import termios
+import select
+
+
+__all__ = ['FakeAntenna']
+
+
+class FakeAntenna(object):
+    def __init__(self):
+        """
+        A pty-backed antenna for tests and benchmarks, that exposes the
+        same interface as the ``nanoantennae`` backends.
+
+        The listening side (``read``, ``in_waiting``, ``write``,
+        ``fileno``) is the slave end of the pty, as a serial port would
+        be; the radio side is the master end: ``feed`` pushes octets as
+        if they were received from the satellite and ``sent`` returns
+        the octets written to the antenna.
+        """
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.closed = False
+
+    def fileno(self):
+        """
+        The file descriptor to wait on for incoming data
+        """
+        return self._slave
+
+    def in_waiting(self):
+        """
+        Returns the number of octets ready to be read
+        """
+        res = fcntl.ioctl(self._slave, termios.FIONREAD,
+                          struct.pack('i', 0))
+        return struct.unpack('i', res)[0]
+
+    def read(self, size=1):
+        """
+        Reads at most ``size`` octets, blocking until at least one is
+        available
+
+        Args:
+        * size (int): the max number of octets to read
+        """
+        if size <= 0:
+            return b''
+        return os.read(self._slave, size)
+
+    def write(self, data):
+        """
+        Sends ``data`` through the antenna
+
+        Args:
+        * data (bytes): the octets to send
+        """
+        return os.write(self._slave, bytes(data))
+
+    def feed(self, data):
+        """
+        Pushes ``data`` to the antenna, as if received from the satellite
+
+        Args:
+        * data (bytes): the octets received
+        """
+        data = bytes(data)
+        while len(data) > 0:
+            n = os.write(self._master, data)
+            data = data[n:]
+
+    def sent(self, timeout=0):
+        """
+        Returns the octets sent through the antenna since last call
+
+        Args:
+        * timeout (float): the time in sec to wait for a first octet
+        """
+        res = b''
+        while len(select.select([self._master], [], [], timeout)[0]) > 0:
+            res += os.read(self._master, 4096)
+            timeout = 0
+        return res
+
+    def close(self):
+        """
+        Closes the antenna
+        """
+        if self.closed:
+            return
+        os.close(self._slave)
+        os.close(self._master)
+        self.closed = True
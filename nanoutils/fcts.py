@@ -35,6 +35,7 @@ from sympy import solve, sympify
 
 
 from .posixutc import PosixUTC
+from .crc import CRC32, PayloadCRC32
 from . import PYTHON3
 
 
@@ -193,7 +194,9 @@ def crc32(message, crc=None):
     Give a message, returns a CRC on 4 octet using
     basecrc as crc start-value (if given)
     """
-    crc = 0xffffffff if crc is None else int(crc)
+    if crc is None or 0 <= int(crc) <= 0xffffffff:
+        return CRC32(crc=crc).update(message).value
+    crc = int(crc)
     for byte in Byt(message).iterInts():
         crc = (crc >> 8) ^ CRC32TABLE[(crc ^ byte) & 0xFF]
     return two_comp_uint(crc, 32)
@@ -213,13 +216,9 @@ del poly, i, byte, c
 def payload_crc32(message):
     """
     code to compute fucking stm32 non-standard crc with standard polynomial
+    Use ``PayloadCRC32`` to checksum large images chunk by chunk
     """
-    crc = 0xffffffff
-    for i in Byt(message).iterInts():
-        b = [(i >> 24) & 0xFF, (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF]
-        for byte in b:
-            crc = ((crc << 8) & 0xffffffff) ^ payload_crc_table[(crc >> 24) ^ byte]
-    return crc
+    return PayloadCRC32().update(message).value
 
 
 def inverse_eqn(eqn):
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+
+
+from . import param_sys
+
+
+__all__ = ['kiss_escape', 'kiss_unescape', 'split_kiss', 'KISSDeframer']
+
+
+# Marks START and END of a Frame
+FEND = b'\xc0'
+# Escapes FEND and FESC bytes within a frame
+FESC = b'\xdb'
+# 0xC0 is sent as 0xDB 0xDC
+FESC_TFEND = b'\xdb\xdc'
+# 0xDB is sent as 0xDB 0xDD
+FESC_TFESC = b'\xdb\xdd'
+
+
+def kiss_escape(data):
+    """
+    Escapes the FEND and FESC codes of ``data``, as per KISS
+    specification, in linear time
+
+    Args:
+      * data (bytes): the frame content to escape
+    """
+    data = bytes(data)
+    # most frames have nothing to escape
+    if data.find(FESC) == -1 and data.find(FEND) == -1:
+        return Byt(data)
+    return Byt(data.replace(FESC, FESC_TFESC).replace(FEND, FESC_TFEND))
+
+
+def kiss_unescape(data):
+    """
+    Recovers the FEND and FESC codes of ``data``, as per KISS
+    specification, in linear time. An escaped FESC is always followed
+    by TFEND or TFESC, so both replacements never overlap and give the
+    same result as a left-to-right walk
+
+    Args:
+      * data (bytes): the escaped frame content
+    """
+    data = bytes(data)
+    if data.find(FESC) == -1:
+        return Byt(data)
+    return Byt(data.replace(FESC_TFEND, FEND).replace(FESC_TFESC, FESC))
+
+
+def split_kiss(data, n=-1):
+    """
+    Splits the complete KISS frames out of a flow. Returns a list of
+    size 1 at minimum, and ``n+1`` at maximum: the frames, still
+    escaped and delimited by FEND, and as [-1] element the remainder of
+    the flow from its last FEND. Octets before the first FEND are
+    dropped, as well as empty frames
+
+    Args:
+      * data (bytes): the flow to split
+      * n (int): the maximum number of frames to split, -1 for all
+    """
+    data = bytes(data)
+    end = data.rfind(FEND)
+    if end == -1:
+        return [Byt(data)]
+    frames = [item for item in data[:end].split(FEND)[1:] if len(item) > 0]
+    n = len(frames) if n < 0 else int(n)
+    rest = b''.join(FEND + item for item in frames[n:]) + data[end:]
+    return [Byt(FEND + item + FEND) for item in frames[:n]] + [Byt(rest)]
+
+
+class KISSDeframer(object):
+    def __init__(self, unescape=True, maxsize=None):
+        """
+        Reassembles KISS frames from a flow received in chunks of any
+        size
+
+        If the pending octets exceed ``maxsize``, they are dropped and
+        the frames resume at the next FEND
+
+        Args:
+          * unescape (bool): if ``True``, the frames are returned
+            without FEND delimiters and with special codes recovered,
+            otherwise as received, delimited by FEND
+          * maxsize (int): the max number of pending octets, default
+            ``param_sys.FLOWMAXBUFFER``
+        """
+        self.unescape = bool(unescape)
+        self.maxsize = int(param_sys.FLOWMAXBUFFER if maxsize is None
+                           else maxsize)
+        self.dropped = 0
+        self._buffer = bytearray()
+
+    @property
+    def pending(self):
+        """
+        The number of octets received and not part of a complete frame
+        yet
+        """
+        return len(self._buffer)
+
+    def reset(self):
+        """
+        Drops the pending octets
+        """
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """
+        Appends ``data`` to the flow, returns the list of frames it
+        completed
+
+        Args:
+          * data (bytes): the next chunk of the flow
+        """
+        if len(data) == 0:
+            return []
+        start = len(self._buffer)
+        self._buffer.extend(data)
+        # only the new octets can complete a frame
+        if bytes(data).find(FEND) == -1:
+            if len(self._buffer) > self.maxsize:
+                # the octets up to the next FEND are dropped as junk
+                self.dropped += len(self._buffer)
+                self._buffer = bytearray()
+            return []
+        end = self._buffer.rfind(FEND, start)
+        parts = bytes(self._buffer[:end]).split(FEND)[1:]
+        del self._buffer[:end]
+        if self.unescape:
+            return [kiss_unescape(item) for item in parts if len(item) > 0]
+        return [Byt(FEND + item + FEND) for item in parts if len(item) > 0]
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import sys
+import time
+import traceback
+from threading import Thread, Lock, Semaphore
+try:
+    import Queue as queue
+except:
+    import queue
+
+
+__all__ = ['OrderedPool']
+
+
+# tells a worker thread to stop
+_STOP = object()
+
+
+class OrderedPool(object):
+    def __init__(self, func, nworkers, maxsize, whenDone=None,
+                    whenFailed=None):
+        """
+        A bounded pool of worker threads running ``func`` on the queued
+        items, and handing the results over in the same order as the
+        items were queued, whatever the order of completion
+
+        Args:
+          * func (callable): called as ``func(*args, **kwargs)`` with
+            the arguments given to ``put``
+          * nworkers (int): the number of worker threads
+          * maxsize (int): the max number of items queued and not yet
+            handed over, ``put`` blocks when reached
+          * whenDone (callable): called as ``whenDone(result)`` with
+            the result of ``func``, in queuing order
+          * whenFailed (callable): called as
+            ``whenFailed(error, *args, **kwargs)``, in queuing order, if
+            ``func`` or ``whenDone`` raised. The errors raised by
+            ``whenFailed`` itself are printed on stderr
+        """
+        self.func = func
+        self.nworkers = max(1, int(nworkers))
+        self.maxsize = max(1, int(maxsize))
+        self.whenDone = whenDone if callable(whenDone) else None
+        self.whenFailed = whenFailed if callable(whenFailed) else None
+        self._queue = queue.Queue()
+        self._slots = Semaphore(self.maxsize)
+        self._lock = Lock()
+        self._deliverlock = Lock()
+        self._results = {}
+        self._seq = 0
+        self._next = 0
+        self._stats = {'done': 0, 'failed': 0, 'latency': 0.,
+                        'maxlatency': 0., 'maxdepth': 0}
+        self.running = True
+        self._threads = []
+        for _ in range(self.nworkers):
+            thread = Thread(target=self._loop)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def put(self, *args, **kwargs):
+        """
+        Queues an item for processing. Blocks if ``maxsize`` items are
+        pending
+
+        Args:
+          * passed on to ``func``
+
+        Kwargs:
+          * passed on to ``func``
+        """
+        self._slots.acquire()
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+            depth = self._seq - self._next
+            self._stats['maxdepth'] = max(self._stats['maxdepth'], depth)
+        self._queue.put((seq, args, kwargs, time.time()))
+
+    @property
+    def depth(self):
+        """
+        The number of items queued and not yet handed over
+        """
+        with self._lock:
+            return self._seq - self._next
+
+    def stats(self):
+        """
+        Returns a dictionary with the pool ``depth`` and ``maxdepth``,
+        the number of items ``done`` and ``failed``, and the mean and
+        max ``latency`` in ms between queuing and handing over
+        """
+        with self._lock:
+            res = dict(self._stats)
+            res['depth'] = self._seq - self._next
+        return res
+
+    def close(self):
+        """
+        Processes and hands over the pending items, and stops the
+        worker threads
+        """
+        if not self.running:
+            return
+        self.running = False
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _loop(self):
+        """
+        A worker thread: processes the items, then hands over all the
+        results ready in order
+        """
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            seq, args, kwargs, t = item
+            try:
+                res = (True, self.func(*args, **kwargs))
+            except Exception as e:
+                res = (False, e)
+            with self._lock:
+                self._results[seq] = res + (args, kwargs, t)
+            self._deliver()
+
+    def _deliver(self):
+        """
+        Hands over the consecutive results available from the next
+        expected one; a single thread at a time does it to keep the order
+        """
+        with self._deliverlock:
+            while True:
+                with self._lock:
+                    res = self._results.pop(self._next, None)
+                    if res is None:
+                        break
+                    self._next += 1
+                ok, value, args, kwargs, t = res
+                if ok and self.whenDone is not None:
+                    try:
+                        self.whenDone(value)
+                    except Exception as e:
+                        ok, value = False, e
+                if not ok:
+                    self._failed(value, args, kwargs)
+                self._count(ok, (time.time() - t) * 1000)
+                self._slots.release()
+
+    def _failed(self, error, args, kwargs):
+        """
+        Hands over a failed item to ``whenFailed``, an error raised
+        there cannot be handed over and is printed on stderr
+        """
+        if self.whenFailed is None:
+            return
+        try:
+            self.whenFailed(error, *args, **kwargs)
+        except Exception:
+            sys.stderr.write("Exception in OrderedPool.whenFailed:\n")
+            traceback.print_exc()
+
+    def _count(self, ok, latency):
+        with self._lock:
+            key = 'done' if ok else 'failed'
+            n = self._stats['done'] + self._stats['failed']
+            self._stats[key] += 1
+            self._stats['latency'] = round((self._stats['latency'] * n
+                                            + latency) / (n + 1), 2)
+            self._stats['maxlatency'] = round(max(self._stats['maxlatency'],
+                                                  latency), 2)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import os
+import fcntl
+from collections import deque
+from threading import Lock
+
+
+from . import param_sys
+
+
+__all__ = ['PacketIDAllocator']
+
+
+class PacketIDAllocator(object):
+    def __init__(self, path, maxid, fsync=None):
+        """
+        Hands out TC packet ids, shared by all the processes using the
+        same counter file. The file holds the last id handed out or
+        reserved, as text
+
+        The file is locked during each allocation, and only re-read if
+        another process replaced it since this one last read or wrote
+        it. It is updated by writing a temporary file renamed over it,
+        so it is never seen half-written
+
+        Args:
+          * path (str): the counter file
+          * maxid (int): the ids wrap around to 0 at ``maxid``
+          * fsync (bool): whether to flush the counter to the disk at
+            each update, default ``param_sys.PACKETIDFSYNC``
+        """
+        self.path = str(path)
+        self.maxid = int(maxid)
+        self.fsync = bool(param_sys.PACKETIDFSYNC if fsync is None
+                          else fsync)
+        self._lock = Lock()
+        self._lockfile = None
+        self._file = None
+        self._value = None
+        self._pool = deque()
+
+    def current(self):
+        """
+        Returns the last id handed out or reserved by any process
+        """
+        with self._locked():
+            return self._load()
+
+    def peek(self):
+        """
+        Returns the id that the next call to ``next`` will return, if no
+        other process allocates in between
+        """
+        with self._locked():
+            if len(self._pool) > 0:
+                return self._pool[0]
+            return (self._load() + 1) % self.maxid
+
+    def next(self):
+        """
+        Returns a new id, taken from the ids reserved by this process if
+        any, otherwise from the counter file
+        """
+        with self._locked():
+            if len(self._pool) > 0:
+                return self._pool.popleft()
+            return self._allocate(1)[0]
+
+    def reserve(self, n):
+        """
+        Reserves ``n`` consecutive ids with a single update of the
+        counter file, for bursts of TCs. They are handed out by the next
+        calls to ``next`` of this allocator, before any new id. Returns
+        the ids reserved
+
+        Args:
+          * n (int): the number of ids to reserve
+        """
+        with self._locked():
+            res = self._allocate(int(n))
+            self._pool.extend(res)
+            return res
+
+    def release(self):
+        """
+        Forgets the ids reserved and not handed out yet. They are not
+        given back to the counter
+        """
+        with self._lock:
+            self._pool.clear()
+
+    def _allocate(self, n):
+        """
+        Returns the ``n`` next ids from the counter file, and moves the
+        counter forward. To be called with the lock
+        """
+        value = self._load()
+        res = [(value + i) % self.maxid for i in range(1, n + 1)]
+        if len(res) > 0:
+            self._store(res[-1])
+        return res
+
+    def _locked(self):
+        """
+        Returns a context manager holding both the thread lock and the
+        inter-process lock of the counter file
+        """
+        return _FileLock(self)
+
+    def _load(self):
+        """
+        Returns the counter, read from the file only if it was replaced
+        since last read or written. The last version is kept open, so
+        that its inode can not be reused by a new version
+        """
+        st = os.stat(self.path)
+        if self._file is not None:
+            known = os.fstat(self._file.fileno())
+            if (st.st_ino, st.st_dev) == (known.st_ino, known.st_dev):
+                return self._value
+        f = open(self.path, mode='r')
+        value = int(f.readline().strip())
+        self._keep(f, value)
+        return value
+
+    def _store(self, value):
+        """
+        Atomically replaces the counter file
+        """
+        tmp = "{}.{}.tmp".format(self.path, os.getpid())
+        f = open(tmp, mode='w')
+        f.write(str(value))
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        f.close()
+        f = open(tmp, mode='r')
+        os.rename(tmp, self.path)
+        self._keep(f, value)
+
+    def _keep(self, f, value):
+        if self._file is not None:
+            self._file.close()
+        self._file = f
+        self._value = value
+
+
+class _FileLock(object):
+    def __init__(self, allocator):
+        self.allocator = allocator
+
+    def __enter__(self):
+        alloc = self.allocator
+        alloc._lock.acquire()
+        try:
+            if alloc._lockfile is None:
+                alloc._lockfile = open(alloc.path + '.lock', mode='a')
+            fcntl.flock(alloc._lockfile.fileno(), fcntl.LOCK_EX)
+        except:
+            alloc._lock.release()
+            raise
+        return alloc
+
+    def __exit__(self, *args):
+        alloc = self.allocator
+        try:
+            fcntl.flock(alloc._lockfile.fileno(), fcntl.LOCK_UN)
+        finally:
+            alloc._lock.release()
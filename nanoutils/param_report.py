@@ -54,6 +54,18 @@ REPORTSDATA = [
         ['who']),
     ('savedTM', "'{who}' saved data under dbid '{dbid}'",
         ['who', 'dbid']),
+    ('failedTM', "'{who}' failed saving '{path}': {error}",
+        ['who', 'path', 'error']),
+    ('failedArchive', "'{who}' failed archiving '{segment}': {error}",
+        ['who', 'segment', 'error']),
+    ('caughtUpTM', "'{who}' queued {n} raw records stored while not "\
+        "listening",
+        ['who', 'n']),
+    ('saveQueue', "'{who}' saved {saved} packets ({failed} failed) in "\
+        "{batches} batches, {depth} pending (max {maxdepth}), latency "\
+        "{latency} ms (max {maxlatency} ms)",
+        ['who', 'depth', 'maxdepth', 'saved', 'failed', 'batches',
+         'latency', 'maxlatency'], False),
     ('myPID', "'{who}' has PID '{pid}'",
         ['who', 'pid']),
     ('IamDead', "Process '{who}' is dead",
@@ -65,6 +77,16 @@ REPORTSDATA = [
         ['who', 'll']),
     ('GotBlob', "'{who}' got blob of data of len '{ll}'",
         ['who', 'll', 'blob']),
+    ('flowResync', "'{who}' dropped '{ll}' octets of the frames flow",
+        ['who', 'll']),
+    ('failedBlob', "'{who}' failed processing blob at offset {offset} of "\
+        "'{segment}': {error}",
+        ['who', 'segment', 'offset', 'error']),
+    ('listenQueue', "'{who}' processed {done} blobs ({failed} failed), "\
+        "{depth} pending (max {maxdepth}), latency {latency} ms "\
+        "(max {maxlatency} ms)",
+        ['who', 'depth', 'maxdepth', 'done', 'failed', 'latency',
+         'maxlatency'], False),
     ('SettingUpAntenna', "Setting up antenna '{antenna}'",
         ['who', 'antenna']),
     ('gotACK', "Got acknowledment",
@@ -42,3 +42,69 @@ HMACLIBLINUX = 'hmaclib.so'
 
 # the root of the ctrl repo
 ROOTCTRL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# max number of rows in a single multi-rows insert in the database
+DBINSERTCHUNK = 1000
+
+
+# write-behind queue of telemetries to save in the database:
+# max pending packets, max packets per commit, max waiting time in sec
+SAVEQUEUEMAXSIZE = 10000
+SAVEQUEUEBATCH = 200
+SAVEQUEUEFLUSH = 1.
+
+
+# cache file of the database schema
+DBSCHEMACACHE = os.path.join(ROOTCTRL, '.dbschema.cache')
+
+
+# database connections pool: kept open, and extra when all are in use
+DBPOOLSIZE = 5
+DBPOOLOVERFLOW = 10
+
+
+# number of rows fetched at once from the database server-side cursors
+DBQUERYCHUNK = 10000
+
+
+# listening: max time in sec waiting for the antenna before checking if
+# the loop should stop, and sleeping time for antennae without fileno
+ANTENNAWAIT = 0.5
+ANTENNAPOLL = 0.01
+
+
+# listening: worker threads sending the received blobs, max blobs pending
+# before the loop blocks, and time in sec between queue reports
+LISTENWORKERS = 1
+LISTENQUEUEMAXSIZE = 1000
+LISTENPOOLREPORT = 10.
+
+
+# raw telemetry store: segment names prefix, size in octets and age in
+# sec after which segments are rotated
+RAWSTOREPREFIX = 'raw'
+RAWSEGMENTSIZE = 64 * 2**20
+RAWSEGMENTTIME = 3600.
+
+
+# archiving of the raw telemetry on the server: max items per batch, max
+# waiting time in sec, time in sec before the first reconnection attempt
+# (doubled at each retry), number of retries before giving up, whether
+# the segments of a batch are uploaded as a single tar per folder, and
+# number of SFTP channels the files are uploaded over in parallel
+ARCHIVEBATCH = 50
+ARCHIVEFLUSH = 5.
+ARCHIVERETRYWAIT = 1.
+ARCHIVEMAXRETRY = 5
+ARCHIVEBUNDLE = False
+ARCHIVECHANNELS = 4
+
+
+# frames flow: max octets pending in a reassembly buffer before dropping
+# them and resynchronizing on the next delimiter
+FLOWMAXBUFFER = 2**20
+
+
+# whether the TC packet id counter is flushed to the disk at each update
+PACKETIDFSYNC = True
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import os
+import json
+import zlib
+import glob
+import struct
+import bisect
+from threading import Lock
+from byt import Byt
+
+
+from . import param_sys
+from . import ctrlexception as exc
+from .posixutc import PosixUTC
+
+
+__all__ = ['RawStore']
+
+
+# record header: magic, length of data, posix time, crc32 of data
+RECORDMAGIC = b'\xa5\x5a'
+RECORDHEAD = struct.Struct('<2sIdI')
+# index entry: offset of the record in the segment, posix time
+INDEXENTRY = struct.Struct('<Qd')
+
+SEGMENTEXT = '.seg'
+INDEXEXT = '.idx'
+CHECKPOINTEXT = '.ckpt'
+SEGMENTNAME = '{prefix}_{seq:08d}_{t:%Y%m%dT%H%M%S}' + SEGMENTEXT
+
+
+def _timestamp(t):
+    """
+    Returns ``t`` (datetime, posix float or None for now) as a posix float
+    """
+    if t is None:
+        t = PosixUTC.now()
+    if hasattr(t, 'totimestamp'):
+        return t.totimestamp()
+    if hasattr(t, 'timetuple'):
+        return PosixUTC.fromdatetime(t).totimestamp()
+    return float(t)
+
+
+class RawStore(object):
+    def __init__(self, folder, prefix=None, maxsize=None, maxtime=None):
+        """
+        An append-only store of raw telemetry blobs, as length-prefixed
+        records with their reception time and crc32, in segment files
+        rotated by size or age. Each segment comes with an index file of
+        the offset and time of its records
+
+        A record is located by the segment name and its offset in the
+        segment. Only one process should append to a given store, any
+        number can read it
+
+        Args:
+          * folder (str): the folder of the segments
+          * prefix (str): the prefix of the segment names, default
+            ``param_sys.RAWSTOREPREFIX``
+          * maxsize (int): the size in octets after which a segment
+            is rotated, default ``param_sys.RAWSEGMENTSIZE``
+          * maxtime (float): the age in seconds after which a segment
+            is rotated, default ``param_sys.RAWSEGMENTTIME``
+        """
+        self.folder = str(folder)
+        self.prefix = str(param_sys.RAWSTOREPREFIX if prefix is None
+                          else prefix)
+        self.maxsize = int(param_sys.RAWSEGMENTSIZE if maxsize is None
+                           else maxsize)
+        self.maxtime = float(param_sys.RAWSEGMENTTIME if maxtime is None
+                             else maxtime)
+        self._lock = Lock()
+        self._seg = None
+        self._idx = None
+        self._current = None
+        self._size = 0
+        self._start = 0.
+
+    @property
+    def current(self):
+        """
+        The name of the segment being appended to, ``None`` if none is
+        open
+        """
+        return self._current
+
+    def path(self, segment):
+        """
+        Returns the path of the ``segment`` file
+        """
+        return os.path.join(self.folder, segment)
+
+    def files(self, segment):
+        """
+        Returns the paths of the ``segment`` file and of its index file
+        """
+        path = self.path(segment)
+        return [path, path + INDEXEXT]
+
+    def segments(self):
+        """
+        Returns the names of the segments on the disk, oldest first
+        """
+        res = glob.glob(os.path.join(self.folder,
+                                     self.prefix + '_*' + SEGMENTEXT))
+        return sorted(os.path.basename(item) for item in res)
+
+    @staticmethod
+    def segment_time(segment):
+        """
+        Returns the creation time of the ``segment`` from its name
+        """
+        stamp = os.path.splitext(segment)[0].rsplit('_', 1)[1]
+        return PosixUTC(int(stamp[:4]), int(stamp[4:6]), int(stamp[6:8]),
+                        int(stamp[9:11]), int(stamp[11:13]),
+                        int(stamp[13:15]))
+
+    def append(self, data, t=None):
+        """
+        Appends a record, rotates the segment beforehand if it is full
+        or too old. Returns the segment name and the offset of the record
+
+        Args:
+          * data (bytes): the blob to store
+          * t (datetime or float): the reception time, default now
+        """
+        data = bytes(data)
+        ts = _timestamp(t)
+        head = RECORDHEAD.pack(RECORDMAGIC, len(data), ts,
+                               zlib.crc32(data) & 0xffffffff)
+        with self._lock:
+            if self._current is None\
+                    or (self._size > 0
+                        and self._size + len(head) + len(data) > self.maxsize)\
+                    or ts - self._start >= self.maxtime:
+                self._rotate(ts)
+            offset = self._size
+            self._seg.write(head + data)
+            self._seg.flush()
+            self._idx.write(INDEXENTRY.pack(offset, ts))
+            self._idx.flush()
+            self._size += len(head) + len(data)
+            return self._current, offset
+
+    def rotate(self):
+        """
+        Closes the current segment, the next append opens a new one
+        """
+        with self._lock:
+            self._close()
+
+    def close(self):
+        """
+        Closes the current segment
+        """
+        self.rotate()
+
+    def _rotate(self, ts):
+        self._close()
+        segments = self.segments()
+        seq = int(segments[-1].split('_')[-2]) + 1 if len(segments) > 0\
+                else 0
+        self._current = SEGMENTNAME.format(prefix=self.prefix, seq=seq,
+                                           t=PosixUTC.fromtimestamp(ts))
+        path = self.path(self._current)
+        self._seg = open(path, mode='ab')
+        self._idx = open(path + INDEXEXT, mode='ab')
+        self._size = 0
+        self._start = ts
+
+    def _close(self):
+        if self._current is None:
+            return
+        for f in (self._seg, self._idx):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        self._seg = None
+        self._idx = None
+        self._current = None
+
+    def read(self, segment, offset):
+        """
+        Returns the time and data of the record at ``offset`` in the
+        ``segment``
+        """
+        f = open(self.path(segment), mode='rb')
+        try:
+            f.seek(offset)
+            res = self._read_record(f, segment, offset)
+        finally:
+            f.close()
+        if res is None:
+            raise exc.RawRecordCorrupted(segment, offset)
+        return res
+
+    def iter_records(self, segment, offset=0):
+        """
+        Yields the offset, time and data of the records of the
+        ``segment`` from ``offset``. Stops at the end of the segment or
+        at an incomplete record being written
+
+        Args:
+          * segment (str): the name of the segment
+          * offset (int): the offset of the first record to read
+        """
+        f = open(self.path(segment), mode='rb')
+        try:
+            f.seek(offset)
+            while True:
+                res = self._read_record(f, segment, offset)
+                if res is None:
+                    break
+                yield (offset,) + res
+                offset += self.record_size(res[1])
+        finally:
+            f.close()
+
+    @staticmethod
+    def record_size(data):
+        """
+        Returns the size taken in a segment by the record of ``data``,
+        i.e. the offset of the next record from that of this one
+        """
+        return RECORDHEAD.size + len(data)
+
+    @staticmethod
+    def _read_record(f, segment, offset):
+        """
+        Reads the record at the position of ``f``, returns ``None`` if
+        it is not complete
+        """
+        head = f.read(RECORDHEAD.size)
+        if len(head) < RECORDHEAD.size:
+            return None
+        magic, n, ts, crc = RECORDHEAD.unpack(head)
+        if magic != RECORDMAGIC:
+            raise exc.RawRecordCorrupted(segment, offset)
+        data = f.read(n)
+        if len(data) < n:
+            return None
+        if zlib.crc32(data) & 0xffffffff != crc:
+            raise exc.RawRecordCorrupted(segment, offset)
+        return PosixUTC.fromtimestamp(ts), Byt(data)
+
+    def index(self, segment):
+        """
+        Returns the offsets and posix times of the records of the
+        ``segment``, read from its index file, or rebuilt from the
+        segment if the index is missing or behind
+        """
+        path = self.path(segment)
+        res = []
+        if os.path.isfile(path + INDEXEXT):
+            f = open(path + INDEXEXT, mode='rb')
+            raw = f.read()
+            f.close()
+            n = len(raw) // INDEXENTRY.size
+            res = [INDEXENTRY.unpack_from(raw, i * INDEXENTRY.size)
+                   for i in range(n)]
+        start = 0
+        if len(res) > 0:
+            start = res[-1][0]
+            res.pop(-1)
+        for offset, t, data in self.iter_records(segment, start):
+            res.append((offset, t.totimestamp()))
+        return res
+
+    def find(self, segment, t):
+        """
+        Returns the offset of the first record of the ``segment``
+        received at or after ``t``, ``None`` if there is none
+        """
+        index = self.index(segment)
+        i = bisect.bisect_left([item[1] for item in index], _timestamp(t))
+        if i == len(index):
+            return None
+        return index[i][0]
+
+    def remove(self, segment):
+        """
+        Deletes the ``segment`` and its index, which must not be the
+        current one
+        """
+        if segment == self._current:
+            raise exc.RawSegmentInUse(segment)
+        for item in self.files(segment):
+            if os.path.isfile(item):
+                os.remove(item)
+
+    def save_checkpoint(self, name, **kwargs):
+        """
+        Atomically saves the ``kwargs`` as the ``name`` checkpoint of a
+        reader of the store, e.g. the last segment and offset processed
+        """
+        path = os.path.join(self.folder, name + CHECKPOINTEXT)
+        f = open(path + '.tmp', mode='w')
+        json.dump(kwargs, f)
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.rename(path + '.tmp', path)
+
+    def load_checkpoint(self, name):
+        """
+        Returns the ``name`` checkpoint dictionary, empty if none
+        """
+        path = os.path.join(self.folder, name + CHECKPOINTEXT)
+        if not os.path.isfile(path):
+            return {}
+        f = open(path, mode='r')
+        res = json.load(f)
+        f.close()
+        return res
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+
+
+from . import param_sys
+
+
+__all__ = ['FlowReassembler']
+
+
+class FlowReassembler(object):
+    def __init__(self, delimiter, recover=None, maxsize=None):
+        """
+        Reassembles the packets of a flow received in chunks of any
+        size, the packets being separated by ``delimiter``. Each chunk is
+        appended to a buffer, and only the octets not searched yet are
+        searched for the delimiter
+
+        If the pending octets exceed ``maxsize``, they are dropped, as
+        well as the octets up to the next delimiter, which belong to a
+        truncated packet
+
+        Args:
+          * delimiter (bytes): the packets separator
+          * recover (callable): applied to each complete packet, e.g. to
+            unescape the delimiter, if not ``None``
+          * maxsize (int): the max number of pending octets, default
+            ``param_sys.FLOWMAXBUFFER``
+        """
+        self.delimiter = bytes(delimiter)
+        self.recover = recover if callable(recover) else None
+        self.maxsize = int(param_sys.FLOWMAXBUFFER if maxsize is None
+                           else maxsize)
+        self.dropped = 0
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._resync = False
+
+    @property
+    def pending(self):
+        """
+        The number of octets received and not part of a complete packet
+        yet
+        """
+        return len(self._buffer)
+
+    def reset(self):
+        """
+        Drops the pending octets
+        """
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._resync = False
+
+    def feed(self, data):
+        """
+        Appends ``data`` to the flow, returns the list of non-empty
+        packets it completed
+
+        Args:
+          * data (bytes): the next chunk of the flow
+        """
+        self._buffer.extend(data)
+        res = []
+        start = 0
+        # a delimiter may straddle the previous chunk and this one
+        pos = max(0, self._scanned - len(self.delimiter) + 1)
+        while True:
+            idx = self._buffer.find(self.delimiter, pos)
+            if idx == -1:
+                break
+            if self._resync:
+                # end of the truncated packet
+                self.dropped += idx - start
+                self._resync = False
+            elif idx > start:
+                packet = Byt(bytes(self._buffer[start:idx]))
+                res.append(packet if self.recover is None
+                           else self.recover(packet))
+            start = pos = idx + len(self.delimiter)
+        if start > 0:
+            del self._buffer[:start]
+        if len(self._buffer) > self.maxsize:
+            # keep what may be the beginning of a delimiter
+            keep = len(self.delimiter) - 1
+            self.dropped += len(self._buffer) - keep
+            del self._buffer[:len(self._buffer) - keep]
+            self._resync = True
+        self._scanned = len(self._buffer)
+        return res
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import os
+import shutil
+import socket
+import tarfile
+import tempfile
+import datetime
+import threading
+import time
+import paramiko
+from nanoutils.archiver import Archiver
+
+
+HOSTKEY = []
+
+
+class LocalServer(paramiko.ServerInterface):
+    """
+    A SFTP server on localhost, rooted in a folder, which can be told
+    to drop the connection at the next file opened
+    """
+    def __init__(self, root):
+        self.root = root
+        self.calls = []
+        self.drop = 0
+        self.delay = 0
+        self.opened = 0
+        self.maxopened = 0
+        self.lock = threading.Lock()
+        self.transports = []
+        if len(HOSTKEY) == 0:
+            HOSTKEY.append(paramiko.RSAKey.generate(1024))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                sock, addr = self.sock.accept()
+            except (OSError, socket.error):
+                return
+            self.calls.append('connect')
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(HOSTKEY[0])
+            transport.set_subsystem_handler('sftp', paramiko.SFTPServer,
+                                            LocalSFTP)
+            transport.start_server(server=self)
+            self.transports.append((sock, transport))
+
+    def connect(self):
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh.connect('127.0.0.1', port=self.port, username='ctrl',
+                    password='ctrl', look_for_keys=False, allow_agent=False)
+        return ssh, ssh.open_sftp()
+
+    def close(self):
+        self.sock.close()
+        for sock, transport in self.transports:
+            transport.close()
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        self.calls.append('channel')
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class LocalHandle(paramiko.SFTPHandle):
+    def close(self):
+        with self.server.lock:
+            self.server.opened -= 1
+        paramiko.SFTPHandle.close(self)
+
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(
+                                        os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class LocalSFTP(paramiko.SFTPServerInterface):
+    def __init__(self, server, *args, **kwargs):
+        self.server = server
+        paramiko.SFTPServerInterface.__init__(self, server, *args, **kwargs)
+
+    def _path(self, path):
+        return os.path.join(self.server.root, path.lstrip('/'))
+
+    def stat(self, path):
+        self.server.calls.append('stat')
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._path(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def mkdir(self, path, attr):
+        self.server.calls.append('mkdir')
+        try:
+            os.mkdir(self._path(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def open(self, path, flags, attr):
+        self.server.calls.append('put')
+        if self.server.drop > 0:
+            self.server.drop -= 1
+            for sock, transport in self.server.transports:
+                sock.shutdown(socket.SHUT_RDWR)
+            return paramiko.SFTP_CONNECTION_LOST
+        try:
+            f = open(self._path(path), mode='w+b')
+        except (OSError, IOError) as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        with self.server.lock:
+            self.server.opened += 1
+            self.server.maxopened = max(self.server.maxopened,
+                                        self.server.opened)
+        time.sleep(self.server.delay)
+        handle = LocalHandle(flags)
+        handle.server = self.server
+        handle.readfile = f
+        handle.writefile = f
+        return handle
+
+
+def _remotepath(t):
+    return t.strftime('/data/1/%Y%m%d')
+
+
+def _setup(drop=0, remotepath=_remotepath, **kwargs):
+    local = tempfile.mkdtemp()
+    remote = tempfile.mkdtemp()
+    server = LocalServer(remote)
+    server.drop = drop
+    done = []
+    arch = Archiver(connect=server.connect, remotepath=remotepath,
+                    flushtime=0.2, retrywait=0.01,
+                    whenArchived=lambda name: done.append(name),
+                    whenFailed=lambda e, name: done.append(('failed', name)),
+                    **kwargs)
+    paths = []
+    for i in range(6):
+        path = os.path.join(local, 'seg{}'.format(i))
+        f = open(path, mode='wb')
+        f.write(b'raw' * i)
+        f.close()
+        paths.append(path)
+    return local, remote, server, done, arch, paths
+
+
+def _teardown(local, remote, server):
+    server.close()
+    shutil.rmtree(local)
+    shutil.rmtree(remote)
+
+
+DAY1 = datetime.datetime(2017, 3, 1, 12)
+DAY2 = datetime.datetime(2017, 3, 2, 12)
+
+
+def test_archiver_batch():
+    local, remote, server, done, arch, paths = _setup(nchannels=1)
+    for i, path in enumerate(paths):
+        arch.put([path], t=DAY1 if i < 4 else DAY2, name=i)
+    arch.close()
+    assert done == list(range(6))
+    assert sorted(os.listdir(os.path.join(remote, 'data', '1'))) \
+                == ['20170301', '20170302']
+    folder = os.path.join(remote, 'data', '1', '20170301')
+    assert sorted(os.listdir(folder)) == ['seg0', 'seg1', 'seg2', 'seg3']
+    assert open(os.path.join(folder, 'seg2'), mode='rb').read() == b'rawraw'
+    calls = server.calls
+    assert calls.count('connect') == 1
+    assert calls.count('channel') == 1
+    # remote folders checked once per connection, the missing ones are
+    # created
+    assert calls.count('mkdir') == 4
+    assert calls.count('put') == 6
+    assert arch.stats()['archived'] == 6
+    _teardown(local, remote, server)
+
+
+def test_archiver_channels():
+    local, remote, server, done, arch, paths = _setup(nchannels=3)
+    server.delay = 0.1
+    arch.put(paths[:2], t=DAY1, name=0)
+    arch.put(paths[2:], t=DAY1, name=1)
+    arch.close()
+    assert done == [0, 1]
+    folder = os.path.join(remote, 'data', '1', '20170301')
+    assert sorted(os.listdir(folder)) == [os.path.basename(path)
+                                          for path in paths]
+    for i, path in enumerate(paths):
+        assert open(os.path.join(folder, os.path.basename(path)),
+                    mode='rb').read() == b'raw' * i
+    # the files are uploaded in parallel over the same connection
+    assert server.calls.count('connect') == 1
+    assert server.calls.count('channel') == 3
+    assert server.maxopened == 3
+    _teardown(local, remote, server)
+
+
+def test_archiver_remotepath_error():
+    def remotepath(t):
+        if t == DAY2:
+            raise ValueError(t)
+        return _remotepath(t)
+
+    local, remote, server, done, arch, paths = _setup(remotepath=remotepath)
+    arch.put(paths[:1], t=DAY2, name=0)
+    arch.put(paths[1:2], t=DAY1, name=1)
+    arch.close()
+    assert done == [('failed', 0), 1]
+    assert arch.stats()['failed'] == 1
+    _teardown(local, remote, server)
+
+
+def test_archiver_reconnect():
+    local, remote, server, done, arch, paths = _setup(drop=1)
+    arch.put(paths[:2], t=DAY1, name=0)
+    arch.close()
+    assert done == [0]
+    assert server.calls.count('connect') == 2
+    assert arch.stats()['reconnections'] == 2
+    assert sorted(os.listdir(os.path.join(remote, 'data', '1', '20170301')))\
+                == ['seg0', 'seg1']
+    _teardown(local, remote, server)
+
+
+def test_archiver_giveup():
+    local, remote, server, done, arch, paths = _setup(maxretry=0)
+    os.remove(paths[0])
+    arch.put(paths[:1], t=DAY1, name=0)
+    arch.close()
+    assert done == [('failed', 0)]
+    assert arch.stats()['failed'] == 1
+    _teardown(local, remote, server)
+
+
+def test_archiver_bundle():
+    local, remote, server, done, arch, paths = _setup(bundle=True)
+    arch.put(paths[:3], t=DAY1, name=0)
+    arch.put(paths[3:], t=DAY1, name=1)
+    arch.close()
+    assert done == [0, 1]
+    folder = os.path.join(remote, 'data', '1', '20170301')
+    assert os.listdir(folder) == ['seg0+6.tar']
+    tar = tarfile.open(os.path.join(folder, 'seg0+6.tar'))
+    assert tar.getnames() == ['seg{}'.format(i) for i in range(6)]
+    assert tar.extractfile('seg2').read() == b'rawraw'
+    tar.close()
+    _teardown(local, remote, server)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+from nanoutils.kisscodec import kiss_escape, kiss_unescape, split_kiss,\
+                                KISSDeframer
+
+
+def test_escape():
+    assert kiss_escape(Byt('abc')) == Byt('abc')
+    assert kiss_escape(Byt('a\xc0b\xdbc')) == Byt('a\xdb\xdcb\xdb\xddc')
+    assert kiss_escape(Byt('\xdb\xdc')) == Byt('\xdb\xdd\xdc')
+
+
+def test_unescape():
+    assert kiss_unescape(Byt('abc')) == Byt('abc')
+    assert kiss_unescape(Byt('a\xdb\xdcb\xdb\xddc')) == Byt('a\xc0b\xdbc')
+    assert kiss_unescape(Byt('\xdb\xdd\xdc')) == Byt('\xdb\xdc')
+    # lone escape kept as is
+    assert kiss_unescape(Byt('\xdb\xdb\xdc')) == Byt('\xdb\xc0')
+    for txt in ['', '\xc0', '\xdb', '\xc0\xdb\xdc\xdd', 'a\xdb\xc0\xdb']:
+        assert kiss_unescape(kiss_escape(Byt(txt))) == Byt(txt)
+
+
+def test_split_kiss():
+    assert split_kiss(Byt('ab')) == [Byt('ab')]
+    assert split_kiss(Byt('ab\xc0cd')) == [Byt('\xc0cd')]
+    assert split_kiss(Byt('\xc0a\xc0\xc0b\xc0c')) == [Byt('\xc0a\xc0'),
+                                        Byt('\xc0b\xc0'), Byt('\xc0c')]
+    assert split_kiss(Byt('\xc0a\xc0\xc0b\xc0c'), 1) == [Byt('\xc0a\xc0'),
+                                        Byt('\xc0b\xc0c')]
+
+
+def test_deframer():
+    frames = [Byt('\x00ab\xc0'), Byt('\x00\xdb'), Byt('\x00cd')]
+    flow = Byt('junk') + Byt().join([Byt('\xc0') + kiss_escape(item)
+                                      + Byt('\xc0') for item in frames])
+    for size in [1, 2, 3, 5, len(flow)]:
+        deframer = KISSDeframer()
+        res = []
+        for i in range(0, len(flow), size):
+            res += deframer.feed(flow[i:i+size])
+        assert res == frames
+        assert deframer.pending == 1
+    deframer = KISSDeframer(unescape=False)
+    assert deframer.feed(Byt('\xc0\x00a\xdb\xdc\xc0\xc0\x00b')) \
+                == [Byt('\xc0\x00a\xdb\xdc\xc0')]
+    assert deframer.feed(Byt('\xc0')) == [Byt('\xc0\x00b\xc0')]
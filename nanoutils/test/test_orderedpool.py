@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import time
+import threading
+from nanoutils.orderedpool import OrderedPool
+
+
+def test_pool_order():
+    events = [threading.Event() for _ in range(4)]
+    done = []
+
+    def func(i):
+        events[i].wait(5)
+        return i
+
+    pool = OrderedPool(func, nworkers=4, maxsize=10, whenDone=done.append)
+    for i in range(4):
+        pool.put(i)
+    # complete in reverse order
+    for i in range(3, -1, -1):
+        events[i].set()
+        time.sleep(0.05)
+        if i > 0:
+            assert done == []
+    pool.close()
+    assert done == [0, 1, 2, 3]
+    stats = pool.stats()
+    assert stats['done'] == 4 and stats['failed'] == 0
+    assert stats['depth'] == 0 and stats['maxdepth'] == 4
+
+
+def test_pool_backpressure():
+    event = threading.Event()
+    done = []
+    pool = OrderedPool(lambda i: event.wait(5) and i, nworkers=1, maxsize=2,
+                       whenDone=done.append)
+    pool.put(0)
+    pool.put(1)
+    thread = threading.Thread(target=pool.put, args=(2,))
+    thread.start()
+    thread.join(0.2)
+    # blocked until a slot is handed over
+    assert thread.is_alive()
+    assert pool.depth == 2
+    event.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    pool.close()
+    assert done == [0, 1, 2]
+
+
+def test_pool_close_drains():
+    done = []
+
+    def func(i):
+        time.sleep(0.001 * (i % 3))
+        return i
+
+    pool = OrderedPool(func, nworkers=3, maxsize=100, whenDone=done.append)
+    for i in range(50):
+        pool.put(i)
+    pool.close()
+    assert done == list(range(50))
+    assert pool.depth == 0
+    assert pool.stats()['done'] == 50
+
+
+def test_pool_failures():
+    done = []
+    failed = []
+
+    def func(i, tag=None):
+        if i % 2:
+            raise ValueError(i)
+        return i
+
+    def when_done(i):
+        if i == 4:
+            raise KeyError(i)
+        done.append(i)
+
+    def when_failed(error, i, tag=None):
+        failed.append((type(error), i, tag))
+        if i == 5:
+            raise RuntimeError("reporting is down")
+
+    pool = OrderedPool(func, nworkers=2, maxsize=10, whenDone=when_done,
+                       whenFailed=when_failed)
+    for i in range(7):
+        pool.put(i, tag='t{}'.format(i))
+    pool.close()
+    assert done == [0, 2, 6]
+    # errors of whenDone are handed over to whenFailed, those of
+    # whenFailed do not stop the pool
+    assert failed == [(ValueError, 1, 't1'), (ValueError, 3, 't3'),
+                      (KeyError, 4, 't4'), (ValueError, 5, 't5')]
+    stats = pool.stats()
+    assert stats['done'] == 3 and stats['failed'] == 4
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import os
+import shutil
+import tempfile
+from nanoutils.packetid import PacketIDAllocator
+
+
+def _counter(value):
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, 'packetid')
+    f = open(path, mode='w')
+    f.write(str(value))
+    f.close()
+    return folder, path
+
+
+def test_allocator_next():
+    folder, path = _counter(5)
+    alloc = PacketIDAllocator(path, maxid=8, fsync=False)
+    assert alloc.current() == 5
+    assert alloc.peek() == 6
+    assert [alloc.next() for _ in range(4)] == [6, 7, 0, 1]
+    assert open(path).read() == '1'
+    shutil.rmtree(folder)
+
+
+def test_allocator_reserve():
+    folder, path = _counter(0)
+    alloc = PacketIDAllocator(path, maxid=100, fsync=False)
+    other = PacketIDAllocator(path, maxid=100, fsync=False)
+    assert alloc.reserve(3) == [1, 2, 3]
+    assert other.next() == 4
+    assert [alloc.next() for _ in range(4)] == [1, 2, 3, 5]
+    assert other.next() == 6
+    alloc.reserve(2)
+    alloc.release()
+    assert alloc.next() == 9
+    shutil.rmtree(folder)
+
+
+def test_allocator_shared():
+    folder, path = _counter(0)
+    allocs = [PacketIDAllocator(path, maxid=1000, fsync=False)
+              for _ in range(3)]
+    res = [allocs[i % 3].next() for i in range(30)]
+    assert res == list(range(1, 31))
+    assert allocs[0].current() == 30
+    shutil.rmtree(folder)
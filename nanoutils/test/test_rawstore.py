@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+import os
+import shutil
+import tempfile
+from byt import Byt
+from nanoutils import ctrlexception
+from nanoutils.rawstore import RawStore, RECORDHEAD, INDEXENTRY
+
+
+T0 = 1600000000.25
+
+
+def _store(**kwargs):
+    folder = tempfile.mkdtemp()
+    kwargs.setdefault('maxsize', 10000)
+    kwargs.setdefault('maxtime', 3600)
+    return folder, RawStore(folder, prefix='raw', **kwargs)
+
+
+def _fill(store, n=5):
+    res = []
+    for i in range(n):
+        data = Byt('blob{}'.format(i) * (i + 1))
+        segment, offset = store.append(data, t=T0 + i)
+        res.append((segment, offset, data))
+    return res
+
+
+def test_append_read():
+    folder, store = _store()
+    items = _fill(store)
+    segment = items[0][0]
+    assert store.current == segment
+    assert [item[0] for item in items] == [segment] * 5
+    assert items[0][1] == 0
+    assert items[1][1] == RECORDHEAD.size + len(items[0][2])
+    for i, (seg, offset, data) in enumerate(items):
+        t, res = store.read(seg, offset)
+        assert bytes(res) == bytes(data)
+        assert t.totimestamp() == T0 + i
+    res = list(store.iter_records(segment))
+    assert [item[0] for item in res] == [item[1] for item in items]
+    res = list(store.iter_records(segment, items[3][1]))
+    assert [bytes(item[2]) for item in res] ==\
+                [bytes(item[2]) for item in items[3:]]
+    assert store.segment_time(segment).totimestamp() == int(T0)
+    store.close()
+    assert store.current is None
+    shutil.rmtree(folder)
+
+
+def test_rotation_size():
+    folder, store = _store(maxsize=RECORDHEAD.size * 2 + 20)
+    segs = [store.append(Byt('x' * 10), t=T0 + i)[0] for i in range(5)]
+    # two records per segment
+    assert segs[0] == segs[1] != segs[2] == segs[3] != segs[4]
+    assert store.segments() == sorted(set(segs))
+    assert [int(item.split('_')[1]) for item in store.segments()] ==\
+                [0, 1, 2]
+    # a record larger than a segment still gets stored
+    seg, offset = store.append(Byt('y' * 100), t=T0 + 6)
+    assert seg != segs[4] and offset == 0
+    store.rotate()
+    seg2, offset = store.append(Byt('z'), t=T0 + 7)
+    assert seg2 != seg and offset == 0
+    store.close()
+    shutil.rmtree(folder)
+
+
+def test_rotation_time():
+    folder, store = _store(maxtime=10)
+    segs = [store.append(Byt('x'), t=T0 + 4 * i)[0] for i in range(5)]
+    # t0, t0+4, t0+8 | t0+12, t0+16
+    assert segs[0] == segs[2] != segs[3] == segs[4]
+    assert store.segment_time(segs[3]).totimestamp() == int(T0 + 12)
+    store.close()
+    shutil.rmtree(folder)
+
+
+def test_index():
+    folder, store = _store()
+    items = _fill(store)
+    segment = items[0][0]
+    index = store.index(segment)
+    assert index == [(item[1], T0 + i) for i, item in enumerate(items)]
+    assert store.find(segment, T0 + 2) == items[2][1]
+    assert store.find(segment, T0 + 2.5) == items[3][1]
+    assert store.find(segment, T0 + 10) is None
+    store.close()
+    idxpath = store.files(segment)[1]
+    # truncated index, in the middle of an entry
+    f = open(idxpath, mode='r+b')
+    f.truncate(INDEXENTRY.size * 2 + 3)
+    f.close()
+    assert store.index(segment) == index
+    # missing index
+    os.remove(idxpath)
+    assert store.index(segment) == index
+    shutil.rmtree(folder)
+
+
+def test_incomplete_tail():
+    folder, store = _store()
+    items = _fill(store, 3)
+    segment = items[0][0]
+    store.close()
+    path = store.path(segment)
+    size = os.path.getsize(path)
+    # a record being written: full header, half of the data
+    f = open(path, mode='ab')
+    f.write(RECORDHEAD.pack(b'\xa5\x5a', 10, T0, 0) + b'abcde')
+    f.close()
+    assert len(list(store.iter_records(segment))) == 3
+    assert [item[0] for item in store.index(segment)] ==\
+                [item[1] for item in items]
+    # half a header
+    f = open(path, mode='r+b')
+    f.truncate(size + 5)
+    f.close()
+    assert len(list(store.iter_records(segment))) == 3
+    shutil.rmtree(folder)
+
+
+def _corrupted(fct):
+    try:
+        fct()
+    except ctrlexception.RawRecordCorrupted:
+        return True
+    return False
+
+
+def test_corrupted():
+    folder, store = _store()
+    items = _fill(store, 3)
+    segment = items[0][0]
+    store.close()
+    path = store.path(segment)
+    # bad crc: flip a data octet of the second record
+    f = open(path, mode='r+b')
+    f.seek(items[1][1] + RECORDHEAD.size)
+    f.write(b'X')
+    f.close()
+    assert _corrupted(lambda: store.read(segment, items[1][1]))
+    assert _corrupted(lambda: list(store.iter_records(segment)))
+    assert bytes(store.read(segment, items[0][1])[1]) == bytes(items[0][2])
+    # bad magic
+    f = open(path, mode='r+b')
+    f.seek(items[2][1])
+    f.write(b'\x00')
+    f.close()
+    assert _corrupted(lambda: store.read(segment, items[2][1]))
+    # not a record start
+    assert _corrupted(lambda: store.read(segment, 1))
+    shutil.rmtree(folder)
+
+
+def test_remove():
+    folder, store = _store(maxsize=RECORDHEAD.size + 5)
+    first = store.append(Byt('a'), t=T0)[0]
+    second = store.append(Byt('b'), t=T0 + 1)[0]
+    try:
+        store.remove(second)
+    except ctrlexception.RawSegmentInUse:
+        pass
+    else:
+        assert False
+    store.remove(first)
+    assert store.segments() == [second]
+    assert not any(os.path.exists(item) for item in store.files(first))
+    store.close()
+    shutil.rmtree(folder)
+
+
+def test_checkpoint():
+    folder, store = _store()
+    assert store.load_checkpoint('saving') == {}
+    store.save_checkpoint('saving', segment='raw_00000001_x.seg', offset=42)
+    store.save_checkpoint('other', segment='a', offset=0)
+    other = RawStore(folder, prefix='raw')
+    assert other.load_checkpoint('saving') ==\
+                {'segment': 'raw_00000001_x.seg', 'offset': 42}
+    assert other.load_checkpoint('other') == {'segment': 'a', 'offset': 0}
+    assert not any(item.endswith('.tmp') for item in os.listdir(folder))
+    # checkpoints are not segments
+    assert store.segments() == []
+    shutil.rmtree(folder)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#  
+#  CTRL - Ground-Segment software for Cube-Sats
+#  Copyright (C) 2016-2017  Guillaume Schworer
+#  
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#  
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#  
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  
+#  For any information, bug report, idea, donation, hug, beer, please contact
+#    guillaume.schworer@gmail.com
+#
+###############################################################################
+
+
+
+from byt import Byt
+from nanoutils.reassembler import FlowReassembler
+
+
+def test_reassembler_chunks():
+    flow = Byt('ab::c:;d::::ef::gh')
+    for size in [1, 2, 3, len(flow)]:
+        reassembler = FlowReassembler(Byt('::'),
+                                      recover=lambda x: x.replace(Byt(':;'),
+                                                                  Byt(':')))
+        res = []
+        for i in range(0, len(flow), size):
+            res += reassembler.feed(flow[i:i+size])
+        assert res == [Byt('ab'), Byt('c:d'), Byt('ef')]
+        assert reassembler.pending == 2
+
+
+def test_reassembler_resync():
+    reassembler = FlowReassembler(Byt('::'), maxsize=10)
+    assert reassembler.feed(Byt('ab::') + Byt('x')*20) == [Byt('ab')]
+    assert reassembler.pending == 1
+    assert reassembler.feed(Byt('x::cd::')) == [Byt('cd')]
+    assert reassembler.dropped == 21
+    assert reassembler.pending == 0